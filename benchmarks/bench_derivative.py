@@ -0,0 +1,98 @@
+"""导数环计算：360方向单侧差分 vs 雅可比中心差分，精度与速度对比
+
+对已知解析导数的函数，在一组采样点上比较两种方法的方向导数与解析值的最大相对误差，
+并报告每个环的计算耗时和柯西-黎曼残差。
+
+用法:
+    python benchmarks/bench_derivative.py [--points 400] [--segments 360]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from expression import compile_expression  # noqa: E402
+from jacobian import cauchy_riemann_residual, directional_derivatives, jacobian  # noqa: E402
+
+LEGACY_EPSILON = 1e-4
+
+
+def legacy_derivative(z, func, num_segments):
+    """原实现：沿每个方向做一次单侧差分"""
+    dz_angles = np.linspace(0, 2 * np.pi, num_segments, endpoint=False)
+    dzs = LEGACY_EPSILON * (np.cos(dz_angles) + 1j * np.sin(dz_angles))
+    dfs = func(z + dzs) - func(z)
+    return dz_angles, dfs / LEGACY_EPSILON
+
+
+def jacobian_derivative(z, func, num_segments):
+    f_x, f_y = jacobian(z, func)
+    return directional_derivatives(f_x, f_y, num_segments)
+
+
+def _default_partials(z):
+    x, y = z.real, z.imag
+    return 1 + 2j * x, 1 - 2j * y
+
+
+# (表达式, 解析偏导数 (f_x, f_y))；全纯函数 f_x = f'(z)，f_y = i f'(z)
+CASES = [
+    ("x + y + (x**2 - y**2)*1j", _default_partials),
+    ("z**3", lambda z: (3 * z**2, 3j * z**2)),
+    ("exp(z)", lambda z: (np.exp(z), 1j * np.exp(z))),
+    ("1/z", lambda z: (-1 / z**2, -1j / z**2)),
+    ("conj(z)**2", lambda z: (2 * np.conj(z), -2j * np.conj(z))),
+]
+
+
+def sample_points(count, rng):
+    """[-2, 2]^2 内的随机点，另加若干 |f'| 很大的近原点样本"""
+    zs = rng.uniform(-2, 2, count) + 1j * rng.uniform(-2, 2, count)
+    near = 0.02 * np.exp(2j * np.pi * rng.random(count // 10))
+    return np.concatenate((zs, near))
+
+
+def max_relative_error(method, func, exact, zs, num_segments):
+    worst = 0.0
+    for z in zs:
+        _, dfs = method(z, func, num_segments)
+        f_x, f_y = exact(z)
+        _, expected = directional_derivatives(f_x, f_y, num_segments)
+        err = np.max(np.abs(dfs - expected)) / np.max(np.abs(expected))
+        worst = max(worst, err)
+    return worst
+
+
+def time_per_ring(method, func, zs, num_segments):
+    start = time.perf_counter()
+    for z in zs:
+        method(z, func, num_segments)
+    return (time.perf_counter() - start) / len(zs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=400)
+    parser.add_argument("--segments", type=int, default=360)
+    args = parser.parse_args()
+
+    zs = sample_points(args.points, np.random.default_rng(0))
+    print(f"points: {len(zs)}  segments: {args.segments}")
+    print(f"{'expression':26s} {'legacy err':>11s} {'jacobian err':>13s}"
+          f" {'legacy us':>10s} {'jacobian us':>12s} {'max C-R rel':>12s}")
+    for source, exact in CASES:
+        func = compile_expression(source)
+        legacy_err = max_relative_error(legacy_derivative, func, exact, zs, args.segments)
+        new_err = max_relative_error(jacobian_derivative, func, exact, zs, args.segments)
+        legacy_us = time_per_ring(legacy_derivative, func, zs, args.segments) * 1e6
+        new_us = time_per_ring(jacobian_derivative, func, zs, args.segments) * 1e6
+        _, relative = cauchy_riemann_residual(*jacobian(zs, func))
+        print(f"{source:26s} {legacy_err:11.2e} {new_err:13.2e}"
+              f" {legacy_us:10.1f} {new_us:12.1f} {np.max(relative):12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""df环绘制基准：逐段循环版本 vs 向量化几何版本
+
+用法:
+    python benchmarks/bench_df_ring.py [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from matplotlib.cm import viridis
+import cairo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ring_render import build_df_ring_geometry, draw_df_ring_geometry  # noqa: E402
+
+RING_RADIUS = 24
+RING_WIDTH = 10
+NUM_SEGMENTS = 360
+EPSILON = 1e-4
+
+
+def sample_derivative(z):
+    """基准使用的样例函数 f(z)=x+y+(x^2-y^2)i 的数值导数"""
+    def f(w):
+        x, y = np.real(w), np.imag(w)
+        return x + y + (x**2 - y**2)*1j
+    dz_angles = np.linspace(0, 2 * np.pi, NUM_SEGMENTS, endpoint=False)
+    dzs = EPSILON * (np.cos(dz_angles) + 1j * np.sin(dz_angles))
+    return dz_angles, (f(z + dzs) - f(z)) / EPSILON
+
+
+def draw_df_ring_loop(ctx, x, y, dz_angles, dfs, oversample):
+    """原始的逐段Python循环实现，作为对照基线"""
+    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+    df_abs_values = np.array([abs(df) for df in dfs])
+    smooth_angles = np.linspace(0, 2*np.pi, NUM_SEGMENTS*oversample, endpoint=False)
+    angles_ext = np.append(dz_angles, dz_angles[0] + 2*np.pi)
+    df_abs_ext = np.append(df_abs_values, df_abs_values[0])
+
+    for i in range(len(smooth_angles)):
+        next_idx = (i + 1) % len(smooth_angles)
+        angle = smooth_angles[i]
+        next_angle = smooth_angles[next_idx]
+
+        idx_orig = np.searchsorted(angles_ext, angle) - 1
+        idx_orig = max(0, min(idx_orig, len(angles_ext)-2))
+        next_idx_orig = np.searchsorted(angles_ext, next_angle) - 1
+        next_idx_orig = max(0, min(next_idx_orig, len(angles_ext)-2))
+
+        t1 = (angle - angles_ext[idx_orig]) / (angles_ext[idx_orig+1] - angles_ext[idx_orig])
+        radius = df_abs_ext[idx_orig] + t1 * (df_abs_ext[idx_orig+1] - df_abs_ext[idx_orig])
+        t2 = (next_angle - angles_ext[next_idx_orig]) / (angles_ext[next_idx_orig+1] - angles_ext[next_idx_orig])
+        next_radius = df_abs_ext[next_idx_orig] + t2 * (df_abs_ext[next_idx_orig+1] - df_abs_ext[next_idx_orig])
+        radius = RING_RADIUS * radius
+        next_radius = RING_RADIUS * next_radius
+
+        orig_angle_idx = int((i * NUM_SEGMENTS) / (NUM_SEGMENTS * oversample))
+        color_val = (dz_angles[orig_angle_idx] % (2 * np.pi)) / (2 * np.pi)
+        r, g, b, _ = viridis(color_val)
+
+        ctx.new_path()
+        inner_radius1 = max(0, radius - RING_WIDTH/2)
+        outer_radius1 = radius + RING_WIDTH/2
+        inner_radius2 = max(0, next_radius - RING_WIDTH/2)
+        outer_radius2 = next_radius + RING_WIDTH/2
+        ctx.move_to(x + inner_radius1 * np.cos(angle), y - inner_radius1 * np.sin(angle))
+        ctx.line_to(x + inner_radius2 * np.cos(next_angle), y - inner_radius2 * np.sin(next_angle))
+        ctx.line_to(x + outer_radius2 * np.cos(next_angle), y - outer_radius2 * np.sin(next_angle))
+        ctx.line_to(x + outer_radius1 * np.cos(angle), y - outer_radius1 * np.sin(angle))
+        ctx.close_path()
+        ctx.set_source_rgb(r, g, b)
+        ctx.fill_preserve()
+        ctx.set_line_width(0.5)
+        ctx.set_source_rgba(r, g, b, 0.8)
+        ctx.stroke()
+
+
+def draw_df_ring_vectorized(ctx, x, y, dz_angles, dfs, oversample):
+    geometry = build_df_ring_geometry(x, y, dz_angles, dfs, RING_RADIUS, RING_WIDTH, oversample)
+    draw_df_ring_geometry(ctx, geometry)
+
+
+def time_draw(draw, oversample, rings, repeat):
+    """返回绘制 rings 个环的最短耗时(秒)"""
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 800, 600)
+    ctx = cairo.Context(surface)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for x, y, dz_angles, dfs in rings:
+            draw(ctx, x, y, dz_angles, dfs, oversample)
+        surface.flush()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rings", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rings = []
+    for _ in range(args.rings):
+        z = complex(*rng.uniform(-1.5, 1.5, 2))
+        rings.append((rng.uniform(100, 700), rng.uniform(100, 500), *sample_derivative(z)))
+
+    print(f"{'OVERSAMPLE':>10} {'loop(ms)':>10} {'vector(ms)':>11} {'speedup':>8}")
+    for oversample in (1, 4, 8):
+        t_loop = time_draw(draw_df_ring_loop, oversample, rings, args.repeat) / args.rings
+        t_vec = time_draw(draw_df_ring_vectorized, oversample, rings, args.repeat) / args.rings
+        print(f"{oversample:>10} {t_loop*1e3:>10.2f} {t_vec*1e3:>11.2f} {t_loop/t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""鼠标移动事件吞吐上限：逐事件标量计算 vs 每帧批量向量化计算
+
+在 SDL dummy 驱动下向事件队列投递 MOUSEMOTION 事件，按帧取出并处理，
+报告两种处理方式每秒能消化的事件数。
+
+用法:
+    python benchmarks/bench_motion_events.py [--events-per-frame 500] [--frames 40]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coords import complex_to_screen, screen_to_complex  # noqa: E402
+from trails import TrailStore  # noqa: E402
+
+WINDOW_WIDTH = 1600
+WINDOW_HEIGHT = 1200
+GRID_SIZE = 200
+ORIGIN_X = WINDOW_WIDTH // 2
+ORIGIN_Y = WINDOW_HEIGHT // 2
+
+
+def complex_function(z):
+    x = np.real(z)
+    y = np.imag(z)
+    return x + y + (x**2 - y**2)*1j
+
+
+def mouse2Z(mousex, mousey):
+    return complex((mousex - ORIGIN_X) / GRID_SIZE, -(mousey - ORIGIN_Y) / GRID_SIZE)
+
+
+def z2mouse(z):
+    return (int(z.real * GRID_SIZE) + ORIGIN_X, int(-z.imag * GRID_SIZE) + ORIGIN_Y)
+
+
+def handle_scalar(events, mouse_trail, function_trail):
+    """原实现：每个事件单独经过 mouse2Z / complex_function / z2mouse"""
+    for event in events:
+        if event.type == pygame.MOUSEMOTION:
+            mouse_pos = event.pos
+            f_pos = z2mouse(complex_function(mouse2Z(*mouse_pos)))
+            mouse_trail.append(mouse_pos)
+            function_trail.append(f_pos)
+
+
+def handle_batched(events, mouse_trail, function_trail):
+    """新实现：收集一帧内的采样，一次向量化计算"""
+    samples = [event.pos for event in events if event.type == pygame.MOUSEMOTION]
+    if samples:
+        zs = screen_to_complex(samples, ORIGIN_X, ORIGIN_Y, GRID_SIZE)
+        f_positions = complex_to_screen(complex_function(zs), ORIGIN_X, ORIGIN_Y, GRID_SIZE)
+        mouse_trail.extend(samples)
+        function_trail.extend(f_positions)
+
+
+def measure(handle, positions, events_per_frame, frames):
+    """返回每秒处理的事件数（含事件出队开销）"""
+    mouse_trail, function_trail = TrailStore(), TrailStore()
+    pygame.event.clear()
+    elapsed = 0.0
+    for frame in range(frames):
+        for x, y in positions[frame]:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(1, 0, 0)))
+        start = time.perf_counter()
+        handle(pygame.event.get(), mouse_trail, function_trail)
+        elapsed += time.perf_counter() - start
+    return events_per_frame * frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events-per-frame", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=40)
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    rng = np.random.default_rng(0)
+    positions = rng.integers(0, (WINDOW_WIDTH, WINDOW_HEIGHT),
+                             size=(args.frames, args.events_per_frame, 2)).tolist()
+
+    scalar = measure(handle_scalar, positions, args.events_per_frame, args.frames)
+    batched = measure(handle_batched, positions, args.events_per_frame, args.frames)
+    print(f"events/frame: {args.events_per_frame}")
+    print(f"per-event scalar : {scalar:12.0f} events/s")
+    print(f"per-frame batched: {batched:12.0f} events/s  ({batched/scalar:.1f}x)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
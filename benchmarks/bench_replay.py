@@ -0,0 +1,45 @@
+"""把录制文件作为基准输入：无窗口尽快回放，报告各阶段帧耗时
+
+用法:
+    python screen_demo.py --record session.rec          # 先录制一段会话
+    python benchmarks/bench_replay.py session.rec [--expr "z**3 - 1"] [--realtime]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from expression import compile_expression  # noqa: E402
+from recording import Recording, Replayer  # noqa: E402
+from screen_demo import ScreenDemo  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording")
+    parser.add_argument("--expr", help="用其他函数重新计算函数值轨迹和导数环")
+    parser.add_argument("--realtime", action="store_true", help="按录制时的时间间隔回放")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    print(f"records: {len(recording)}  duration: {recording.duration:.1f} s  recorded with: {recording.source}")
+
+    func = compile_expression(args.expr) if args.expr else None
+    app = ScreenDemo(func, idle=False, replayer=Replayer(recording, realtime=args.realtime))
+    app.exit_after_replay = True
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+
+    profiler = app.profiler
+    print(f"frames: {profiler.frame_count}  wall: {elapsed:.2f} s  overruns: {profiler.overruns}")
+    print(f"{'stage':12s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s}")
+    for name, p50, p95, peak in profiler.summary():
+        print(f"{name:12s} {p50:8.2f} {p95:8.2f} {peak:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""函数值轨迹：逐采样映射 vs 自适应细分加抽稀，存储点数与偏差对比
+
+模拟鼠标以固定像素步长沿给定路径移动，每帧送入若干采样；把得到的黄色折线与密集采样的
+真实曲线比较，报告两条轨迹的存储点数、真实曲线到折线的最大距离(像素)和每个采样的处理耗时。
+
+用法:
+    python benchmarks/bench_resample.py [--mouse-step 4] [--per-frame 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import GRID_SIZE, TRAIL_MAX_STEP, TRAIL_TOLERANCE  # noqa: E402
+from expression import compile_expression  # noqa: E402
+from resample import TrailResampler  # noqa: E402
+from trails import TrailStore  # noqa: E402
+
+DENSITY = 50  # 真实曲线相对鼠标采样的加密倍数
+
+# (名称, 表达式, 鼠标路径 t∈[0,1] -> z)
+CASES = [
+    ("near pole 1/z", "1/z", lambda t: -1 + 2 * t + 0.05j),
+    ("stretch z**5 |z|=1.5", "z**5", lambda t: 1.5 * np.exp(2j * np.pi * t)),
+    ("compress z**3 |z|=0.2", "z**3", lambda t: 0.2 * np.exp(2j * np.pi * t)),
+    ("default line", "x + y + (x**2 - y**2)*1j", lambda t: (-3 + 6 * t) * (1 + 0.5j)),
+]
+
+
+def max_deviation(curve, polyline):
+    """真实曲线上各点到折线的最大距离（与输入同单位）"""
+    a = polyline[:-1]
+    d = polyline[1:] - a
+    length2 = np.maximum((d * np.conj(d)).real, 1e-300)
+    worst = 0.0
+    for chunk in np.array_split(curve, max(1, len(curve) // 512)):
+        rel = chunk[:, None] - a[None, :]
+        t = np.clip((rel * np.conj(d)).real / length2, 0.0, 1.0)
+        dist = np.abs(rel - t * d).min(axis=1)
+        worst = max(worst, float(dist.max()))
+    return worst
+
+
+def path_samples(path, mouse_step):
+    """按鼠标每步 mouse_step 像素估计路径上的采样数"""
+    length = np.sum(np.abs(np.diff(path(np.linspace(0, 1, 10000))))) * GRID_SIZE
+    return max(2, int(length / mouse_step))
+
+
+def run_case(func, path, samples, per_frame, resample):
+    zs = path(np.linspace(0, 1, samples))
+    inputs = TrailStore(item_shape=(), dtype=complex)
+    outputs = TrailStore(item_shape=(), dtype=complex)
+    resampler = TrailResampler(inputs, outputs, TRAIL_MAX_STEP, TRAIL_TOLERANCE)
+    start = time.perf_counter()
+    for i in range(0, samples, per_frame):
+        batch = zs[i:i + per_frame]
+        fs = func(batch)
+        if resample:
+            resampler.extend(batch, fs, func, GRID_SIZE)
+        else:
+            inputs.extend(batch)
+            outputs.extend(fs)
+    elapsed = time.perf_counter() - start
+    curve = func(path(np.linspace(0, 1, samples * DENSITY)))
+    error = max_deviation(curve, outputs.points) * GRID_SIZE
+    return len(inputs), len(outputs), error, elapsed / samples * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mouse-step", type=float, default=4, help="相邻鼠标采样的像素距离")
+    parser.add_argument("--per-frame", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"mouse step: {args.mouse_step}px  per frame: {args.per_frame}  "
+          f"max step: {TRAIL_MAX_STEP}px  tolerance: {TRAIL_TOLERANCE}px")
+    print(f"{'case':24s} {'naive pts':>10s} {'naive err':>10s} {'in pts':>7s} {'out pts':>8s}"
+          f" {'err px':>8s} {'us/sample':>10s}")
+    for name, source, path in CASES:
+        func = compile_expression(source)
+        samples = path_samples(path, args.mouse_step)
+        _, naive_pts, naive_err, _ = run_case(func, path, samples, args.per_frame, False)
+        in_pts, out_pts, err, us = run_case(func, path, samples, args.per_frame, True)
+        print(f"{name:24s} {naive_pts:10d} {naive_err:10.2f} {in_pts:7d} {out_pts:8d}"
+              f" {err:8.2f} {us:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
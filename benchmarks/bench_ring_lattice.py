@@ -0,0 +1,98 @@
+"""环阵列铺满视口的耗时：逐点 vs 批量求导，以及完整的整层重绘（环信息 + 光栅化 + 贴图）
+
+求导分别报告冷缓存（计时前清空 point_cache）和热缓存（同一批点再算一次）的耗时；
+整层重绘按视图变化后的情形在冷缓存下计时。
+
+用法:
+    python benchmarks/bench_ring_lattice.py [--spacing 80] [--segments 60] [--workers 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import (  # noqa: E402
+    WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE, LATTICE_SEGMENTS,
+    make_ring_info, make_ring_infos, point_cache, ring_lattice,
+)
+from parallel_render import RingRenderPool  # noqa: E402
+from ring_layer import RingLayer  # noqa: E402
+from surface_bridge import CairoPygameBridge  # noqa: E402
+
+ORIGIN_X = WINDOW_WIDTH // 2
+ORIGIN_Y = WINDOW_HEIGHT // 2
+TARGET = 1.0  # 铺满视口的目标耗时(秒)
+
+
+def time_cold_warm(compute):
+    """
+    返回:
+        (cold, warm): 清空 point_cache 后第一次和紧接着第二次调用 compute 的耗时(秒)
+    """
+    point_cache.clear()
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        compute()
+        times.append(time.perf_counter() - start)
+    return tuple(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spacing", type=int, default=80)
+    parser.add_argument("--segments", type=int, default=LATTICE_SEGMENTS, help="环阵列每个环的分段数")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    positions = ring_lattice(WINDOW_WIDTH, WINDOW_HEIGHT, ORIGIN_X, ORIGIN_Y, args.spacing)
+    print(f"rings: {len(positions)}  segments: {args.segments}")
+
+    def per_point():
+        for pos in positions.tolist():
+            make_ring_info(tuple(pos), ORIGIN_X, ORIGIN_Y)
+
+    per_point_cold, per_point_warm = time_cold_warm(per_point)
+    batched_cold, batched_warm = time_cold_warm(lambda: make_ring_infos(positions, ORIGIN_X, ORIGIN_Y))
+    print(f"{'derivatives':21s} {'cold ms':>9s} {'warm ms':>9s}")
+    print(f"{'per point':21s} {per_point_cold*1e3:9.1f} {per_point_warm*1e3:9.1f}")
+    print(f"{'batched':21s} {batched_cold*1e3:9.1f} {batched_warm*1e3:9.1f}  "
+          f"({per_point_cold/batched_cold:.1f}x cold, {per_point_warm/batched_warm:.1f}x warm)")
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    bridge = CairoPygameBridge(WINDOW_WIDTH, WINDOW_HEIGHT)
+    pool = RingRenderPool(args.workers)
+    pool.wait_ready()
+    try:
+        layer = RingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH,
+                          NUM_SEGMENTS, OVERSAMPLE, surface=bridge.cairo_surface, pool=pool)
+        # 与视图变化后的整层重绘相同：冷缓存下重新计算环信息、整层光栅化、贴到屏幕
+        point_cache.clear()
+        start = time.perf_counter()
+        rings = make_ring_infos(positions, ORIGIN_X, ORIGIN_Y, num_segments=args.segments)
+        infos = time.perf_counter()
+        layer.rings = rings
+        layer.rebuild()
+        raster = time.perf_counter()
+        bridge.blit(screen)
+        end = time.perf_counter()
+    finally:
+        pool.close()
+        pygame.quit()
+    total = end - start
+    print(f"ring infos           : {(infos - start)*1e3:8.1f} ms")
+    print(f"rebuild layer        : {(raster - infos)*1e3:8.1f} ms  (workers={args.workers})")
+    print(f"blit                 : {(end - raster)*1e3:8.1f} ms")
+    print(f"fill viewport total  : {total*1e3:8.1f} ms  (target {TARGET*1e3:.0f} ms, "
+          f"{'ok' if total < TARGET else 'over'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""环图层重绘期间主循环的帧耗时：主线程同步重绘 vs 后台线程双缓冲
+
+模拟视图变化后整层重绘环阵列：同步方式下重绘占满一帧；后台方式下主循环继续按帧率贴图，
+报告重绘进行中各帧的工作耗时和从提交到交换完成的延迟。--clicks 模拟重绘途中连续提交的新任务。
+
+用法:
+    python benchmarks/bench_ring_thread.py [--spacing 40] [--clicks 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import (  # noqa: E402
+    WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE,
+    LATTICE_SEGMENTS, make_ring_infos, ring_lattice,
+)
+from ring_layer import RingLayer  # noqa: E402
+from ring_worker import BackgroundRingLayer  # noqa: E402
+from surface_bridge import CairoPygameBridge  # noqa: E402
+
+ORIGIN_X = WINDOW_WIDTH // 2
+ORIGIN_Y = WINDOW_HEIGHT // 2
+FRAME_TIME = 1 / 60
+
+
+def run_background(rings, screen, clicks):
+    """后台重绘：每帧贴一次前缓冲区，前 clicks 帧各提交一次新的整层重绘"""
+    layer = BackgroundRingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH,
+                                NUM_SEGMENTS, OVERSAMPLE)
+    layer.wait()
+    layer.rings = rings
+    frames = []
+    start = time.perf_counter()
+    layer.rebuild()
+    while layer.busy or len(frames) < clicks:
+        frame_start = time.perf_counter()
+        if len(frames) < clicks:
+            layer.rebuild()
+        layer.blit(screen)
+        work = time.perf_counter() - frame_start
+        frames.append(work)
+        time.sleep(max(0.0, FRAME_TIME - work))
+    latency = time.perf_counter() - start
+    layer.close()
+    return np.array(frames) * 1e3, latency * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spacing", type=int, default=40)
+    parser.add_argument("--clicks", type=int, default=3, help="重绘途中连续提交的新任务数")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    positions = ring_lattice(WINDOW_WIDTH, WINDOW_HEIGHT, ORIGIN_X, ORIGIN_Y, args.spacing)
+    rings = make_ring_infos(positions, ORIGIN_X, ORIGIN_Y, num_segments=LATTICE_SEGMENTS)
+    print(f"rings: {len(rings)}  frame budget: {FRAME_TIME * 1e3:.1f} ms")
+
+    bridge = CairoPygameBridge(WINDOW_WIDTH, WINDOW_HEIGHT)
+    layer = RingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE,
+                      surface=bridge.cairo_surface)
+    layer.rings = rings
+    start = time.perf_counter()
+    layer.rebuild()
+    bridge.blit(screen)
+    inline = (time.perf_counter() - start) * 1e3
+    print(f"{'mode':12s} {'frames':>7s} {'p50 ms':>8s} {'max ms':>8s} {'latency ms':>11s}")
+    print(f"{'inline':12s} {1:7d} {inline:8.2f} {inline:8.2f} {inline:11.1f}")
+
+    frames, latency = run_background(rings, screen, args.clicks)
+    print(f"{'background':12s} {len(frames):7d} {np.median(frames):8.2f} {frames.max():8.2f} {latency:11.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""无窗口的渲染热点基准套件，结果写入JSON，可与基线比较并标记性能回退
+
+场景:
+    ring_rebuild/n=1,10,100,1000   环图层整层重绘
+    ring_edit/n=100,1000,5000      在已有n个环的图层上添加并删除一个环（局部重绘）
+    ring_hit/n=100,1000,5000       100次右键命中测试
+    df_ring/oversample=1,4,8       单个df环的几何计算与绘制
+    trails_full/points=...         轨迹画布从空白重绘全部点并贴图
+    trails_frame/points=...        无新增点时每帧的轨迹绘制（draw_trails）
+    reproject/points=...           视图平移后按保存的复数坐标重新投影并重绘轨迹
+    warped_grid/map_*, draw_*      变形网格（直角、直角加极坐标）一次向量化映射为折线，以及绘制折线
+    derivative/scalar              numerical_derivative 单点调用
+    derivative/batched_1000        numerical_derivatives 一次计算1000个点
+    convert/copy                   旧做法：Cairo缓冲区通道重排、拷贝后生成Pygame表面并贴图
+    convert/bridge                 共享缓冲区的零拷贝贴图
+
+用法:
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --output new.json --baseline results.json --threshold 0.15
+    python benchmarks/bench_suite.py --compare results.json new.json
+    python benchmarks/bench_suite.py --only ring_rebuild --quick
+
+比较时中位数耗时超过基线 (1 + threshold) 倍的场景记为回退，存在回退时退出码为1。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import cairo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import (  # noqa: E402
+    WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE,
+    GRID_LINE_SPACING, GRID_SAMPLE_STEP, GRID_RAYS,
+    complex_function, make_ring_infos, numerical_derivative, numerical_derivatives,
+)
+from ring_layer import RingLayer  # noqa: E402
+from ring_render import build_df_ring_geometry, draw_df_ring_geometry  # noqa: E402
+from surface_bridge import CairoPygameBridge  # noqa: E402
+from trails import TrailCanvas, TrailStore  # noqa: E402
+from viewport import Viewport  # noqa: E402
+from warped_grid import WarpedGrid  # noqa: E402
+
+ORIGIN_X = WINDOW_WIDTH // 2
+ORIGIN_Y = WINDOW_HEIGHT // 2
+RING_COUNTS = (1, 10, 100, 1000)
+EDIT_RING_COUNTS = (100, 1000, 5000)
+OVERSAMPLES = (1, 4, 8)
+TRAIL_LENGTHS = (100, 1000, 10000, 100000)
+
+
+def measure(fn, repeat, setup=None):
+    """
+    重复运行fn，返回耗时统计(毫秒)
+
+    setup在每次计时前运行，不计入耗时；重复多次时先空跑一次预热缓存和临时缓冲区。
+    """
+    if repeat > 1:
+        if setup is not None:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return {"median_ms": statistics.median(times), "min_ms": min(times), "repeat": repeat}
+
+
+def random_rings(count, rng):
+    positions = rng.integers((40, 40), (WINDOW_WIDTH - 40, WINDOW_HEIGHT - 40), size=(count, 2))
+    return make_ring_infos(positions, ORIGIN_X, ORIGIN_Y)
+
+
+def random_walk(length, rng):
+    """从窗口中心出发、限制在窗口内的随机游走轨迹"""
+    steps = rng.integers(-3, 4, size=(length, 2))
+    points = np.cumsum(steps, axis=0) + (ORIGIN_X, ORIGIN_Y)
+    return np.clip(points, 0, (WINDOW_WIDTH - 1, WINDOW_HEIGHT - 1))
+
+
+# ========== 场景 ==========
+def bench_ring_rebuild(rng, repeat):
+    for count in RING_COUNTS:
+        layer = RingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE)
+        layer.rings = random_rings(count, rng)
+        yield f"ring_rebuild/n={count}", measure(layer.rebuild, max(1, repeat // (1 + count // 100)))
+
+
+def bench_ring_index(rng, repeat):
+    for count in EDIT_RING_COUNTS:
+        layer = RingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE)
+        layer.rings = random_rings(count, rng)
+        layer.rebuild()
+        ring_info = random_rings(1, rng)[0]
+        yield f"ring_edit/n={count}", measure(lambda: layer.remove(layer.add(ring_info)), repeat)
+        clicks = rng.integers((0, 0), (WINDOW_WIDTH, WINDOW_HEIGHT), size=(100, 2)).tolist()
+        yield f"ring_hit/n={count}", measure(lambda: [layer.hit_test(x, y) for x, y in clicks], repeat)
+
+
+def bench_df_ring(rng, repeat):
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WINDOW_WIDTH, WINDOW_HEIGHT)
+    ctx = cairo.Context(surface)
+    rings = random_rings(20, rng)
+    for oversample in OVERSAMPLES:
+        def run():
+            for _, (x, y), dz_angles, dfs in rings:
+                geometry = build_df_ring_geometry(x, y, dz_angles, dfs,
+                                                  RING_RADIUS, RING_WIDTH, oversample)
+                draw_df_ring_geometry(ctx, geometry)
+        result = measure(run, repeat)
+        # 换算为单个环的耗时
+        result = {key: value / len(rings) if key.endswith("_ms") else value
+                  for key, value in result.items()}
+        yield f"df_ring/oversample={oversample}", result
+
+
+def bench_trails(rng, repeat, screen):
+    for length in TRAIL_LENGTHS:
+        mouse_trail, function_trail = TrailStore(), TrailStore()
+        mouse_trail.extend(random_walk(length, rng))
+        function_trail.extend(random_walk(length, rng))
+        canvas = TrailCanvas((WINDOW_WIDTH, WINDOW_HEIGHT),
+                             [(mouse_trail, (255, 0, 0)), (function_trail, (255, 255, 0))])
+
+        def draw_trails():
+            canvas.update()
+            canvas.blit(screen)
+        yield f"trails_full/points={length}", measure(draw_trails, repeat, setup=canvas.reset)
+        yield f"trails_frame/points={length}", measure(draw_trails, repeat)
+
+
+def bench_reproject(rng, repeat, screen):
+    viewport = Viewport(WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE)
+    for length in TRAIL_LENGTHS:
+        mouse_trail = TrailStore(item_shape=(), dtype=complex)
+        function_trail = TrailStore(item_shape=(), dtype=complex)
+        zs = viewport.to_complex(random_walk(length, rng))
+        mouse_trail.extend(zs)
+        function_trail.extend(complex_function(zs))
+        canvas = TrailCanvas((WINDOW_WIDTH, WINDOW_HEIGHT),
+                             [(mouse_trail, (255, 0, 0)), (function_trail, (255, 255, 0))],
+                             project=viewport.to_screen)
+
+        def reproject():
+            canvas.update(viewport.key)
+            canvas.blit(screen)
+        yield f"reproject/points={length}", measure(reproject, repeat, setup=lambda: viewport.pan(1, 0))
+
+
+def bench_warped_grid(rng, repeat, screen):
+    viewport = Viewport(WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE)
+    colors = dict.fromkeys(range(4), (255, 255, 255))
+    for name, polar in (("cartesian", False), ("polar", True)):
+        grid = WarpedGrid(GRID_LINE_SPACING, GRID_SAMPLE_STEP, GRID_RAYS)
+        yield f"warped_grid/map_{name}", measure(
+            lambda: grid.polylines(complex_function, viewport, True, polar), repeat, setup=grid.invalidate)
+        yield f"warped_grid/draw_{name}", measure(
+            lambda: grid.draw(screen, complex_function, viewport, colors, True, polar), repeat)
+
+
+def bench_derivative(rng, repeat):
+    zs = (rng.uniform(-4, 4, 1000) + 1j * rng.uniform(-3, 3, 1000))
+    scalar_zs = zs[:200].tolist()
+
+    def scalar():
+        for z in scalar_zs:
+            numerical_derivative(z)
+    result = measure(scalar, repeat)
+    result = {key: value / len(scalar_zs) if key.endswith("_ms") else value
+              for key, value in result.items()}
+    yield "derivative/scalar", result
+    yield "derivative/batched_1000", measure(lambda: numerical_derivatives(zs), repeat)
+
+
+def bench_convert(rng, repeat, screen):
+    bridge = CairoPygameBridge(WINDOW_WIDTH, WINDOW_HEIGHT)
+    layer = RingLayer(WINDOW_WIDTH, WINDOW_HEIGHT, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE,
+                      surface=bridge.cairo_surface)
+    layer.extend(random_rings(50, rng))
+
+    def copy_convert():
+        arr = np.ndarray((WINDOW_HEIGHT, WINDOW_WIDTH, 4), dtype=np.uint8,
+                         buffer=bridge.cairo_surface.get_data())
+        arr = arr[:, :, [2, 1, 0, 3]]  # BGRA to RGBA
+        surface = pygame.image.frombuffer(arr.tobytes(), (WINDOW_WIDTH, WINDOW_HEIGHT), "RGBA")
+        screen.blit(surface, (0, 0))
+    yield "convert/copy", measure(copy_convert, repeat)
+    yield "convert/bridge", measure(lambda: bridge.blit(screen), repeat)
+
+
+def run_suite(repeat, only=None, seed=0):
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    rng = np.random.default_rng(seed)
+    scenarios = [
+        ("ring_rebuild", lambda: bench_ring_rebuild(rng, repeat)),
+        ("ring_index", lambda: bench_ring_index(rng, repeat)),
+        ("df_ring", lambda: bench_df_ring(rng, repeat)),
+        ("trails", lambda: bench_trails(rng, repeat, screen)),
+        ("reproject", lambda: bench_reproject(rng, repeat, screen)),
+        ("warped_grid", lambda: bench_warped_grid(rng, repeat, screen)),
+        ("derivative", lambda: bench_derivative(rng, repeat)),
+        ("convert", lambda: bench_convert(rng, repeat, screen)),
+    ]
+    results = {}
+    for name, scenario in scenarios:
+        if only and only not in name:
+            continue
+        for metric, result in scenario():
+            results[metric] = result
+            print(f"{metric:28s} {result['median_ms']:10.3f} ms  (min {result['min_ms']:.3f})")
+    pygame.quit()
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "cairo": getattr(cairo, "version", "unknown"),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# ========== 与基线比较 ==========
+def compare(baseline, current, threshold):
+    """
+    逐项比较中位数耗时
+
+    返回:
+        回退的场景名列表
+    """
+    regressions = []
+    print(f"{'metric':28s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}")
+    for metric, result in current.items():
+        base = baseline.get(metric)
+        if base is None:
+            print(f"{metric:28s} {'-':>10s} {result['median_ms']:10.3f}     new")
+            continue
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(metric)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{metric:28s} {base['median_ms']:10.3f} {result['median_ms']:10.3f} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="渲染热点基准套件")
+    parser.add_argument("--output", metavar="JSON", help="结果输出路径")
+    parser.add_argument("--baseline", metavar="JSON", help="运行后与此基线比较")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="只比较两个已有结果文件，不运行基准")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="中位数耗时超过基线多少比例记为回退")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--quick", action="store_true", help="每项只重复3次")
+    parser.add_argument("--only", help="只运行名称包含该字符串的场景组")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(load_results(args.compare[0]), load_results(args.compare[1]),
+                              args.threshold)
+    else:
+        results = run_suite(3 if args.quick else args.repeat, args.only)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"environment": environment(), "results": results}, f, indent=2)
+        regressions = []
+        if args.baseline:
+            print()
+            regressions = compare(load_results(args.baseline), results, args.threshold)
+
+    if regressions:
+        print(f"\n{len(regressions)} 项超过阈值 {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
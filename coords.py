@@ -0,0 +1,33 @@
+"""屏幕坐标与复平面坐标的向量化转换"""
+import numpy as np
+
+
+def screen_to_complex(points, origin_x, origin_y, grid_size):
+    """
+    屏幕坐标转复平面坐标（批量）
+
+    参数:
+        points: (N, 2) 屏幕坐标
+    返回:
+        (N,) 复数数组
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    # 分别写入实部和虚部，结果与标量版本 mouse2Z 逐位相同
+    zs = np.empty(len(points), dtype=complex)
+    zs.real = (points[:, 0] - origin_x) / grid_size
+    zs.imag = -(points[:, 1] - origin_y) / grid_size
+    return zs
+
+
+def complex_to_screen(zs, origin_x, origin_y, grid_size):
+    """
+    复平面坐标转屏幕坐标（批量），与标量版本一样向零取整
+
+    返回:
+        (N, 2) 整数屏幕坐标
+    """
+    zs = np.asarray(zs)
+    points = np.empty((zs.size, 2), dtype=int)
+    points[:, 0] = np.trunc(zs.real * grid_size).ravel() + origin_x
+    points[:, 1] = np.trunc(-zs.imag * grid_size).ravel() + origin_y
+    return points
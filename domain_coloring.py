@@ -0,0 +1,173 @@
+"""全平面域着色：分块、多分辨率逐步细化"""
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from coords import screen_to_complex
+
+
+def hsv_to_rgb(h, s, v):
+    """向量化HSV转RGB，输入取值范围[0, 1]，返回 (..., 3) 浮点数组"""
+    i = np.floor(h * 6).astype(int) % 6
+    f = h * 6 - np.floor(h * 6)
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack((r, g, b), axis=-1)
+
+
+def domain_colors(fz):
+    """
+    域着色：色相取 arg f，亮度随 log|f| 周期变化（每翻一倍一个亮度带）
+
+    返回:
+        与fz同形状、末维为3的uint8数组；非有限值显示为黑色
+    """
+    with np.errstate(all="ignore"):
+        hue = (np.angle(fz) / (2 * np.pi)) % 1.0
+        log_mod = np.log2(np.abs(fz))
+        brightness = 0.6 + 0.4 * (log_mod - np.floor(log_mod))
+    invalid = ~(np.isfinite(log_mod) & np.isfinite(hue))
+    # 非有限的色相在转整数分段时会告警，先置零，转换后再涂黑
+    hue[invalid] = 0.0
+    rgb = hsv_to_rgb(hue, 1.0, brightness)
+    rgb[invalid] = 0
+    return (rgb * 255).astype(np.uint8)
+
+
+class DomainColoringLayer:
+    """
+    视口的域着色图层
+
+    复平面按当前缩放划分为 tile_size 像素见方的块，块坐标 (tx, ty) 从坐标原点起算，
+    同一缩放下平移不改变块与复平面的对应关系。每块按 steps 中的采样间隔从粗到细计算：
+    可见块的最粗一级立即算完，更细的级别在之后的帧里按时间预算从屏幕中心向外逐块补上。
+    各级结果以每采样一像素的小表面缓存在 cache[(缩放, 级别, tx, ty)] 中构成金字塔，
+    平移或缩放回到算过的视图时直接取用各块已有的最细结果；缓存按最近使用淘汰，函数变化时清空。
+    合成表面始终保存可见块当前最细的结果。
+
+    参数:
+        size: 图层尺寸
+        func: 要着色的复数函数（接受复数数组）
+        tile_size: 分块边长(像素)
+        steps: 各级采样间隔(像素)，从粗到细，需整除 tile_size
+        max_tiles: 缓存的小表面数上限
+    """
+
+    def __init__(self, size, func, tile_size=128, steps=(8, 4, 2, 1), max_tiles=2048):
+        self.size = tuple(size)
+        self.func = func
+        self.tile_size = tile_size
+        self.steps = steps
+        self.max_tiles = max_tiles
+        self.surface = pygame.Surface(self.size).convert()
+        self.cache = OrderedDict()
+        self._func = None
+        self._key = None
+        self.tiles = []
+        self._level = {}
+
+    def reset(self):
+        """丢弃所有缓存的块"""
+        self.cache.clear()
+        self._key = None
+
+    @property
+    def complete(self):
+        return all(level == len(self.steps) - 1 for level in self._level.values())
+
+    @staticmethod
+    def _scale_key(grid_size):
+        # 缩放回到原值时浮点误差可能留下末位差异，取12位有效数字作为键
+        return float(f"{grid_size:.12g}")
+
+    def _visible_tiles(self, origin_x, origin_y):
+        """与屏幕相交的块坐标，按到屏幕中心的距离排序（从中心向外细化）"""
+        size = self.tile_size
+        cols = range((0 - origin_x) // size, (self.size[0] - 1 - origin_x) // size + 1)
+        rows = range((0 - origin_y) // size, (self.size[1] - 1 - origin_y) // size + 1)
+        center_x = (self.size[0] / 2 - origin_x) / size - 0.5
+        center_y = (self.size[1] / 2 - origin_y) / size - 0.5
+        return sorted(((tx, ty) for ty in rows for tx in cols),
+                      key=lambda t: (t[0] - center_x)**2 + (t[1] - center_y)**2)
+
+    def _cached(self, scale, level, tile):
+        small = self.cache.get((scale, level) + tile)
+        if small is not None:
+            self.cache.move_to_end((scale, level) + tile)
+        return small
+
+    def _render_tile(self, tile, level, grid_size):
+        """按指定级别计算一个块，返回每个采样一个像素的小表面"""
+        tx, ty = tile
+        step = self.steps[level]
+        # 采样点取各采样格的中心；坐标相对原点，与平移无关
+        offsets = (np.arange(self.tile_size // step) + 0.5) * step
+        grid_x, grid_y = np.meshgrid(tx * self.tile_size + offsets, ty * self.tile_size + offsets,
+                                     indexing="ij")
+        zs = screen_to_complex(np.column_stack((grid_x.ravel(), grid_y.ravel())), 0, 0, grid_size)
+        with np.errstate(all="ignore"):
+            fz = self.func(zs)
+        return pygame.surfarray.make_surface(domain_colors(np.asarray(fz).reshape(grid_x.shape)))
+
+    def _place(self, tile, level, small, origin_x, origin_y):
+        """把小表面放大到块尺寸后写入合成表面，超出屏幕的部分自动裁掉"""
+        step = self.steps[level]
+        scaled = pygame.transform.scale(small, (small.get_width() * step, small.get_height() * step))
+        self.surface.blit(scaled, (origin_x + tile[0] * self.tile_size, origin_y + tile[1] * self.tile_size))
+
+    def _compose(self, origin_x, origin_y, scale):
+        """视图变化后用缓存中各可见块最细的结果重新合成，没有结果的块留黑"""
+        self.surface.fill((0, 0, 0))
+        self.tiles = self._visible_tiles(origin_x, origin_y)
+        self._level = {}
+        for tile in self.tiles:
+            self._level[tile] = -1
+            for level in reversed(range(len(self.steps))):
+                small = self._cached(scale, level, tile)
+                if small is not None:
+                    self._level[tile] = level
+                    self._place(tile, level, small, origin_x, origin_y)
+                    break
+
+    def update(self, origin_x, origin_y, grid_size, budget=0.008):
+        """
+        推进细化。最粗一级总是一次算完，其余级别在时间预算(秒)内尽量多算
+
+        返回:
+            本次合成表面是否有变化
+        """
+        if self.func is not self._func:
+            self._func = self.func
+            self.reset()
+        scale = self._scale_key(grid_size)
+        changed = False
+        key = (origin_x, origin_y, scale)
+        if key != self._key:
+            self._key = key
+            self._compose(origin_x, origin_y, scale)
+            changed = True
+
+        deadline = time.perf_counter() + budget
+        for level in range(len(self.steps)):
+            for tile in self.tiles:
+                if self._level[tile] >= level:
+                    continue
+                if level > 0 and time.perf_counter() > deadline:
+                    return changed
+                small = self._render_tile(tile, level, grid_size)
+                self.cache[(scale, level) + tile] = small
+                while len(self.cache) > self.max_tiles:
+                    self.cache.popitem(last=False)
+                self._level[tile] = level
+                self._place(tile, level, small, origin_x, origin_y)
+                changed = True
+        return changed
+
+    def blit(self, target):
+        target.blit(self.surface, (0, 0))
@@ -0,0 +1,245 @@
+"""复数函数可视化引擎：常量、复数函数、数值微分与坐标转换
+
+本模块不初始化Pygame、不创建窗口，可被交互程序、命令行批量渲染和基准脚本共同导入。
+"""
+import numpy as np
+
+from coords import complex_to_screen, screen_to_complex
+from expression import compile_expression
+from jacobian import cauchy_riemann_residual, directional_derivatives, jacobian, wirtinger
+from point_cache import PointCache
+
+# ========== 常量定义 ==========
+# 窗口设置
+WINDOW_WIDTH = 1600
+WINDOW_HEIGHT = 1200
+GRID_SIZE = 200  # 初始视图每单位长度的像素数
+MOVE_SPEED = 2
+
+# 导数环设置
+RING_RADIUS = 24
+RING_WIDTH = 10
+NUM_SEGMENTS = 360
+OVERSAMPLE = 1
+RENDER_WORKERS = 0  # 整层重绘环时的并行进程数，0表示串行
+LATTICE_SPACING = 80  # 环阵列模式下相邻环心的间距(像素)
+LATTICE_SEGMENTS = 60  # 环阵列模式下每个df环的分段数，远少于单个环以便整屏环阵列快速重绘
+ZOOM_STEP = 1.2  # 鼠标滚轮每格的缩放倍数
+TRAIL_MAX_STEP = 4  # 函数值轨迹相邻点的最大屏幕距离(像素)，超过时细分输入
+TRAIL_TOLERANCE = 0.5  # 轨迹抽稀允许的最大偏差(像素)
+POINT_CACHE_SIZE = 4096  # 单点函数值和导数缓存的容量
+GRID_LINE_SPACING = 60  # 变形网格相邻网格线的最小屏幕间距(像素)
+GRID_SAMPLE_STEP = 4  # 变形网格沿网格线的采样间距(像素)
+GRID_RAYS = 24  # 极坐标变形网格的射线条数
+
+# 颜色定义
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+
+# 要可视化的复数函数，显示公式由表达式自动生成
+FUNC_EXPR = "x + y + (x**2 - y**2)*1j"
+complex_function = compile_expression(FUNC_EXPR)
+FUNC_STR = complex_function.latex
+
+# 单点的 (f, f_x, f_y) 缓存：光标读数、点击添加的环和环阵列共用
+point_cache = PointCache(POINT_CACHE_SIZE)
+
+
+# ========== 函数定义 ==========
+def numerical_derivative(z, func=None):
+    """
+    计算复数函数在点z处各方向的方向导数
+
+    由中心差分求出雅可比矩阵后解析地得到全部方向（见 jacobian.py），
+    每个点只需一次4点的向量化求值。
+
+    参数:
+        func: 复数函数，默认为 complex_function
+    返回:
+        (dz_angles, dfs): 各方向的角度及对应的方向导数值
+    """
+    if func is None:
+        func = complex_function
+    f_x, f_y = jacobian(z, func)
+    return directional_derivatives(f_x, f_y, NUM_SEGMENTS)
+
+
+def numerical_derivatives(zs, func=None):
+    """
+    批量计算多个点处各方向的方向导数，所有点一次广播求值
+
+    参数:
+        zs: (N,) 复数数组
+        func: 复数函数，默认为 complex_function
+    返回:
+        (dz_angles, dfs): dfs 形状为 (N, NUM_SEGMENTS)
+    """
+    if func is None:
+        func = complex_function
+    f_x, f_y = jacobian(np.asarray(zs, dtype=complex).reshape(-1), func)
+    return directional_derivatives(f_x, f_y, NUM_SEGMENTS)
+
+
+def point_key(z, func, grid_size=GRID_SIZE):
+    """缓存键：函数标识（编译表达式取其源码）和量化到像素网格的z"""
+    return (getattr(func, "source", func), grid_size,
+            round(z.real * grid_size), round(z.imag * grid_size))
+
+
+def evaluate_point(z, func=None, grid_size=GRID_SIZE):
+    """
+    点z处的函数值和偏导数，按函数和像素网格上的z缓存
+
+    导数环由偏导数解析得到（见 jacobian.py），因此缓存偏导数即缓存了任意分段数的环。
+
+    参数:
+        grid_size: 当前视图每单位的像素数，决定缓存键的量化精度
+    返回:
+        (f, f_x, f_y) 复数
+    """
+    if func is None:
+        func = complex_function
+    key = point_key(z, func, grid_size)
+    entry = point_cache.get(key)
+    if entry is None:
+        f_x, f_y = jacobian(z, func)
+        entry = (complex(func(z)), complex(f_x), complex(f_y))
+        point_cache.put(key, entry)
+    return entry
+
+
+def evaluate_points(zs, func=None, grid_size=GRID_SIZE):
+    """
+    批量版 evaluate_point，未命中的点一次向量化计算
+
+    返回:
+        (f, f_x, f_y): 各为 (N,) 复数数组
+    """
+    if func is None:
+        func = complex_function
+    zs = np.asarray(zs, dtype=complex).reshape(-1)
+    if not zs.size:
+        return (np.empty(0, dtype=complex),) * 3
+    keys = [point_key(z, func, grid_size) for z in zs.tolist()]
+    entries = [point_cache.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    if missing:
+        f_x, f_y = jacobian(zs[missing], func)
+        values = func(zs[missing])
+        for i, entry in zip(missing, zip(values.tolist(), f_x.tolist(), f_y.tolist())):
+            entries[i] = entry
+            point_cache.put(keys[i], entry)
+    return tuple(np.array(column, dtype=complex).reshape(-1) for column in zip(*entries))
+
+
+def function_value(z, func=None, grid_size=GRID_SIZE):
+    """点z处的函数值（经缓存）"""
+    return evaluate_point(z, func, grid_size)[0]
+
+
+def ring_values(zs, func=None, grid_size=GRID_SIZE, num_segments=NUM_SEGMENTS):
+    """
+    批量计算多个复平面点处导数环所需的值（经缓存）
+
+    参数:
+        num_segments: 方向导数的分段数，环阵列使用较少的 LATTICE_SEGMENTS
+    返回:
+        (f, dz_angles, dfs): f 为 (N,) 函数值，dfs 形状为 (N, num_segments)
+    """
+    f, f_x, f_y = evaluate_points(zs, func, grid_size)
+    dz_angles, dfs = directional_derivatives(f_x, f_y, num_segments)
+    return f, dz_angles, dfs
+
+
+def derivative_summary(z, func=None, grid_size=GRID_SIZE):
+    """
+    点z处的复导数及柯西-黎曼残差，供界面显示
+
+    返回:
+        (df_dz, residual, relative_residual)
+    """
+    _, f_x, f_y = evaluate_point(z, func, grid_size)
+    df_dz, _ = wirtinger(f_x, f_y)
+    residual, relative = cauchy_riemann_residual(f_x, f_y)
+    return complex(df_dz), float(residual), float(relative)
+
+
+def mouse2Z(mousex, mousey, origin_x, origin_y):
+    """屏幕坐标转复平面坐标"""
+    return complex((mousex - origin_x) / GRID_SIZE,
+                   -(mousey - origin_y) / GRID_SIZE)
+
+
+def z2mouse(z, origin_x, origin_y):
+    """复平面坐标转屏幕坐标"""
+    return (int(z.real * GRID_SIZE) + origin_x,
+            int(-z.imag * GRID_SIZE) + origin_y)
+
+
+def map_screen_points(points, origin_x, origin_y, func=None):
+    """
+    批量把屏幕上的输入点映射为函数值的屏幕坐标
+
+    参数:
+        points: (N, 2) 屏幕坐标
+        func: 复数函数，默认为 complex_function
+    返回:
+        (N, 2) 整数屏幕坐标
+    """
+    if func is None:
+        func = complex_function
+    zs = screen_to_complex(points, origin_x, origin_y, GRID_SIZE)
+    return complex_to_screen(func(zs), origin_x, origin_y, GRID_SIZE)
+
+
+def make_ring_info(mouse_pos, origin_x, origin_y, func=None):
+    """
+    计算屏幕位置mouse_pos处的导数环
+
+    参数:
+        func: 复数函数，默认为 complex_function
+    返回:
+        (input_pos, output_pos, dz_angles, dfs)
+    """
+    z = mouse2Z(*mouse_pos, origin_x, origin_y)
+    f, f_x, f_y = evaluate_point(z, func)
+    dz_angles, dfs = directional_derivatives(f_x, f_y, NUM_SEGMENTS)
+    f_pos = z2mouse(f, origin_x, origin_y)
+    return (tuple(mouse_pos), f_pos, dz_angles, dfs)
+
+
+def make_ring_infos(mouse_positions, origin_x, origin_y, func=None, num_segments=NUM_SEGMENTS):
+    """
+    批量计算多个屏幕位置处的导数环，默认分段数下结果与逐个调用 make_ring_info 相同
+
+    参数:
+        num_segments: 每个环的分段数，环阵列使用 LATTICE_SEGMENTS
+    返回:
+        [(input_pos, output_pos, dz_angles, dfs), ...]
+    """
+    positions = np.asarray(mouse_positions, dtype=int).reshape(-1, 2)
+    zs = screen_to_complex(positions, origin_x, origin_y, GRID_SIZE)
+    f, dz_angles, dfs = ring_values(zs, func, num_segments=num_segments)
+    f_positions = complex_to_screen(f, origin_x, origin_y, GRID_SIZE)
+    return [(tuple(pos), tuple(f_pos), dz_angles, ring_dfs)
+            for pos, f_pos, ring_dfs in zip(positions.tolist(), f_positions.tolist(), dfs)]
+
+
+def ring_lattice(width, height, origin_x, origin_y, spacing=LATTICE_SPACING):
+    """
+    覆盖视口的规则环心阵列，与原点对齐，离窗口边缘至少半个间距
+
+    返回:
+        (N, 2) 整数屏幕坐标
+    """
+    margin = spacing / 2
+
+    def axis(origin, size):
+        first = int(np.ceil((margin - origin) / spacing))
+        last = int(np.floor((size - margin - origin) / spacing))
+        return origin + spacing * np.arange(first, last + 1)
+
+    grid_x, grid_y = np.meshgrid(axis(origin_x, width), axis(origin_y, height))
+    return np.column_stack((grid_x.ravel(), grid_y.ravel()))
@@ -0,0 +1,459 @@
+"""表达式编译器：把用户输入的复变函数表达式编译为显示公式和向量化NumPy内核
+
+表达式使用Python语法，可用变量 z、x（实部）、y（虚部），常量 i/j（虚数单位）、pi、e，
+函数 exp log sqrt sin cos tan sinh cosh tanh abs conj re im arg；'^' 视为乘方。
+例如:
+    f = compile_expression("exp(z)*sin(x) + y**2*1j")
+    f(zs)        # 批量求值
+    f.latex      # "$f(z)=e^{z} \\sin(x)+y^{2}i$"
+
+表达式只解析一次，语法树经白名单检查，不会执行任意代码。内核是一串带 out= 参数的
+ufunc 调用，输入分块求值，中间结果写入每线程复用的小缓冲区，每次调用只分配输出数组。
+"""
+import ast
+import threading
+from functools import partial
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPANDED_POWER = 8  # 不超过此值的整数次幂展开为乘法，复数pow比乘法慢数倍
+BLOCK_SIZE = 16384  # 分块求值的元素数，临时缓冲区保持在CPU缓存内
+
+# 变量在环境列表中的下标: z, x, y, 输出
+_Z, _X, _Y, _OUT = 0, 1, 2, 3
+
+_CONSTANTS = {"i": 1j, "j": 1j, "pi": np.pi, "e": np.e}
+_VARIABLES = {"z": _Z, "x": _X, "y": _Y}
+
+
+class ExpressionError(ValueError):
+    """表达式无法解析或包含不支持的语法"""
+
+
+def _re(a, out):
+    return np.positive(a.real, out=out)
+
+
+def _im(a, out):
+    return np.positive(a.imag, out=out)
+
+
+def _arg(a, out):
+    return np.arctan2(a.imag, a.real, out=out)
+
+
+# log/sqrt/非整数乘方强制走复数循环，实数输入的负值也能得到正确的复数结果
+_complex_log = partial(np.log, dtype=np.complex128)
+_complex_sqrt = partial(np.sqrt, dtype=np.complex128)
+_complex_power = partial(np.power, dtype=np.complex128)
+
+# 可用函数: 名称 -> (内核调用, LaTeX模板)
+_FUNCTIONS = {
+    "exp": (np.exp, None),
+    "log": (_complex_log, r"\log({})"),
+    "sqrt": (_complex_sqrt, r"\sqrt{{{}}}"),
+    "sin": (np.sin, r"\sin({})"),
+    "cos": (np.cos, r"\cos({})"),
+    "tan": (np.tan, r"\tan({})"),
+    "sinh": (np.sinh, r"\sinh({})"),
+    "cosh": (np.cosh, r"\cosh({})"),
+    "tanh": (np.tanh, r"\tanh({})"),
+    "abs": (np.absolute, "|{}|"),
+    "conj": (np.conjugate, r"\overline{{{}}}"),
+    "re": (_re, r"\mathrm{{Re}}({})"),
+    "im": (_im, r"\mathrm{{Im}}({})"),
+    "arg": (_arg, r"\arg({})"),
+}
+
+# 结果总是实数 / 总是复数的调用；其余调用在输入全为实数时结果也是实数
+_REAL_RESULT = {np.absolute, _re, _im, _arg}
+_COMPLEX_RESULT = {_complex_log, _complex_sqrt, _complex_power}
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+}
+
+
+def parse_expression(text):
+    """
+    解析表达式字符串并检查语法树只包含允许的节点
+
+    返回:
+        ast.Expression
+    异常:
+        ExpressionError: 语法错误或使用了不支持的名称、函数、运算
+    """
+    text = text.strip()
+    if not text:
+        raise ExpressionError("表达式为空")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"表达式过长（超过 {MAX_EXPRESSION_LENGTH} 个字符）")
+    try:
+        tree = ast.parse(text.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"表达式语法错误: {e.msg}") from None
+    _check(tree.body)
+    return tree
+
+
+def _check(node):
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _BINARY_OPS and not isinstance(node.op, ast.Pow):
+            raise ExpressionError(f"不支持的运算: {type(node.op).__name__}")
+        _check(node.left)
+        _check(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, (ast.USub, ast.UAdd)):
+            raise ExpressionError(f"不支持的运算: {type(node.op).__name__}")
+        _check(node.operand)
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+            name = node.func.id if isinstance(node.func, ast.Name) else ast.unparse(node.func)
+            raise ExpressionError(f"未知的函数: {name}")
+        if node.keywords or len(node.args) != 1:
+            raise ExpressionError(f"函数 {node.func.id} 只接受一个参数")
+        _check(node.args[0])
+    elif isinstance(node, ast.Name):
+        if node.id not in _VARIABLES and node.id not in _CONSTANTS:
+            raise ExpressionError(f"未知的变量或常量: {node.id}")
+    elif isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float, complex)):
+            raise ExpressionError(f"不支持的常量: {node.value!r}")
+    else:
+        raise ExpressionError(f"不支持的语法: {type(node).__name__}")
+
+
+# ========== 显示公式 ==========
+# 优先级: 加减 < 乘除 < 一元负号 < 乘方 < 原子
+_ADD, _MUL, _NEG, _POW, _ATOM = range(1, 6)
+
+
+def _format_number(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:g}"
+
+
+def _wrap(text, prec, min_prec):
+    return f"({text})" if prec < min_prec else text
+
+
+def _latex(node):
+    """返回 (LaTeX文本, 优先级)"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, complex):
+            if value.real:
+                return f"({_format_number(value.real)}+{_format_number(value.imag)}i)", _ATOM
+            if value.imag == 1:
+                return "i", _ATOM
+            return f"{_format_number(value.imag)}i", _MUL
+        return _format_number(value), _ATOM
+    if isinstance(node, ast.Name):
+        return {"i": "i", "j": "i", "pi": r"\pi"}.get(node.id, node.id), _ATOM
+    if isinstance(node, ast.UnaryOp):
+        text, prec = _latex(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return text, prec
+        return "-" + _wrap(text, prec, _MUL), _NEG
+    if isinstance(node, ast.Call):
+        text, _ = _latex(node.args[0])
+        if node.func.id == "exp":
+            return f"e^{{{text}}}", _POW
+        return _FUNCTIONS[node.func.id][1].format(text), _ATOM
+    # 二元运算
+    left, left_prec = _latex(node.left)
+    right, right_prec = _latex(node.right)
+    if isinstance(node.op, ast.Add):
+        if isinstance(node.right, ast.UnaryOp) and isinstance(node.right.op, ast.USub):
+            return f"{left}{right}", _ADD
+        return f"{left}+{right}", _ADD
+    if isinstance(node.op, ast.Sub):
+        if right_prec == _NEG:
+            right = f"({right})"
+        return f"{left}-{_wrap(right, right_prec, _MUL)}", _ADD
+    if isinstance(node.op, ast.Div):
+        return rf"\frac{{{left}}}{{{right}}}", _ATOM
+    if isinstance(node.op, ast.Pow):
+        return f"{_wrap(left, left_prec, _ATOM)}^{{{right}}}", _POW
+    # 乘法：与虚数单位相乘写成后缀 i，其余直接并列
+    left = _wrap(left, left_prec, _MUL)
+    if _is_imaginary_unit(node.right):
+        # 避免与前面的命令名粘连，如 \pi i
+        return (f"{left} i" if left[-1].isalpha() else f"{left}i"), _MUL
+    right = _wrap(right, right_prec, _NEG + 1)
+    if right[0].isdigit():
+        return rf"{left} \cdot {right}", _MUL
+    return f"{left} {right}", _MUL
+
+
+def _is_imaginary_unit(node):
+    return ((isinstance(node, ast.Constant) and node.value == 1j) or
+            (isinstance(node, ast.Name) and node.id in ("i", "j")))
+
+
+def expression_latex(tree):
+    """语法树对应的显示公式（matplotlib mathtext）"""
+    return f"$f(z)={_latex(tree.body)[0]}$"
+
+
+# ========== 内核编译 ==========
+class _ProgramBuilder:
+    """
+    把语法树展开为线性的ufunc调用序列
+
+    操作数为 ("var", 下标)、("slot", 临时缓冲区编号) 或 ("const", 值)。
+    全为常量的子树在编译期折叠；操作数用完后其缓冲区立即回收，可被结果原地复用。
+    x、y 及只由它们算出的中间结果保存在float64缓冲区中，按实数循环计算，
+    只在需要时才提升为复数，与手写NumPy代码的内存流量相同。
+    """
+
+    def __init__(self):
+        self.instructions = []
+        self.slot_dtypes = []
+        self._free = {np.float64: [], np.complex128: []}
+
+    def is_real(self, operand):
+        kind, value = operand
+        if kind == "var":
+            return value != _Z
+        if kind == "const":
+            return isinstance(value, float)
+        return self.slot_dtypes[value] is np.float64
+
+    def emit(self, fn, *operands, keep=None):
+        """追加一条指令；keep 为调用方还要继续使用、不能回收的操作数"""
+        if all(kind == "const" for kind, _ in operands):
+            out = np.empty((), dtype=np.complex128)
+            fn(*[value for _, value in operands], out=out)
+            return ("const", _normalize(complex(out[()])))
+
+        if fn in _REAL_RESULT:
+            dtype = np.float64
+        elif fn in _COMPLEX_RESULT:
+            dtype = np.complex128
+        else:
+            dtype = np.float64 if all(self.is_real(op) for op in operands) else np.complex128
+
+        for operand in operands:
+            if operand != keep:
+                self.release(operand)
+        if self._free[dtype]:
+            slot = self._free[dtype].pop()
+        else:
+            slot = len(self.slot_dtypes)
+            self.slot_dtypes.append(dtype)
+        self.instructions.append((fn, operands, slot))
+        return ("slot", slot)
+
+    def release(self, operand):
+        kind, value = operand
+        if kind == "slot":
+            self._free[self.slot_dtypes[value]].append(value)
+
+    def build(self, node):
+        if isinstance(node, ast.Constant):
+            return ("const", _normalize(node.value))
+        if isinstance(node, ast.Name):
+            if node.id in _VARIABLES:
+                return ("var", _VARIABLES[node.id])
+            return ("const", _CONSTANTS[node.id])
+        if isinstance(node, ast.UnaryOp):
+            operand = self.build(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return self.emit(np.negative, operand)
+        if isinstance(node, ast.Call):
+            return self.emit(_FUNCTIONS[node.func.id][0], self.build(node.args[0]))
+        left = self.build(node.left)
+        right = self.build(node.right)
+        if isinstance(node.op, ast.Pow):
+            return self.build_power(left, right)
+        return self.emit(_BINARY_OPS[type(node.op)], left, right)
+
+    def build_power(self, base, exponent):
+        """常数指数的常见情形换成更快的ufunc，小整数次幂展开为平方和乘法"""
+        if exponent[0] == "const":
+            p = exponent[1]
+            if p == 0.5:
+                return self.emit(_complex_sqrt, base)
+            if isinstance(p, float) and p.is_integer() and abs(p) <= MAX_EXPANDED_POWER:
+                if p == 0:
+                    return ("const", 1.0)
+                result = self.build_integer_power(base, int(abs(p)))
+                if result != base:
+                    self.release(base)
+                return self.emit(np.reciprocal, result) if p < 0 else result
+            if isinstance(p, float) and p.is_integer():
+                return self.emit(np.power, base, exponent)
+        # 非整数指数走复数循环，实数底数为负时结果仍正确
+        return self.emit(_complex_power, base, exponent)
+
+
+    def build_integer_power(self, base, n):
+        """base**n（n>=1）的平方-乘法链，base 保持可用"""
+        if n == 1:
+            return base
+        if n % 2 == 0:
+            half = self.build_integer_power(base, n // 2)
+            return self.emit(np.square, half, keep=base)
+        rest = self.build_integer_power(base, n - 1)
+        return self.emit(np.multiply, rest, base, keep=base)
+
+
+def _normalize(value):
+    """常量统一为float或complex；虚部为0时用float，保留实数循环"""
+    value = complex(value)
+    return value.real if value.imag == 0 else value
+
+
+class CompiledExpression:
+    """
+    编译后的复变函数，可像普通函数一样以复数标量或数组调用
+
+    属性:
+        source: 原始表达式
+        latex: 显示公式
+    """
+
+    def __init__(self, source):
+        self.source = source
+        tree = parse_expression(source)
+        self.latex = expression_latex(tree)
+
+        builder = _ProgramBuilder()
+        result = builder.build(tree.body)
+        self._slot_dtypes = builder.slot_dtypes
+        num_slots = len(self._slot_dtypes)
+
+        # 环境列表布局: z, x, y, 输出, 临时缓冲区..., 常量...
+        consts = []
+
+        def index(operand):
+            kind, value = operand
+            if kind == "var":
+                return value
+            if kind == "slot":
+                return _OUT + 1 + value
+            consts.append(value)
+            return _OUT + num_slots + len(consts)
+
+        self._program = [(fn, tuple(index(op) for op in operands), _OUT + 1 + slot)
+                         for fn, operands, slot in builder.instructions]
+        if result[0] == "slot":
+            # 最后一条指令直接写入输出数组
+            fn, args, _ = self._program[-1]
+            self._program[-1] = (fn, args, _OUT)
+            self._result = None
+        else:
+            self._result = index(result)
+        self._consts = consts
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+    def __reduce__(self):
+        return (CompiledExpression, (self.source,))
+
+    def _scratch(self):
+        """当前线程的临时缓冲区，每个长度为 BLOCK_SIZE，跨调用复用"""
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = [np.empty(BLOCK_SIZE, dtype=dtype)
+                                             for dtype in self._slot_dtypes]
+        return scratch
+
+    def __call__(self, z, out=None):
+        """
+        计算 f(z)
+
+        输入按 BLOCK_SIZE 分块求值，每块的全部中间结果都留在缓存中，
+        避免大数组在每一步运算之间往返内存。
+
+        参数:
+            z: 复数标量或数组
+            out: 可选的输出数组（C连续的complex128，形状与z相同）
+        返回:
+            与z同形状的复数数组；z为标量时返回复数标量
+        """
+        z = np.asarray(z, dtype=np.complex128)
+        if out is None:
+            out = np.empty(z.shape, dtype=np.complex128)
+        elif not out.flags.c_contiguous:
+            raise ValueError("out 必须是C连续数组")
+        flat_z = z.reshape(-1)
+        flat_out = out.reshape(-1)
+        scratch = self._scratch()
+        for start in range(0, flat_z.size, BLOCK_SIZE):
+            stop = min(start + BLOCK_SIZE, flat_z.size)
+            zs = flat_z[start:stop]
+            env = [zs, zs.real, zs.imag, flat_out[start:stop]]
+            env += [buffer[:stop - start] for buffer in scratch]
+            env += self._consts
+            for fn, args, dst in self._program:
+                fn(*[env[i] for i in args], out=env[dst])
+            if self._result is not None:
+                env[_OUT][...] = env[self._result]
+        return out[()] if out.ndim == 0 else out
+
+
+class _ParameterBinder(ast.NodeTransformer):
+    """把参数名节点替换为数值常量的语法树"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def visit_Name(self, node):
+        if node.id not in self.values:
+            return node
+        value = complex(self.values[node.id])
+        if value.imag == 0:
+            return _number_node(value.real)
+        imag = ast.BinOp(_number_node(value.imag), ast.Mult(), ast.Constant(1j))
+        if value.real == 0:
+            return imag
+        return ast.BinOp(_number_node(value.real), ast.Add(), imag)
+
+
+def _number_node(value):
+    # 负数写成一元负号，反解析时按优先级自动加括号，如 (-0.5) ** 2
+    if value < 0:
+        return ast.UnaryOp(ast.USub(), ast.Constant(-value))
+    return ast.Constant(value)
+
+
+def bind_parameters(source, values):
+    """
+    把表达式中的参数替换为数值，返回可直接编译的新表达式
+
+    用于参数扫描，例如 bind_parameters("z**2 + c", {"c": 0.5j}) 得到 "z ** 2 + 0.5 * 1j"。
+    常量在编译时折叠，替换后的内核与直接写数值的表达式相同。
+
+    参数:
+        values: 参数名 -> 数值（实数或复数）；参数名不能与变量、常量或函数重名
+    异常:
+        ExpressionError: 参数名冲突，或替换后的表达式无法解析
+    """
+    for name in values:
+        if name in _VARIABLES or name in _CONSTANTS or name in _FUNCTIONS:
+            raise ExpressionError(f"参数名与内置名称冲突: {name}")
+    text = source.strip()
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"表达式过长（超过 {MAX_EXPRESSION_LENGTH} 个字符）")
+    try:
+        tree = ast.parse(text.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"表达式语法错误: {e.msg}") from None
+    bound = ast.unparse(ast.fix_missing_locations(_ParameterBinder(values).visit(tree)))
+    parse_expression(bound)
+    return bound
+
+
+def compile_expression(source):
+    """解析并编译表达式，失败时抛出 ExpressionError"""
+    return CompiledExpression(source)
@@ -0,0 +1,86 @@
+"""数学公式渲染，带磁盘缓存
+
+matplotlib 只在缓存未命中时才导入，热启动完全不加载 matplotlib。
+"""
+import hashlib
+import os
+
+import pygame
+
+FIGSIZE = (3, 1)
+DPI = 150
+
+# 缓存命中统计，供启动计时报告使用
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def formula_cache_dir():
+    """公式缓存目录，遵循 XDG_CACHE_HOME"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "complex_func_screen_plot", "formula")
+
+
+def formula_cache_path(formula, size, dpi=DPI):
+    """按公式字符串、字号和DPI生成缓存文件路径"""
+    key = f"{formula}\0{size}\0{dpi}\0{FIGSIZE}".encode("utf-8")
+    return os.path.join(formula_cache_dir(), hashlib.sha1(key).hexdigest() + ".png")
+
+
+def clear_formula_cache():
+    """删除所有缓存的公式图像"""
+    cache_dir = formula_cache_dir()
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".png"):
+                os.remove(os.path.join(cache_dir, name))
+
+
+def _render_with_matplotlib(formula, size, dpi):
+    """使用matplotlib渲染数学公式为Pygame表面"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # 创建一个matplotlib图形，背景为黑色
+    fig = Figure(figsize=FIGSIZE, dpi=dpi)
+    fig.patch.set_facecolor('black')
+    ax = fig.add_subplot(111)
+
+    # 设置坐标区域背景为黑色
+    ax.patch.set_facecolor('black')
+    ax.axis('off')
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+
+    # 渲染公式，使用白色文本
+    ax.text(1.1, 0.5, formula, fontsize=size, ha='right', va='center', color='white')
+
+    # 将图形转换为pygame表面
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    raw_data = bytes(canvas.get_renderer().buffer_rgba())
+    return pygame.image.fromstring(raw_data, canvas.get_width_height(), "RGBA")
+
+
+def render_math_formula(formula, size=16, dpi=DPI, use_cache=True):
+    """渲染数学公式为Pygame表面，优先读取磁盘缓存"""
+    path = formula_cache_path(formula, size, dpi)
+    if use_cache and os.path.exists(path):
+        try:
+            surface = pygame.image.load(path)
+            cache_stats["hits"] += 1
+            return surface
+        except pygame.error:
+            pass
+
+    cache_stats["misses"] += 1
+    surface = _render_with_matplotlib(formula, size, dpi)
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再改名，避免并发启动读到半个文件
+            tmp_path = f"{path}.{os.getpid()}.tmp.png"
+            pygame.image.save(surface, tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, pygame.error) as e:
+            print(f"无法写入公式缓存: {e}")
+    return surface
@@ -0,0 +1,361 @@
+"""帧序列导出：无窗口渲染动画帧，经有界队列流水线交给编码线程
+
+两种动画:
+    sweep  扫描函数表达式中的一个参数，例如 z**2 + c 中 c 从 0 变到 1j
+    trail  逐帧画出轨迹的绘制过程，轨迹来自文本文件或录制文件
+
+用法:
+    python frame_export.py sweep frames/ --expr "z**2 + c" --param c --start 0 --stop 1j --frames 120 --domain
+    python frame_export.py sweep sweep.mp4 --expr "exp(c*z)" --param c --start 0.2 --stop 2 --ring 900,500
+    python frame_export.py trail trail.mp4 --recording session.rec --points-per-frame 8
+
+输出路径以视频扩展名结尾且系统中有 ffmpeg 时，原始帧经管道交给 ffmpeg 编码；
+否则导出为编号的PNG序列（路径可以是目录，或含 %d 格式符的文件名模式）。
+"""
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import cairo
+import numpy as np
+
+from coords import screen_to_complex
+from engine import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE, OVERSAMPLE, RENDER_WORKERS, complex_function,
+)
+from expression import ExpressionError, bind_parameters, compile_expression
+from parallel_render import RingRenderPool
+from recording import BREAK, POINT, Recording
+from render_cli import draw_trail_segments, load_trail_segments, parse_point, parse_size, render_figure
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".webm", ".avi")
+# ARGB32按本机字节序存储，对应ffmpeg的原始像素格式
+RAW_PIXEL_FORMAT = "bgra" if sys.byteorder == "little" else "argb"
+
+
+class FrameExporter:
+    """
+    把渲染好的帧经有界队列交给编码线程
+
+    渲染在调用方线程中进行，PNG压缩（Cairo写PNG时释放GIL）或向ffmpeg管道写入在后台线程中进行，
+    两者重叠。队列满时 submit 阻塞，同时在途的帧不超过 queue_size + 编码线程数，
+    长序列的内存占用不随帧数增长。
+
+    参数:
+        output: 输出路径；视频扩展名且找到 ffmpeg 时编码为视频，否则为PNG序列
+        size: (width, height)
+        fps: 视频帧率
+        workers: PNG编码线程数
+        queue_size: 队列中最多等待的帧数
+    """
+
+    def __init__(self, output, size, fps=30, workers=None, queue_size=8):
+        self.width, self.height = size
+        self.stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, self.width)
+        self.count = 0
+        self.blocked = 0.0  # submit 因队列已满而等待的总时间
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._process = None
+        self._elapsed = None
+
+        ffmpeg = shutil.which("ffmpeg")
+        if output.lower().endswith(VIDEO_EXTENSIONS) and ffmpeg is None:
+            output = os.path.splitext(output)[0] + "_frames"
+            print(f"未找到 ffmpeg，改为导出PNG序列到 {output}")
+        if output.lower().endswith(VIDEO_EXTENSIONS):
+            self.mode = "ffmpeg"
+            self.output = output
+            self._process = subprocess.Popen(
+                [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", RAW_PIXEL_FORMAT,
+                 "-s", f"{self.width}x{self.height}", "-r", str(fps), "-i", "-",
+                 "-pix_fmt", "yuv420p", output],
+                stdin=subprocess.PIPE)
+            # 管道要求按顺序写入，只用一个写线程
+            targets = [self._pipe_worker]
+        else:
+            self.mode = "png"
+            if "%" not in output:
+                output = os.path.join(output, "frame_%05d.png")
+            self.output = output
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            workers = workers or min(8, os.cpu_count() or 1)
+            targets = [self._png_worker] * workers
+        self._threads = [threading.Thread(target=target, daemon=True) for target in targets]
+        for thread in self._threads:
+            thread.start()
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # 已有异常在传播时仍然收尾，但不用编码错误覆盖原异常
+        try:
+            self.close()
+        except RuntimeError as e:
+            print(f"关闭导出器时出错: {e}")
+
+    def submit(self, surface):
+        """复制一帧的像素并排入编码队列；队列满时阻塞"""
+        surface.flush()
+        data = bytearray(surface.get_data())
+        start = time.perf_counter()
+        self._put((self.count, data))
+        self.blocked += time.perf_counter() - start
+        self.count += 1
+
+    def _put(self, item):
+        while True:
+            if self._error is not None:
+                raise RuntimeError(f"帧编码失败: {self._error}")
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """
+        等待全部帧编码完成并关闭ffmpeg；可重复调用，只有第一次真正收尾
+
+        返回:
+            (帧数, 总秒数)
+        """
+        if self._elapsed is None:
+            try:
+                # 编码线程出错后仍会取走剩余的帧，结束标记总能放入队列
+                for _ in self._threads:
+                    self._queue.put(None)
+            finally:
+                for thread in self._threads:
+                    thread.join()
+                self._threads = []
+                if self._process is not None:
+                    try:
+                        self._process.stdin.close()
+                    except OSError as e:
+                        if self._error is None:
+                            self._error = e
+                    if self._process.wait() != 0 and self._error is None:
+                        self._error = f"ffmpeg 退出码 {self._process.returncode}"
+                self._elapsed = time.perf_counter() - self._start
+        if self._error is not None:
+            raise RuntimeError(f"帧编码失败: {self._error}")
+        return self.count, self._elapsed
+
+    @property
+    def elapsed(self):
+        """从创建到全部帧编码完成的秒数，close 之前为None"""
+        return self._elapsed
+
+    @property
+    def fps(self):
+        elapsed = time.perf_counter() - self._start
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    # ---------- 编码线程 ----------
+    def _png_worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            index, data = item
+            try:
+                image = cairo.ImageSurface.create_for_data(data, cairo.FORMAT_ARGB32,
+                                                           self.width, self.height, self.stride)
+                image.write_to_png(self.output % index)
+                image.finish()
+            except Exception as e:  # 记录后由主线程在下次 submit/close 时抛出
+                self._error = e
+
+    def _pipe_worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._process.stdin.write(item[1])
+            except Exception as e:  # 同上，线程不能提前退出，否则 close 放不进结束标记
+                self._error = e
+
+
+# ========== 帧来源 ==========
+def sweep_frames(source, param, values, size, ring_positions=(), trail_segments=(),
+                 domain=False, oversample=OVERSAMPLE, pool=None):
+    """
+    逐帧扫描表达式参数
+
+    参数:
+        source: 含参数的表达式，如 "z**2 + c"
+        param: 参数名
+        values: 各帧的参数值
+    返回:
+        逐帧生成 cairo.ImageSurface 的迭代器
+    """
+    for value in values:
+        func = compile_expression(bind_parameters(source, {param: value}))
+        yield render_figure(ring_positions, trail_segments, *size, oversample=oversample,
+                            pool=pool, func=func, domain=domain)
+
+
+def trail_frames(segments, size, points_per_frame, func=None, domain=False):
+    """
+    逐帧画出轨迹：每帧在持久画布上追加 points_per_frame 个输入点及其函数值的线段
+
+    参数:
+        segments: 复平面点数组的列表，每项为一段轨迹
+    返回:
+        逐帧生成同一个 cairo.ImageSurface 的迭代器（调用方需在下一帧前取走像素）
+    """
+    if func is None:
+        func = complex_function
+    width, height = size
+    origin_x, origin_y = width // 2, height // 2
+    surface = render_figure([], [], width, height, func=func, domain=domain)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+    for zs in segments:
+        with np.errstate(all="ignore"):
+            fs = np.asarray(func(zs), dtype=complex)
+        inputs = _to_screen(zs, origin_x, origin_y)
+        outputs = _to_screen(fs, origin_x, origin_y)
+        for start in range(0, len(zs), points_per_frame):
+            # 从上一帧的最后一点接着画，线段连续
+            piece = slice(max(start - 1, 0), start + points_per_frame)
+            draw_trail_segments(ctx, [_finite(inputs[piece])], (1, 0, 0))
+            draw_trail_segments(ctx, [_finite(outputs[piece])], (1, 1, 0))
+            surface.flush()
+            yield surface
+
+
+def _to_screen(zs, origin_x, origin_y):
+    points = np.empty((len(zs), 2))
+    points[:, 0] = origin_x + zs.real * GRID_SIZE
+    points[:, 1] = origin_y - zs.imag * GRID_SIZE
+    return points
+
+
+def _finite(points):
+    """去掉极点处的非有限坐标，Cairo路径不接受NaN"""
+    return points[np.isfinite(points).all(axis=1)].tolist()
+
+
+def recording_segments(path):
+    """从录制文件中取出轨迹采样，按分段记录切成复平面点数组的列表"""
+    records = Recording(path).records
+    records = records[(records["kind"] == POINT) | (records["kind"] == BREAK)]
+    breaks = np.flatnonzero(records["kind"] == BREAK)
+    segments = []
+    for part in np.split(records, breaks):
+        zs = np.array(part["z"][part["kind"] == POINT])
+        if len(zs):
+            segments.append(zs)
+    return segments
+
+
+def export(frames, output, size, fps=30, workers=None, queue_size=8):
+    """
+    把帧迭代器导出到 output，打印吞吐量
+
+    返回:
+        (帧数, 总秒数)
+    """
+    render_time = 0.0
+    with FrameExporter(output, size, fps, workers, queue_size) as exporter:
+        frames = iter(frames)
+        while True:
+            start = time.perf_counter()
+            surface = next(frames, None)
+            render_time += time.perf_counter() - start
+            if surface is None:
+                break
+            exporter.submit(surface)
+            if exporter.count % 100 == 0:
+                print(f"已导出 {exporter.count} 帧，{exporter.fps:.1f} 帧/秒")
+    # 退出 with 时已关闭一次，这里直接取其结果
+    count, elapsed = exporter.count, exporter.elapsed
+    print(f"导出 {count} 帧到 {exporter.output}，用时 {elapsed:.2f} 秒，"
+          f"{count / max(elapsed, 1e-9):.1f} 帧/秒（渲染 {render_time:.2f} 秒，"
+          f"等待编码 {exporter.blocked:.2f} 秒）")
+    return count, elapsed
+
+
+def main(argv=None):
+    # 两种动画共用的输出选项
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--size", type=parse_size, default=(WINDOW_WIDTH, WINDOW_HEIGHT), metavar="WxH")
+    common.add_argument("--fps", type=int, default=30, help="视频帧率")
+    common.add_argument("--encoders", type=int, default=None, help="PNG编码线程数，默认按CPU核数")
+    common.add_argument("--queue", type=int, default=8, help="等待编码的最大帧数")
+    common.add_argument("--domain", action="store_true", help="以全平面域着色作为背景")
+
+    parser = argparse.ArgumentParser(description="无窗口导出动画帧序列（PNG序列或经ffmpeg编码的视频）")
+    sub = parser.add_subparsers(dest="animation", required=True)
+
+    sweep = sub.add_parser("sweep", parents=[common], help="扫描表达式中的一个参数")
+    sweep.add_argument("output")
+    sweep.add_argument("--expr", required=True, help="含参数的表达式，如 \"z**2 + c\"")
+    sweep.add_argument("--param", default="c", help="参数名")
+    sweep.add_argument("--start", type=complex, default=0j)
+    sweep.add_argument("--stop", type=complex, default=1 + 0j)
+    sweep.add_argument("--frames", type=int, default=120)
+    sweep.add_argument("--ring", action="append", type=parse_point, default=[], metavar="X,Y",
+                       help="导数环的屏幕坐标，可重复")
+    sweep.add_argument("--trail", action="append", default=[], metavar="FILE", help="输入轨迹文本文件")
+    sweep.add_argument("--workers", type=int, default=RENDER_WORKERS, help="环光栅化的并行进程数")
+
+    trail = sub.add_parser("trail", parents=[common], help="逐帧画出轨迹")
+    trail.add_argument("output")
+    group = trail.add_mutually_exclusive_group(required=True)
+    group.add_argument("--trail", metavar="FILE", help="输入轨迹文本文件（屏幕坐标）")
+    group.add_argument("--recording", metavar="FILE", help="录制文件，只使用其中的轨迹采样和分段")
+    trail.add_argument("--points-per-frame", type=int, default=8)
+    trail.add_argument("--expr", help="函数表达式，默认使用录制时的函数或 engine.FUNC_EXPR")
+    args = parser.parse_args(argv)
+
+    size = args.size
+    try:
+        if args.animation == "sweep":
+            bind_parameters(args.expr, {args.param: args.start})
+            segments = []
+            for path in args.trail:
+                segments.extend(load_trail_segments(path))
+            values = np.linspace(args.start, args.stop, args.frames)
+            pool = RingRenderPool(args.workers)
+            try:
+                export(sweep_frames(args.expr, args.param, values, size, [tuple(p) for p in args.ring],
+                                    segments, args.domain, pool=pool),
+                       args.output, size, args.fps, args.encoders, args.queue)
+            finally:
+                pool.close()
+        else:
+            source = args.expr
+            if args.recording:
+                segments = recording_segments(args.recording)
+                source = source or Recording(args.recording).source or None
+            else:
+                segments = [screen_to_complex(segment, size[0] // 2, size[1] // 2, GRID_SIZE)
+                            for segment in load_trail_segments(args.trail)]
+            func = compile_expression(source) if source else None
+            export(trail_frames(segments, size, args.points_per_frame, func, args.domain),
+                   args.output, size, args.fps, args.encoders, args.queue)
+    except ExpressionError as e:
+        parser.error(f"无法解析表达式: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""逐阶段帧耗时统计：滚动分位数、屏幕叠加显示和CSV导出"""
+import csv
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+
+class _StageTimer:
+    """某一阶段的计时上下文，同一帧内多次进入时耗时累加"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._current[self.name] += time.perf_counter_ns() - self.start
+        return False
+
+
+class FrameProfiler:
+    """
+    用 perf_counter_ns 统计每帧各阶段的耗时
+
+    每帧以 begin_frame/end_frame 包围，阶段用 `with profiler.stage(name):` 计时。
+    最近 window 帧的数据用于计算 p50/p95/max；work 为除 idle_stages（等待帧率、等待事件）外的耗时，
+    超出 budget_ms 的帧计为超时帧。指定 csv_path 时每帧写入一行记录（毫秒）。
+
+    参数:
+        stages: 阶段名称，决定显示和CSV列的顺序
+        window: 滚动统计的帧数
+        budget_ms: 每帧工作时间预算
+        csv_path: 可选的CSV输出路径
+        idle_stages: 不计入 work 的等待阶段
+    """
+
+    def __init__(self, stages, window=240, budget_ms=1000 / 60, csv_path=None, idle_stages=("tick",)):
+        self.stages = tuple(stages)
+        self.idle_stages = tuple(name for name in idle_stages if name in self.stages)
+        self.budget_ms = budget_ms
+        self.frame_count = 0
+        self.overruns = 0
+        self._timers = {name: _StageTimer(self, name) for name in self.stages}
+        self._current = dict.fromkeys(self.stages, 0)
+        self._history = {name: deque(maxlen=window) for name in self.stages + ("work", "frame")}
+        self._frame_start = None
+
+        self._csv_file = None
+        self._csv_writer = None
+        if csv_path:
+            self._csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(("frame",) + self.stages + ("work", "frame_total"))
+
+    def stage(self, name):
+        return self._timers[name]
+
+    def begin_frame(self):
+        for name in self.stages:
+            self._current[name] = 0
+        self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        frame_ms = (time.perf_counter_ns() - self._frame_start) / 1e6
+        stage_ms = [self._current[name] / 1e6 for name in self.stages]
+        work_ms = frame_ms - sum(self._current[name] for name in self.idle_stages) / 1e6
+        for name, value in zip(self.stages, stage_ms):
+            self._history[name].append(value)
+        self._history["work"].append(work_ms)
+        self._history["frame"].append(frame_ms)
+        if work_ms > self.budget_ms:
+            self.overruns += 1
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([self.frame_count] + [f"{v:.3f}" for v in stage_ms] +
+                                     [f"{work_ms:.3f}", f"{frame_ms:.3f}"])
+        self.frame_count += 1
+        self._frame_start = None
+
+    def summary(self):
+        """
+        返回:
+            [(名称, p50, p95, max), ...]，单位毫秒，包含各阶段及 work、frame
+        """
+        rows = []
+        for name, values in self._history.items():
+            if values:
+                data = np.fromiter(values, dtype=float, count=len(values))
+                p50, p95 = np.percentile(data, (50, 95))
+                rows.append((name, float(p50), float(p95), float(data.max())))
+        return rows
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
+
+
+class ProfilerHUD:
+    """
+    把 FrameProfiler 的统计绘制为左下角的半透明表格
+
+    表格表面每 refresh 秒重建一次，其余帧直接贴图。
+    """
+
+    def __init__(self, profiler, font, refresh=0.5):
+        self.profiler = profiler
+        self.font = font
+        self.refresh = refresh
+        self._surface = None
+        self._updated = 0.0
+
+    def _build(self):
+        rows = [("阶段(ms)", "p50", "p95", "max")]
+        for name, p50, p95, peak in self.profiler.summary():
+            rows.append((name, f"{p50:.2f}", f"{p95:.2f}", f"{peak:.2f}"))
+        cells = [[self.font.render(text, True, (255, 255, 255)) for text in row] for row in rows]
+        footer = self.font.render(f"超时帧(>{self.profiler.budget_ms:.1f}ms): "
+                                  f"{self.profiler.overruns}/{self.profiler.frame_count}",
+                                  True, (255, 255, 0))
+
+        # 第一列左对齐，数值列右对齐
+        padding, gap = 8, 14
+        col_widths = [max(row[i].get_width() for row in cells) for i in range(4)]
+        line_height = self.font.get_linesize()
+        width = max(sum(col_widths) + gap * 3, footer.get_width()) + 2 * padding
+        height = line_height * (len(cells) + 1) + 2 * padding
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for r, row in enumerate(cells):
+            y = padding + r * line_height
+            x = padding
+            for c, text in enumerate(row):
+                offset = 0 if c == 0 else col_widths[c] - text.get_width()
+                surface.blit(text, (x + offset, y))
+                x += col_widths[c] + gap
+        surface.blit(footer, (padding, padding + len(cells) * line_height))
+        return surface
+
+    def blit(self, target):
+        now = time.perf_counter()
+        if self._surface is None or now - self._updated >= self.refresh:
+            self._surface = self._build()
+            self._updated = now
+        target.blit(self._surface, (10, target.get_height() - self._surface.get_height() - 10))
@@ -0,0 +1,138 @@
+"""导数环的多进程并行光栅化"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import cairo
+
+from ring_render import draw_rings
+
+
+def _union_rect(rects):
+    """多个 (x, y, w, h) 矩形的外包矩形"""
+    x0 = min(r[0] for r in rects)
+    y0 = min(r[1] for r in rects)
+    x1 = max(r[0] + r[2] for r in rects)
+    y1 = max(r[1] + r[3] for r in rects)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _tile_surface(buf, rect):
+    """在共享内存上创建与块矩形等大的ARGB32表面"""
+    _, _, w, h = rect
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, w)
+    return cairo.ImageSurface.create_for_data(buf, cairo.FORMAT_ARGB32, w, h, stride)
+
+
+def _warm_up():
+    """空任务：让工作进程在第一次整层重绘之前启动并完成导入"""
+
+
+def _render_chunk(shm_name, rect, rings, params):
+    """工作进程：把一组环绘制到共享内存中的ARGB块里"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        surface = _tile_surface(shm.buf, rect)
+        ctx = cairo.Context(surface)
+        ctx.set_antialias(cairo.ANTIALIAS_BEST)
+        ctx.translate(-rect[0], -rect[1])
+        draw_rings(ctx, rings, *params)
+        surface.flush()
+        surface.finish()
+        del ctx, surface
+    finally:
+        shm.close()
+
+
+class RingRenderPool:
+    """
+    可选的进程池渲染后端
+
+    环按顺序切成与进程数相同的连续批次，每个进程把自己的批次绘制到共享内存中
+    覆盖该批次包围盒的ARGB块，主进程再按批次顺序叠加，叠放次序与串行绘制一致。
+    进程数不大于1、环数较少或进程池不可用时退回串行绘制；并行路径出错时该批环改为串行重绘。
+    工作进程用 forkserver（不可用时 spawn）启动而不是 fork：第一次提交可能来自后台重绘线程，
+    且此时SDL已经初始化，fork 会复制出只剩一个线程的不一致进程状态。创建时即预热全部工作进程。
+
+    参数:
+        workers: 进程数，0或1表示串行
+        min_rings: 启用并行的最少环数，少于此数时进程间开销得不偿失
+    """
+
+    def __init__(self, workers=0, min_rings=32):
+        self.workers = workers
+        self.min_rings = min_rings
+        self._executor = None
+        self._warming = []
+        if workers > 1:
+            try:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context(method)
+                )
+                self._warming = [self._executor.submit(_warm_up) for _ in range(workers)]
+            except (OSError, ValueError) as e:
+                print(f"无法创建渲染进程池，将使用串行渲染: {e}")
+
+    @property
+    def parallel(self):
+        return self._executor is not None
+
+    def wait_ready(self, timeout=None):
+        """阻塞到工作进程预热完成（基准和测试用），返回是否完成"""
+        return not wait(self._warming, timeout).not_done
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def draw(self, ctx, rings, bounds, params):
+        """
+        绘制一批环到ctx
+
+        参数:
+            ctx: 目标Cairo上下文
+            rings: 环信息列表
+            bounds: 与rings一一对应的包围盒列表（空列表表示环在图层外）
+            params: (ring_radius, ring_width, num_segments, oversample)
+        """
+        visible = [(ring_info, rects) for ring_info, rects in zip(rings, bounds) if rects]
+        if not self.parallel or len(visible) < self.min_rings:
+            draw_rings(ctx, [ring_info for ring_info, _ in visible], *params)
+            return
+
+        size = -(-len(visible) // self.workers)
+        chunks = [visible[i:i + size] for i in range(0, len(visible), size)]
+        shms, blocks = [], []
+        try:
+            for chunk in chunks:
+                rect = _union_rect([r for _, rects in chunk for r in rects])
+                shm = shared_memory.SharedMemory(create=True, size=rect[2] * rect[3] * 4)
+                shms.append(shm)
+                future = self._executor.submit(_render_chunk, shm.name, rect,
+                                               [ring_info for ring_info, _ in chunk], params)
+                blocks.append((shm, rect, future))
+
+            # 全部完成后再按批次顺序叠加，保持叠放次序；失败时目标尚未被改动
+            for _, _, future in blocks:
+                future.result()
+            for shm, rect, _ in blocks:
+                tile = _tile_surface(shm.buf, rect)
+                ctx.save()
+                ctx.set_source_surface(tile, rect[0], rect[1])
+                ctx.paint()
+                ctx.restore()
+                tile.finish()
+                del tile
+        except Exception as e:  # 任何并行路径上的错误都退回串行，不让整层重绘失败
+            print(f"并行渲染失败，改用串行渲染: {e!r}")
+            if isinstance(e, (BrokenProcessPool, OSError)):
+                # 进程池或共享内存已不可用，之后都串行绘制
+                self.close()
+            draw_rings(ctx, [ring_info for ring_info, _ in visible], *params)
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
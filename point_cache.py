@@ -0,0 +1,57 @@
+"""按量化坐标缓存的单点计算结果"""
+import threading
+from collections import OrderedDict
+
+
+class PointCache:
+    """
+    有界LRU缓存，保存单个点的计算结果
+
+    键由调用方给出（通常为函数标识和量化到像素网格的坐标），超出容量时淘汰最久未用的项。
+    hits/misses 统计命中情况，用于观察长时间会话中缓存的效果。
+
+    参数:
+        maxsize: 最多保存的项数
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """返回缓存的值，未命中时返回None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存项，保留统计"""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                "maxsize": self.maxsize, "hit_rate": self.hit_rate}
@@ -0,0 +1,196 @@
+"""轨迹与导数环的二进制录制和回放
+
+文件由文件头和定长记录组成，只在末尾追加，可用 numpy.memmap 直接映射读取：
+
+    文件头:  魔数 b"CFRECORD" | uint16 版本 | uint16 记录字节数 | uint32 源码字节数 | 函数源码(补齐到8字节)
+    记录:    float64 时间(秒) | complex128 z | uint32 类型 | int32 参数   共32字节，小端
+
+记录保存复平面坐标 z 而不是函数值，回放时用当前函数重新计算，
+同一份录制可以在另一个函数下重新得到函数值轨迹。
+"""
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"CFRECORD"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHI")
+
+RECORD_DTYPE = np.dtype([("t", "<f8"), ("z", "<c16"), ("kind", "<u4"), ("arg", "<i4")])
+
+# 记录类型
+POINT = 0   # 轨迹采样点，z 为输入点
+BREAK = 1   # 轨迹分段
+RING = 2    # 在 z 处添加导数环
+KEY = 3     # 改变状态的按键，arg 为 pygame 键码
+REMOVE = 4  # 删除环心为 z 的导数环
+VIEW = 5    # 视图状态，成对写入：arg 为0的 z 为原点屏幕坐标 origin_x + origin_y·i，arg 为1的 z 实部为缩放
+
+
+def _header_size(source_len):
+    return _HEADER.size + -(-source_len // 8) * 8
+
+
+class Recording:
+    """
+    只读的录制文件，记录通过 memmap 映射，长会话也不必整体读入内存
+
+    文件末尾不完整的记录（如写入时程序崩溃）会被忽略。
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, record_size, source_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} 不是录制文件")
+            if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+                raise ValueError(f"不支持的录制文件版本: {version}")
+            self.source = f.read(source_len).decode("utf-8")
+        self.path = path
+        offset = _header_size(source_len)
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def duration(self):
+        return float(self.records["t"][-1]) if len(self.records) else 0.0
+
+
+class Recorder:
+    """
+    追加写入录制文件
+
+    记录先放入缓冲区，满了或调用 flush() 时写入文件。
+    路径已存在时校验文件头后继续追加，时间接在已有记录之后。
+
+    参数:
+        path: 录制文件路径
+        source: 当前函数的表达式源码，写入文件头
+        buffer_size: 缓冲的记录数
+    """
+
+    def __init__(self, path, source="", buffer_size=1024):
+        offset = 0.0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing = Recording(path)
+            offset = existing.duration
+            self._file = open(path, "ab")
+            # 截掉末尾不完整的记录，保证新记录对齐
+            self._file.truncate(_header_size(len(existing.source.encode("utf-8")))
+                                + len(existing) * RECORD_DTYPE.itemsize)
+        else:
+            encoded = source.encode("utf-8")
+            self._file = open(path, "wb")
+            self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, len(encoded)))
+            self._file.write(encoded.ljust(_header_size(len(encoded)) - _HEADER.size, b"\0"))
+        self.path = path
+        self._start = time.perf_counter() - offset
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._size = 0
+        self.count = 0
+
+    def _append(self, kind, zs=0j, arg=0):
+        zs = np.atleast_1d(zs)
+        if self._size + len(zs) > len(self._buffer):
+            self.flush()
+        if len(zs) > len(self._buffer):
+            self._buffer = np.zeros(len(zs), dtype=RECORD_DTYPE)
+        block = self._buffer[self._size:self._size + len(zs)]
+        block["t"] = time.perf_counter() - self._start
+        block["z"] = zs
+        block["kind"] = kind
+        block["arg"] = arg
+        self._size += len(zs)
+        self.count += len(zs)
+
+    def points(self, zs):
+        """记录一批轨迹采样点"""
+        if len(zs):
+            self._append(POINT, zs)
+
+    def break_segment(self):
+        self._append(BREAK)
+
+    def ring(self, z):
+        self._append(RING, z)
+
+    def key(self, key):
+        self._append(KEY, arg=key)
+
+    def remove_ring(self, z):
+        self._append(REMOVE, z)
+
+    def view(self, origin_x, origin_y, scale):
+        """记录视图状态；两条记录一次写入，时间相同，回放时总在同一批中"""
+        self._append(VIEW, [complex(origin_x, origin_y), complex(scale)], arg=np.array([0, 1]))
+
+    def flush(self):
+        if self._size:
+            self._file.write(self._buffer[:self._size].tobytes())
+            self._file.flush()
+            self._size = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+class Replayer:
+    """
+    按时间顺序取出录制中到期的记录
+
+    realtime 为真时按录制时的时间间隔回放；否则尽快回放，
+    每次取出录制时间上一帧(frame_time秒)内的记录，跳过空闲的间隔。
+
+    参数:
+        recording: Recording
+        realtime: 是否按原始时间回放
+        frame_time: 尽快回放时每批覆盖的录制时长
+    """
+
+    def __init__(self, recording, realtime=True, frame_time=1 / 60):
+        self.recording = recording
+        self.realtime = realtime
+        self.frame_time = frame_time
+        self.position = 0
+        self._start = None
+
+    @property
+    def finished(self):
+        return self.position >= len(self.recording)
+
+    def next_batch(self):
+        """返回本帧到期的记录（结构化数组，可能为空）"""
+        records = self.recording.records
+        if self.finished:
+            return records[:0]
+        if self.realtime:
+            if self._start is None:
+                self._start = time.perf_counter()
+            until = time.perf_counter() - self._start
+        else:
+            until = records["t"][self.position] + self.frame_time
+        end = self.position + int(np.searchsorted(records["t"][self.position:], until, side="right"))
+        batch = records[self.position:end]
+        self.position = end
+        return batch
+
+    def time_to_next(self):
+        """
+        返回:
+            距离下一条记录到期的秒数；尽快回放或已结束时为0
+        """
+        if self.finished or not self.realtime or self._start is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._start
+        return max(0.0, float(self.recording.records["t"][self.position]) - elapsed)
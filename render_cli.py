@@ -0,0 +1,220 @@
+"""无窗口批量渲染：把导数环和轨迹直接用Cairo渲染为PNG，不依赖显示设备
+
+用法:
+    python render_cli.py out.png --ring 900,500 --ring 700,650 --trail circle.txt
+    python render_cli.py --jobs jobs.json
+
+轨迹文件为文本，每行一个屏幕坐标 "x y"（或 "x,y"），空行分隔不同的轨迹段，
+'#' 开头的行为注释。jobs.json 为任务列表，每项形如
+    {"output": "a.png", "rings": [[900, 500]], "trails": ["circle.txt"]}
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cairo
+import numpy as np
+
+from coords import screen_to_complex
+from domain_coloring import domain_colors
+from engine import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE,
+    RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE, RENDER_WORKERS,
+    complex_function, map_screen_points, make_ring_info,
+)
+from expression import ExpressionError, compile_expression
+from parallel_render import RingRenderPool
+from ring_layer import RingLayer
+
+
+def load_trail_segments(path):
+    """读取轨迹文本文件，返回各段的 [(x, y), ...] 列表"""
+    segments = [[]]
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#"):
+                continue
+            if not line:
+                if segments[-1]:
+                    segments.append([])
+                continue
+            x, y = line.replace(",", " ").split()[:2]
+            segments[-1].append((float(x), float(y)))
+    return [segment for segment in segments if segment]
+
+
+def draw_coordinate_system(ctx, width, height, origin_x, origin_y, clear=True):
+    """绘制坐标轴和刻度；clear 为True时先涂黑背景"""
+    if clear:
+        ctx.set_source_rgb(0, 0, 0)
+        ctx.paint()
+
+    # 坐标轴
+    ctx.set_source_rgb(1, 0, 0)
+    ctx.set_line_width(2)
+    ctx.move_to(0, origin_y)
+    ctx.line_to(width, origin_y)
+    ctx.move_to(origin_x, 0)
+    ctx.line_to(origin_x, height)
+    ctx.stroke()
+
+    # 刻度及刻度值
+    ctx.set_source_rgb(1, 1, 1)
+    ctx.set_line_width(1)
+    ctx.set_font_size(16)
+    for x in range(0, width, GRID_SIZE):
+        ctx.move_to(x, origin_y - 5)
+        ctx.line_to(x, origin_y + 5)
+        if x != origin_x:
+            ctx.move_to(x - 10, origin_y + 26)
+            ctx.show_text(f"{(x - origin_x) / GRID_SIZE:.1f}")
+    for y in range(0, height, GRID_SIZE):
+        ctx.move_to(origin_x - 5, y)
+        ctx.line_to(origin_x + 5, y)
+        if y != origin_y:
+            ctx.move_to(origin_x + 10, y + 6)
+            ctx.show_text(f"{-(y - origin_y) / GRID_SIZE:.1f}")
+    ctx.stroke()
+
+
+def paint_domain_coloring(ctx, width, height, origin_x, origin_y, func=None):
+    """以全分辨率一次向量化计算域着色并铺满画布"""
+    if func is None:
+        func = complex_function
+    xs, ys = np.meshgrid(np.arange(width) + 0.5, np.arange(height) + 0.5)
+    zs = screen_to_complex(np.column_stack((xs.ravel(), ys.ravel())), origin_x, origin_y, GRID_SIZE)
+    with np.errstate(all="ignore"):
+        rgb = domain_colors(np.asarray(func(zs)).reshape(height, width))
+    # ARGB32按本机字节序存储，小端机器上内存中为BGRA
+    pixels = np.full((height, width, 4), 255, dtype=np.uint8)
+    if sys.byteorder == "little":
+        pixels[..., 2::-1] = rgb
+    else:
+        pixels[..., 1:] = rgb
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, width)
+    image = cairo.ImageSurface.create_for_data(pixels, cairo.FORMAT_ARGB32, width, height, stride)
+    ctx.set_source_surface(image, 0, 0)
+    ctx.paint()
+    image.finish()
+
+
+def draw_trail_segments(ctx, segments, rgb, line_width=2):
+    """用折线绘制各轨迹段"""
+    ctx.set_source_rgb(*rgb)
+    ctx.set_line_width(line_width)
+    ctx.set_line_join(cairo.LINE_JOIN_ROUND)
+    for segment in segments:
+        if len(segment) < 2:
+            continue
+        ctx.move_to(*segment[0])
+        for x, y in segment[1:]:
+            ctx.line_to(x, y)
+        ctx.stroke()
+
+
+def render_figure(ring_positions, trail_segments, width=WINDOW_WIDTH, height=WINDOW_HEIGHT,
+                  oversample=OVERSAMPLE, pool=None, func=None, domain=False):
+    """
+    渲染一张完整的图
+
+    参数:
+        ring_positions: 导数环的屏幕坐标列表
+        trail_segments: 输入轨迹段列表，函数值轨迹由其映射得到
+        pool: 可选的 RingRenderPool
+        func: 复数函数，默认为 engine.complex_function
+        domain: 为True时以全平面域着色代替黑色背景
+    返回:
+        cairo.ImageSurface
+    """
+    origin_x, origin_y = width // 2, height // 2
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(surface)
+    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+    if domain:
+        paint_domain_coloring(ctx, width, height, origin_x, origin_y, func)
+    draw_coordinate_system(ctx, width, height, origin_x, origin_y, clear=not domain)
+
+    # 红色输入轨迹与黄色函数值轨迹
+    mapped = [map_screen_points(segment, origin_x, origin_y, func).tolist() for segment in trail_segments]
+    draw_trail_segments(ctx, trail_segments, (1, 0, 0))
+    draw_trail_segments(ctx, mapped, (1, 1, 0))
+
+    # 导数环画在独立的透明图层上再整体叠加
+    if ring_positions:
+        layer = RingLayer(width, height, RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, oversample,
+                          pool=pool)
+        layer.extend(make_ring_info(pos, origin_x, origin_y, func) for pos in ring_positions)
+        ctx.set_source_surface(layer.surface, 0, 0)
+        ctx.paint()
+
+    surface.flush()
+    return surface
+
+
+def parse_point(text):
+    x, y = text.split(",")
+    return (int(float(x)), int(float(y)))
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无窗口渲染导数环和轨迹为PNG")
+    parser.add_argument("output", nargs="?", help="输出PNG路径")
+    parser.add_argument("--ring", action="append", type=parse_point, default=[],
+                        metavar="X,Y", help="导数环的屏幕坐标，可重复")
+    parser.add_argument("--trail", action="append", default=[], metavar="FILE",
+                        help="输入轨迹文本文件，可重复")
+    parser.add_argument("--jobs", metavar="JSON", help="批量任务列表文件")
+    parser.add_argument("--size", type=parse_size, default=(WINDOW_WIDTH, WINDOW_HEIGHT),
+                        metavar="WxH", help="图像尺寸")
+    parser.add_argument("--oversample", type=int, default=OVERSAMPLE, help="过采样倍数")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS,
+                        help="环光栅化的并行进程数，0表示串行")
+    parser.add_argument("--expr", help="函数表达式，默认使用 engine.FUNC_EXPR")
+    parser.add_argument("--domain", action="store_true", help="以全平面域着色作为背景")
+    args = parser.parse_args(argv)
+
+    func = None
+    if args.expr:
+        try:
+            func = compile_expression(args.expr)
+        except ExpressionError as e:
+            parser.error(f"无法解析表达式: {e}")
+
+    if args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(args.jobs))
+    elif args.output:
+        jobs = [{"output": args.output, "rings": args.ring, "trails": args.trail}]
+        base_dir = os.getcwd()
+    else:
+        parser.error("需要指定输出路径或 --jobs")
+
+    pool = RingRenderPool(args.workers)
+    start = time.perf_counter()
+    try:
+        for job in jobs:
+            segments = []
+            for path in job.get("trails", []):
+                segments.extend(load_trail_segments(os.path.join(base_dir, path)))
+            rings = [tuple(pos) for pos in job.get("rings", [])]
+            surface = render_figure(rings, segments, *args.size, oversample=args.oversample,
+                                    pool=pool, func=func, domain=args.domain)
+            surface.write_to_png(os.path.join(base_dir, job["output"]))
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+    print(f"渲染 {len(jobs)} 张图，用时 {elapsed:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""轨迹的自适应重采样与抽稀
+
+f 拉伸平面的地方，相邻输入采样映射后相距很远，函数值轨迹会变成折线；
+压缩平面的地方，大量点挤在几个像素内。本模块在复平面上：
+    - adaptive_resample: 逐轮批量取中点细分，直到映射后的每一步不超过给定像素数
+    - douglas_peucker / radial_filter: 去掉对折线形状没有贡献的点
+"""
+import numpy as np
+
+
+def adaptive_resample(zs, fs, func, scale, max_step, passes=4, max_split=16, max_points=65536):
+    """
+    细分输入折线，使相邻函数值在屏幕上的距离不超过 max_step 像素
+
+    每一轮把所有超限的线段按 步长/max_step 等分（每段至多 max_split 份），新点一次向量化求值；
+    f 非线性时再检查下一轮，最多 passes 轮。极点附近等无法收敛的线段在轮数用尽后保持原样。
+
+    参数:
+        zs, fs: (N,) 输入点和对应的函数值
+        func: 复数函数
+        scale: 每单位长度的像素数
+        max_step: 映射后相邻点的最大像素距离
+        max_points: 细分后点数上限，超过时停止细分
+    返回:
+        (zs, fs) 细分后的点，包含原有的全部点
+    """
+    zs = np.asarray(zs, dtype=complex).reshape(-1)
+    fs = np.asarray(fs, dtype=complex).reshape(-1)
+    limit = max_step / scale
+    for _ in range(passes):
+        if len(zs) < 2:
+            break
+        with np.errstate(invalid="ignore"):
+            steps = np.abs(np.diff(fs))
+            split = np.flatnonzero(steps > limit)
+        if not len(split):
+            break
+        pieces = np.minimum(np.ceil(steps[split] / limit), max_split).astype(int)
+        added = int(np.sum(pieces - 1))
+        if len(zs) + added > max_points:
+            break
+        # 第i段插入 pieces[i]-1 个等分点，插入位置相同的点按参数递增排列
+        seg = np.repeat(split, pieces - 1)
+        offsets = np.arange(added) - np.repeat(np.cumsum(pieces - 1) - (pieces - 1), pieces - 1)
+        fractions = (offsets + 1) / np.repeat(pieces, pieces - 1)
+        new_zs = zs[seg] + fractions * (zs[seg + 1] - zs[seg])
+        with np.errstate(all="ignore"):
+            new_fs = np.asarray(func(new_zs), dtype=complex).reshape(-1)
+        zs = np.insert(zs, seg + 1, new_zs)
+        fs = np.insert(fs, seg + 1, new_fs)
+    return zs, fs
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Douglas-Peucker 折线简化
+
+    参数:
+        points: (N,) 复数表示的折线顶点
+        tolerance: 允许的最大偏差（与 points 同单位）
+    返回:
+        (N,) 布尔数组，True 表示保留；首尾两点总是保留
+    """
+    points = np.asarray(points, dtype=complex)
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a = points[first]
+        d = points[last] - a
+        inner = points[first + 1:last] - a
+        # 到线段 a→b 的距离：先求投影参数再截断到 [0, 1]
+        length2 = d.real * d.real + d.imag * d.imag
+        with np.errstate(all="ignore"):
+            if length2 > 0:
+                t = np.clip((inner * np.conj(d)).real / length2, 0.0, 1.0)
+                dist = np.abs(inner - t * d)
+            else:
+                dist = np.abs(inner)
+        # 非有限值（极点处）无法比较，视为无穷远，保留该点并继续分割
+        dist[np.isnan(dist)] = np.inf
+        index = int(np.argmax(dist))
+        if dist[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def radial_filter(points, anchor, tolerance):
+    """
+    去掉与上一个保留点距离不超过 tolerance 的点
+
+    逐点与上一个保留点比较，缓慢移动时跨帧挤在一起的点也会被去掉。
+
+    参数:
+        points: (N,) 复数
+        anchor: 上一个已保留的点，None 表示没有
+    返回:
+        (N,) 布尔数组，True 表示保留
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    last = anchor
+    for i, z in enumerate(np.asarray(points).tolist()):
+        if last is None or not abs(z - last) <= tolerance:
+            keep[i] = True
+            last = z
+    return keep
+
+
+def simplify(points, tolerance, anchor=None):
+    """
+    抽稀一批要追加到折线末尾的点
+
+    先以 anchor（折线当前的最后一点）为起点做 Douglas-Peucker，再做径向距离过滤。
+
+    返回:
+        应追加的点（不含 anchor）
+    """
+    points = np.asarray(points, dtype=complex).reshape(-1)
+    if not len(points):
+        return points
+    if anchor is None:
+        points = points[douglas_peucker(points, tolerance)]
+    else:
+        points = points[douglas_peucker(np.concatenate(([anchor], points)), tolerance)[1:]]
+    return points[radial_filter(points, anchor, tolerance)]
+
+
+class TrailResampler:
+    """
+    把原始采样细分、抽稀后追加到一对轨迹（输入轨迹和函数值轨迹）
+
+    新采样连同上一个原始采样一起细分，使跨批次的线段也满足步长；
+    两条轨迹各自以其末点为起点抽稀。轨迹分段或清空后需调用 reset()。
+
+    参数:
+        input_trail, output_trail: 保存复数点的 TrailStore
+        max_step: 函数值轨迹相邻点的最大像素距离
+        tolerance: 抽稀允许的最大像素偏差
+    """
+
+    def __init__(self, input_trail, output_trail, max_step, tolerance):
+        self.input_trail = input_trail
+        self.output_trail = output_trail
+        self.max_step = max_step
+        self.tolerance = tolerance
+        self.last_sample = None
+
+    def reset(self):
+        self.last_sample = None
+
+    def extend(self, zs, fs, func, scale):
+        """
+        追加一批原始采样
+
+        参数:
+            zs, fs: (N,) 原始采样及其函数值
+            func: 用于细分的复数函数
+            scale: 当前视图每单位长度的像素数
+        """
+        zs = np.asarray(zs, dtype=complex).reshape(-1)
+        fs = np.asarray(fs, dtype=complex).reshape(-1)
+        if not zs.size:
+            return
+        if self.last_sample is None:
+            dense_z, dense_f = adaptive_resample(zs, fs, func, scale, self.max_step)
+        else:
+            # 结果中去掉作为起点的上一个采样
+            last_z, last_f = self.last_sample
+            dense_z, dense_f = adaptive_resample(np.append(last_z, zs), np.append(last_f, fs),
+                                                 func, scale, self.max_step)
+            dense_z, dense_f = dense_z[1:], dense_f[1:]
+        self.last_sample = (zs[-1], fs[-1])
+
+        tolerance = self.tolerance / scale
+        self.input_trail.extend(simplify(dense_z, tolerance, self.input_trail.last_point()))
+        self.output_trail.extend(simplify(dense_f, tolerance, self.output_trail.last_point()))
@@ -0,0 +1,224 @@
+"""持久化的导数环图层：增量绘制与脏矩形重绘"""
+import math
+
+import numpy as np
+import cairo
+
+from ring_render import draw_ring, draw_rings
+from spatial_index import SpatialGrid
+
+# 包围盒外扩的像素数，覆盖描边和抗锯齿
+BOUNDS_PADDING = 2
+
+
+class RingLayer:
+    """
+    持久化的透明Cairo图层，保存所有导数环
+
+    - add/extend: 新环直接叠加绘制，不重绘已有的环，返回新环的编号
+    - remove: 清空被删环的包围盒，并只重绘与之相交的环
+    - clear/rebuild: 整层重绘，仅用于清除和视图变化；不在图层内的环不绘制
+    - reposition: 视图变化后按编号顺序替换环的位置，编号和叠放次序不变
+    - query/hit_test: 矩形范围查询和点击命中测试
+
+    每个环的信息为 (input_pos, output_pos, dz_angles, dfs)。环按递增编号保存（即叠放次序），
+    包围盒登记在均匀网格索引中，局部重绘和命中测试只检查相关格子里的环。
+    surface 可传入外部分配的ARGB32表面(例如与Pygame共享缓冲区的表面)。
+    pool 为可选的 RingRenderPool，整层重绘时把环分给多个进程光栅化。
+    """
+
+    def __init__(self, width, height, ring_radius, ring_width, num_segments, oversample,
+                 surface=None, pool=None, cell_size=64):
+        self.width = width
+        self.height = height
+        self.ring_radius = ring_radius
+        self.ring_width = ring_width
+        self.num_segments = num_segments
+        self.oversample = oversample
+        self.pool = pool
+
+        self._rings = {}
+        self._extents = {}
+        self._next_id = 0
+        self.index = SpatialGrid(cell_size)
+        if surface is None:
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        self.surface = surface
+        self.clear()
+
+    def __len__(self):
+        return len(self._rings)
+
+    @property
+    def rings(self):
+        """按叠放次序排列的全部环信息"""
+        return list(self._rings.values())
+
+    @rings.setter
+    def rings(self, rings):
+        """替换全部环并重新编号，不重绘（之后调用 rebuild）"""
+        self._rings = {}
+        self._extents = {}
+        self.index.clear()
+        for ring_info in rings:
+            self._register(ring_info)
+
+    @property
+    def ids(self):
+        """按叠放次序排列的环编号"""
+        return list(self._rings)
+
+    def get(self, ring_id):
+        return self._rings[ring_id]
+
+    # ---------- 包围盒与索引 ----------
+    def _clip_rect(self, x0, y0, x1, y1):
+        """将浮点边界裁剪为图层内的整数矩形，完全在外时返回None"""
+        x0 = max(0, int(math.floor(x0)))
+        y0 = max(0, int(math.floor(y0)))
+        x1 = min(self.width, int(math.ceil(x1)))
+        y1 = min(self.height, int(math.ceil(y1)))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def ring_extents(self, ring_info, df_scale=None):
+        """
+        返回:
+            (dz_extent, df_extent) 输入环和输出环外接圆的半径(像素)；
+            df_scale 为 max|dfs|，省略时由 dfs 计算
+        """
+        if df_scale is None:
+            df_scale = float(np.max(np.abs(ring_info[3])))
+        dz_extent = self.ring_radius + self.ring_width/2
+        df_extent = self.ring_radius * df_scale + self.ring_width/2
+        return dz_extent, df_extent
+
+    def ring_bounds(self, ring_info, df_scale=None):
+        """返回环的输入半部和输出半部在图层内的包围盒列表"""
+        input_pos, output_pos, _, _ = ring_info
+        rects = []
+        for (x, y), extent in zip((input_pos, output_pos), self.ring_extents(ring_info, df_scale)):
+            extent += BOUNDS_PADDING
+            rect = self._clip_rect(x - extent, y - extent, x + extent, y + extent)
+            if rect is not None:
+                rects.append(rect)
+        return rects
+
+    def _register(self, ring_info, ring_id=None):
+        """保存环信息并把包围盒登记到索引，返回 (编号, 包围盒列表)"""
+        if ring_id is None:
+            ring_id = self._next_id
+            self._next_id += 1
+            self._extents[ring_id] = float(np.max(np.abs(ring_info[3])))
+        self._rings[ring_id] = ring_info
+        rects = self.ring_bounds(ring_info, self._extents[ring_id])
+        self.index.insert(ring_id, rects)
+        return ring_id, rects
+
+    def query(self, rect):
+        """
+        返回:
+            包围盒与 (x, y, w, h) 相交的环编号，按叠放次序排列
+        """
+        return sorted(self.index.query(rect))
+
+    def hit_test(self, x, y):
+        """
+        返回:
+            点 (x, y) 落在其输入环或输出环外接圆内的最上层环编号，没有时返回None
+        """
+        for ring_id in sorted(self.index.query_point(x, y), reverse=True):
+            ring_info = self._rings[ring_id]
+            for (cx, cy), extent in zip(ring_info[:2], self.ring_extents(ring_info, self._extents[ring_id])):
+                if math.hypot(x - cx, y - cy) <= extent:
+                    return ring_id
+        return None
+
+    # ---------- 绘制 ----------
+    @property
+    def render_params(self):
+        return (self.ring_radius, self.ring_width, self.num_segments, self.oversample)
+
+    def _draw_ring(self, ctx, ring_info):
+        draw_ring(ctx, ring_info, *self.render_params)
+
+    def _draw_batch(self, ctx, rings, bounds):
+        """绘制一批环，有进程池时交给进程池"""
+        if self.pool is not None:
+            self.pool.draw(ctx, rings, bounds, self.render_params)
+        else:
+            draw_rings(ctx, [ring_info for ring_info, rects in zip(rings, bounds) if rects],
+                       *self.render_params)
+
+    def _context(self):
+        ctx = cairo.Context(self.surface)
+        ctx.set_antialias(cairo.ANTIALIAS_BEST)
+        return ctx
+
+    def _clear_rects(self, ctx, rects):
+        """清空给定矩形区域，并把后续绘制裁剪到这些区域内"""
+        for rect in rects:
+            ctx.rectangle(*rect)
+        ctx.clip()
+        ctx.set_operator(cairo.OPERATOR_CLEAR)
+        ctx.paint()
+        ctx.set_operator(cairo.OPERATOR_OVER)
+
+    def add(self, ring_info):
+        """叠加绘制一个新环，不重绘已有的环；返回新环的编号"""
+        ring_id, bounds = self._register(ring_info)
+        if bounds:
+            self._draw_ring(self._context(), ring_info)
+            self.surface.flush()
+        return ring_id
+
+    def extend(self, rings):
+        """批量添加多个环，只绘制新环；返回新环的编号列表"""
+        rings = list(rings)
+        ids, bounds = [], []
+        for ring_info in rings:
+            ring_id, rects = self._register(ring_info)
+            ids.append(ring_id)
+            bounds.append(rects)
+        self._draw_batch(self._context(), rings, bounds)
+        self.surface.flush()
+        return ids
+
+    def remove(self, ring_id):
+        """删除编号为ring_id的环，只重绘受影响的脏矩形"""
+        rects = self.index.rects(ring_id)
+        self.index.remove(ring_id)
+        del self._rings[ring_id]
+        del self._extents[ring_id]
+        if rects:
+            self.redraw(rects)
+
+    def redraw(self, rects):
+        """清空给定矩形区域，按叠放次序只重绘索引中与之相交的环"""
+        ids = set()
+        for rect in rects:
+            ids |= self.index.query(rect)
+        ids = sorted(ids)
+        ctx = self._context()
+        self._clear_rects(ctx, rects)
+        self._draw_batch(ctx, [self._rings[i] for i in ids], [self.index.rects(i) for i in ids])
+        self.surface.flush()
+
+    def reposition(self, rings):
+        """按编号顺序替换全部环的信息（通常只是位置变化）并更新索引，不重绘"""
+        for ring_id, ring_info in zip(list(self._rings), rings):
+            self._register(ring_info, ring_id)
+
+    def clear(self):
+        """删除所有环并清空整个图层"""
+        self.rings = []
+        self.rebuild()
+
+    def rebuild(self):
+        """整层重绘（视图变化时使用），只绘制与图层相交的环"""
+        ctx = self._context()
+        self._clear_rects(ctx, [(0, 0, self.width, self.height)])
+        ids = self.query((0, 0, self.width, self.height))
+        self._draw_batch(ctx, [self._rings[i] for i in ids], [self.index.rects(i) for i in ids])
+        self.surface.flush()
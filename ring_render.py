@@ -0,0 +1,244 @@
+"""导数环渲染：几何计算与Cairo绘制"""
+from collections import namedtuple
+from functools import lru_cache
+import math
+
+import numpy as np
+import cairo
+
+from spatial_index import SpatialGrid
+from viridis_table import viridis
+
+# df环几何数据：
+#   inner, outer: (M, 2) 内外环顶点屏幕坐标，M = NUM_SEGMENTS * OVERSAMPLE
+#   colors: (NUM_SEGMENTS, 3) 每个原始分段的RGB颜色
+#   oversample: 每个原始分段包含的渲染段数
+DfRingGeometry = namedtuple("DfRingGeometry", ["inner", "outer", "colors", "oversample"])
+
+# 判断环是否互相遮挡时包围盒外扩的像素数，覆盖描边和抗锯齿
+OVERLAP_PADDING = 2
+
+
+@lru_cache(maxsize=None)
+def viridis_lut(num_segments):
+    """
+    预先计算每个分段的viridis颜色，dz环和df环共用
+
+    返回:
+        (num_segments, 3) 的RGB数组，第k行对应角度 2πk/num_segments
+    """
+    lut = viridis(np.arange(num_segments) / num_segments)
+    lut.flags.writeable = False
+    return lut
+
+
+def lookup_angle_colors(angles, num_segments):
+    """按角度在查找表中取最近分段的颜色"""
+    color_vals = (np.asarray(angles) % (2 * np.pi)) / (2 * np.pi)
+    idx = np.rint(color_vals * num_segments).astype(int) % num_segments
+    return viridis_lut(num_segments)[idx]
+
+
+@lru_cache(maxsize=None)
+def get_dz_ring_sprite(ring_radius, ring_width, num_segments, oversample):
+    """
+    将dz环(输入环)光栅化为精灵表面，每组参数只绘制一次
+
+    返回:
+        (sprite, half): sprite为ARGB32表面，环心位于 (half, half)
+    """
+    half = int(math.ceil(ring_radius + ring_width/2)) + 2
+    sprite = cairo.ImageSurface(cairo.FORMAT_ARGB32, 2 * half, 2 * half)
+    ctx = cairo.Context(sprite)
+    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+    ctx.set_line_width(0.5)
+
+    inner_radius = ring_radius - ring_width/2
+    outer_radius = ring_radius + ring_width/2
+    num_render_segments = num_segments * oversample
+    colors = viridis_lut(num_segments).tolist()
+
+    # 绘制平滑圆环
+    for i in range(num_render_segments):
+        angle = 2 * np.pi * i / num_render_segments
+        next_angle = 2 * np.pi * (i + 1) / num_render_segments
+        r, g, b = colors[i // oversample]
+
+        # 绘制扇形路径
+        ctx.new_path()
+        ctx.arc(half, half, inner_radius, angle, next_angle)
+        ctx.arc_negative(half, half, outer_radius, next_angle, angle)
+        ctx.close_path()
+
+        # 设置颜色并填充
+        ctx.set_source_rgb(r, g, b)
+        ctx.fill_preserve()
+
+        # 添加细微边缘以增强视觉效果
+        ctx.set_source_rgba(r, g, b, 0.8)
+        ctx.stroke()
+
+    sprite.flush()
+    return sprite, half
+
+
+def draw_dz_ring(ctx, x, y, ring_radius, ring_width, num_segments, oversample):
+    """
+    将缓存的dz环精灵贴到 (x, y) 处
+
+    参数:
+        ctx: Cairo绘图上下文
+        x, y: 环中心屏幕坐标
+        其余参数: 用于查找精灵缓存
+    """
+    sprite, half = get_dz_ring_sprite(ring_radius, ring_width, num_segments, oversample)
+    ctx.save()
+    ctx.set_source_surface(sprite, x - half, y - half)
+    ctx.paint()
+    ctx.restore()
+
+
+def build_df_ring_geometry(x, y, dz_angles, dfs, ring_radius, ring_width, oversample):
+    """
+    一次性向量化计算df环(输出环)的全部几何数据
+
+    参数:
+        x, y: 环中心屏幕坐标
+        dz_angles: 导数角度数组(递增)
+        dfs: 导数值数组
+        ring_radius: 环基准半径
+        ring_width: 环宽度
+        oversample: 过采样倍数
+
+    返回:
+        DfRingGeometry
+    """
+    dz_angles = np.asarray(dz_angles, dtype=float)
+    num_segments = len(dz_angles)
+    num_render_segments = num_segments * oversample
+
+    # 扩展角度和模值数组以确保环形闭合，然后整体线性插值
+    df_abs_values = np.abs(dfs)
+    angles_ext = np.append(dz_angles, dz_angles[0] + 2*np.pi)
+    df_abs_ext = np.append(df_abs_values, df_abs_values[0])
+    smooth_angles = np.linspace(0, 2*np.pi, num_render_segments, endpoint=False)
+    radii = ring_radius * np.interp(smooth_angles, angles_ext, df_abs_ext)
+
+    # 内外半径及顶点坐标（屏幕y轴向下）
+    inner_radii = np.maximum(0, radii - ring_width/2)
+    outer_radii = radii + ring_width/2
+    cos_a = np.cos(smooth_angles)
+    sin_a = np.sin(smooth_angles)
+    inner = np.column_stack((x + inner_radii * cos_a, y - inner_radii * sin_a))
+    outer = np.column_stack((x + outer_radii * cos_a, y - outer_radii * sin_a))
+
+    # 颜色与dz环保持一致：按原始分段的角度查表
+    colors = lookup_angle_colors(dz_angles, num_segments)
+
+    return DfRingGeometry(inner, outer, colors, oversample)
+
+
+def draw_df_ring_geometry(ctx, geometry):
+    """
+    将预先计算好的df环几何数据绘制到Cairo上下文
+
+    参数:
+        ctx: Cairo绘图上下文
+        geometry: build_df_ring_geometry 的返回值
+    """
+    draw_df_ring_geometries(ctx, [geometry])
+
+
+def draw_df_ring_geometries(ctx, geometries):
+    """
+    批量绘制多个df环
+
+    同一原始分段内的oversample个渲染段颜色相同，合并为一个多边形；各环中颜色相同的多边形
+    再合并到同一条路径，每种颜色只填充和描边一次。合并会打乱环之间的绘制先后，
+    调用方需保证各环互不相交（见 draw_rings）。
+
+    参数:
+        ctx: Cairo绘图上下文
+        geometries: build_df_ring_geometry 返回值的列表
+    """
+    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+    ctx.set_line_width(0.5)
+
+    buckets = {}
+    for inner, outer, colors, oversample in geometries:
+        num_render_segments = len(inner)
+        # 每个分段的顶点索引：oversample+1 个点，末段回绕到起点
+        starts = np.arange(0, num_render_segments, oversample)
+        idx = (starts[:, None] + np.arange(oversample + 1)) % num_render_segments
+        polygons = np.concatenate((inner[idx], outer[idx[:, ::-1]]), axis=1).tolist()
+        for polygon, color in zip(polygons, map(tuple, colors.tolist())):
+            buckets.setdefault(color, []).append(polygon)
+
+    for (r, g, b), polygons in buckets.items():
+        ctx.new_path()
+        for polygon in polygons:
+            ctx.move_to(*polygon[0])
+            for px, py in polygon[1:]:
+                ctx.line_to(px, py)
+            ctx.close_path()
+
+        # 设置颜色并填充
+        ctx.set_source_rgb(r, g, b)
+        ctx.fill_preserve()
+
+        # 添加细微边缘以增强视觉效果
+        ctx.set_source_rgba(r, g, b, 0.8)
+        ctx.stroke()
+
+
+def draw_ring(ctx, ring_info, ring_radius, ring_width, num_segments, oversample):
+    """
+    绘制一个完整的导数环：输入端dz环与输出端df环
+
+    参数:
+        ctx: Cairo绘图上下文
+        ring_info: (input_pos, output_pos, dz_angles, dfs)
+    """
+    draw_rings(ctx, [ring_info], ring_radius, ring_width, num_segments, oversample)
+
+
+def draw_rings(ctx, rings, ring_radius, ring_width, num_segments, oversample):
+    """
+    按叠放次序批量绘制一组导数环，结果与逐个调用 draw_ring（每个环先dz后df）相同
+
+    连续的、包围盒互不相交的环归为一组：组内先贴全部dz环精灵，再合并绘制全部df环。
+    组内的环互不遮挡，合并不改变画面；遇到与组内已有环相交的环时先画完当前组再开新组，
+    因此叠放次序只取决于环的顺序，与调用方如何分批无关。环阵列中的环大多互不相交，
+    几乎整批合并为一组。
+
+    参数:
+        ctx: Cairo绘图上下文
+        rings: ring_info 列表，每项为 (input_pos, output_pos, dz_angles, dfs)
+    """
+    _, half = get_dz_ring_sprite(ring_radius, ring_width, num_segments, oversample)
+    occupied = SpatialGrid()
+    positions, geometries = [], []
+    for input_pos, output_pos, dz_angles, dfs in rings:
+        geometry = build_df_ring_geometry(*output_pos, dz_angles, dfs,
+                                          ring_radius, ring_width, oversample)
+        x, y = input_pos
+        (x0, y0), (x1, y1) = geometry.outer.min(axis=0), geometry.outer.max(axis=0)
+        rects = [(x - half, y - half, 2 * half, 2 * half),
+                 (x0 - OVERLAP_PADDING, y0 - OVERLAP_PADDING,
+                  x1 - x0 + 2 * OVERLAP_PADDING, y1 - y0 + 2 * OVERLAP_PADDING)]
+        if any(occupied.query(rect) for rect in rects):
+            _draw_ring_group(ctx, positions, geometries, ring_radius, ring_width, num_segments, oversample)
+            occupied.clear()
+            positions, geometries = [], []
+        occupied.insert(len(positions), rects)
+        positions.append(input_pos)
+        geometries.append(geometry)
+    _draw_ring_group(ctx, positions, geometries, ring_radius, ring_width, num_segments, oversample)
+
+
+def _draw_ring_group(ctx, positions, geometries, ring_radius, ring_width, num_segments, oversample):
+    """绘制一组互不相交的环：先贴全部dz环精灵，再合并绘制全部df环"""
+    for input_pos in positions:
+        draw_dz_ring(ctx, *input_pos, ring_radius, ring_width, num_segments, oversample)
+    if geometries:
+        draw_df_ring_geometries(ctx, geometries)
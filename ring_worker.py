@@ -0,0 +1,179 @@
+"""后台线程重绘的双缓冲导数环图层"""
+import threading
+
+import cairo
+
+from ring_layer import RingLayer
+from surface_bridge import CairoPygameBridge
+
+# 每批绘制的环数（有并行进程池时乘以进程数，每个进程分到约这么多），新任务到来时在批与批之间放弃旧任务
+CANCEL_BATCH = 32
+
+
+class BackgroundRingLayer(RingLayer):
+    """
+    在后台线程中重绘的导数环图层
+
+    持有前后两块共享缓冲区（CairoPygameBridge）：主线程只贴前缓冲区，后台线程把重绘画到
+    后缓冲区，完成后由主线程在下次 blit() 时交换。Cairo在光栅化期间释放GIL，
+    重绘大量环时主循环仍能按帧率处理输入和光标读数。
+
+    - add: 没有进行中的任务时直接叠加到前缓冲区（单个环代价很小）
+    - extend/remove/rebuild: 提交任务；extend/remove 以前缓冲区为底只重画受影响区域
+    - 新任务到来时进行中的旧任务在下一批环（CANCEL_BATCH 个，有进程池时每个进程各一份）之前放弃；
+      此时新任务总是整层重绘，因为前缓冲区已不代表最新的基础状态
+
+    环的增删和索引仍在主线程中完成，任务只携带要绘制的环信息快照。
+
+    参数:
+        on_ready: 可选回调，后台任务完成时在后台线程中调用（例如向事件队列投递事件唤醒主循环）
+        其余参数同 RingLayer
+    """
+
+    def __init__(self, width, height, ring_radius, ring_width, num_segments, oversample,
+                 pool=None, cell_size=64, on_ready=None):
+        self.on_ready = on_ready
+        self.front = CairoPygameBridge(width, height)
+        self.back = CairoPygameBridge(width, height)
+        # 已提交的任务编号、后台已完成的任务编号、待处理的任务
+        self._generation = 0
+        self._completed = 0
+        self._job = None
+        self._swap_pending = False
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="ring-render", daemon=True)
+        self._thread.start()
+        super().__init__(width, height, ring_radius, ring_width, num_segments, oversample,
+                         surface=self.front.cairo_surface, pool=pool, cell_size=cell_size)
+
+    @property
+    def busy(self):
+        """是否有尚未完成的任务（主线程在检查前先交换已完成的任务）"""
+        self._swap_ready()
+        return self._completed < self._generation
+
+    # ---------- 主线程接口 ----------
+    def add(self, ring_info):
+        if self.busy:
+            ring_id, _ = self._register(ring_info)
+            self.rebuild()
+            return ring_id
+        return super().add(ring_info)
+
+    def extend(self, rings):
+        ids, rings, bounds = [], list(rings), []
+        for ring_info in rings:
+            ring_id, rects = self._register(ring_info)
+            ids.append(ring_id)
+            bounds.append(rects)
+        self._submit(rings, bounds, clear_rects=[])
+        return ids
+
+    def redraw(self, rects):
+        ids = set()
+        for rect in rects:
+            ids |= self.index.query(rect)
+        ids = sorted(ids)
+        self._submit([self._rings[i] for i in ids], [self.index.rects(i) for i in ids], clear_rects=rects)
+
+    def rebuild(self):
+        ids = self.query((0, 0, self.width, self.height))
+        self._submit([self._rings[i] for i in ids], [self.index.rects(i) for i in ids])
+
+    def blit(self, target):
+        """后台任务完成时先交换前后缓冲区，再按预乘alpha贴前缓冲区"""
+        self._swap_ready()
+        return self.front.blit(target)
+
+    def wait(self, timeout=None):
+        """阻塞到当前任务全部完成（基准和测试用），返回是否完成"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._completed == self._generation, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _swap_ready(self):
+        """最新任务已画完时交换前后缓冲区；只在主线程调用"""
+        with self._cond:
+            if not self._swap_pending:
+                return
+            self.front, self.back = self.back, self.front
+            self.surface = self.front.cairo_surface
+            self._swap_pending = False
+
+    def _submit(self, rings, bounds, clear_rects=None):
+        """
+        提交一次后台重绘
+
+        参数:
+            clear_rects: None 表示清空整层重绘；列表表示以前缓冲区为底，只清空这些矩形再绘制
+        """
+        with self._cond:
+            self._swap_ready()
+            if self._completed < self._generation:
+                # 进行中的任务基于已过时的前缓冲区，改为整层重绘当前全部可见环
+                ids = self.query((0, 0, self.width, self.height))
+                rings = [self._rings[i] for i in ids]
+                bounds = [self.index.rects(i) for i in ids]
+                clear_rects = None
+            self._generation += 1
+            self._job = (self._generation, rings, bounds, clear_rects)
+            self._cond.notify_all()
+
+    # ---------- 后台线程 ----------
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._job is not None or self._closed)
+                if self._closed:
+                    return
+                job, self._job = self._job, None
+            try:
+                finished = self._render(*job)
+            except Exception as e:  # 后台线程中的异常不应让主循环停止等待
+                print(f"后台渲染环图层失败: {e}")
+                finished = True
+            if not finished:
+                continue
+            with self._cond:
+                current = job[0] == self._generation
+                if current:
+                    self._completed = job[0]
+                    self._swap_pending = True
+                    self._cond.notify_all()
+            if current and self.on_ready is not None:
+                self.on_ready()
+
+    def _render(self, generation, rings, bounds, clear_rects):
+        """
+        把任务画到后缓冲区
+
+        返回:
+            是否画完；有更新的任务提交时中途放弃并返回False
+        """
+        if clear_rects is not None:
+            # 前缓冲区在任务进行期间不会被主线程改动，可以安全地作为底图
+            self.back.buffer[:] = self.front.buffer
+            rects = clear_rects
+        else:
+            rects = [(0, 0, self.width, self.height)]
+        surface = self.back.cairo_surface
+        surface.mark_dirty()
+        ctx = cairo.Context(surface)
+        ctx.set_antialias(cairo.ANTIALIAS_BEST)
+        if rects:
+            self._clear_rects(ctx, rects)
+        batch = CANCEL_BATCH
+        if self.pool is not None and self.pool.parallel:
+            batch *= self.pool.workers
+        for i in range(0, len(rings), batch):
+            if generation != self._generation:
+                return False
+            self._draw_batch(ctx, rings[i:i + batch], bounds[i:i + batch])
+        surface.flush()
+        return generation == self._generation
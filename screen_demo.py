@@ -1,646 +1,928 @@
-import pygame
+import time
+
+_START_TIME = time.perf_counter()
+
+import argparse
+import math
 import sys
+
 import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-from matplotlib.cm import viridis
-import cairo
-
-# ========== 常量定义 ==========
-# 窗口设置
-WINDOW_WIDTH = 1600
-WINDOW_HEIGHT = 1200
-GRID_SIZE = 200
-MOVE_SPEED = 2
-
-# 导数环设置
-RING_RADIUS = 24
-RING_WIDTH = 10
-NUM_SEGMENTS = 360
-OVERSAMPLE = 1
-EPSILON = 1e-4
-
-# 颜色定义
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-
-# 复数函数公式
-FUNC_STR = "$f(z)=x+y+(x^2-y^2)i$"
-
-# ========== 函数定义 ==========
-def complex_function(z):
-    """定义要可视化的复数函数"""
-    x = np.real(z)
-    y = np.imag(z)
-    return x + y + (x**2 - y**2)*1j
-
-def numerical_derivative(z):
-    """使用数值微分计算复数函数在点z处的导数"""
-    dz_angles = np.linspace(0, 2 * np.pi, NUM_SEGMENTS, endpoint=False)
-    dzs = EPSILON * (np.cos(dz_angles) + 1j * np.sin(dz_angles))
-    dfs = complex_function(z + dzs) - complex_function(z)
-    return dz_angles, dfs / EPSILON
-
-def mouse2Z(mousex, mousey, origin_x, origin_y):
-    """屏幕坐标转复平面坐标"""
-    return complex((mousex - origin_x) / GRID_SIZE, 
-                  -(mousey - origin_y) / GRID_SIZE)
-
-def z2mouse(z, origin_x, origin_y):
-    """复平面坐标转屏幕坐标"""
-    return (int(z.real * GRID_SIZE) + origin_x, 
-            int(-z.imag * GRID_SIZE) + origin_y)
-
-def render_math_formula(formula, size=16):
-    """使用matplotlib渲染数学公式为Pygame表面"""
-    fig = Figure(figsize=(3, 1), dpi=150)
-    fig.patch.set_facecolor('black')
-    ax = fig.add_subplot(111)
-    ax.patch.set_facecolor('black')
-    ax.axis('off')
-    ax.text(1.1, 0.5, formula, fontsize=size, ha='right', 
-            va='center', color='white')
-    
-    canvas = FigureCanvasAgg(fig)
-    canvas.draw()
-    raw_data = bytes(canvas.get_renderer().buffer_rgba())
-    return pygame.image.fromstring(raw_data, canvas.get_width_height(), "RGBA")
+import pygame
+
+from engine import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE, MOVE_SPEED, ZOOM_STEP, TRAIL_MAX_STEP, TRAIL_TOLERANCE,
+    RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE, RENDER_WORKERS, LATTICE_SEGMENTS,
+    GRID_LINE_SPACING, GRID_SAMPLE_STEP, GRID_RAYS,
+    BLACK, WHITE, RED, YELLOW,
+    complex_function, derivative_summary, function_value, point_cache, ring_values, ring_lattice,
+)
+from domain_coloring import DomainColoringLayer
+from expression import ExpressionError, compile_expression
+from frame_profiler import FrameProfiler, ProfilerHUD
+from formula import cache_stats, clear_formula_cache, render_math_formula
+from parallel_render import RingRenderPool
+from recording import BREAK, KEY, POINT, REMOVE, RING, VIEW, Recorder, Recording, Replayer
+from resample import TrailResampler
+from ring_worker import BackgroundRingLayer
+from static_layer import StaticLayer
+from trails import TrailCanvas, TrailStore
+from viewport import Viewport
+from warped_grid import CIRCLE, HORIZONTAL, RAY, VERTICAL, WarpedGrid
+
+
+# 帧耗时统计的阶段，wait 为按需渲染时阻塞等待事件的时间，tick 为等待帧率的时间
+FRAME_STAGES = ("wait", "events", "domain", "background", "rings", "trails", "readout", "hud", "flip", "tick")
+
+# 跟踪模式下移动鼠标的按键
+MOVE_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+
+# 会改变轨迹、圆环或显示模式的按键，录制时写入文件；视图变化（含0键复位）单独按视图状态录制，
+# 只切换叠加网格的L/K键不影响回放的状态，不录制
+RECORDED_KEYS = (pygame.K_ESCAPE, pygame.K_c, pygame.K_BACKSPACE, pygame.K_f, pygame.K_g, pygame.K_p)
+
+# 变形网格各类网格线的颜色
+GRID_COLORS = {
+    HORIZONTAL: (0, 160, 255),  # Im z 为常数的水平线
+    VERTICAL: (255, 80, 200),   # Re z 为常数的竖直线
+    CIRCLE: (255, 150, 0),      # 以原点为中心的同心圆
+    RAY: (0, 220, 120),         # 从原点出发的射线
+}
+
+# 后台环图层重绘完成时投递的事件，按需渲染的主循环据此醒来交换缓冲区并重绘
+RINGS_READY = pygame.event.custom_type()
+
 
 # ========== 主程序初始化 ==========
 def init_pygame():
     """初始化Pygame环境"""
     pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), 
-                                   pygame.DOUBLEBUF | pygame.HWSURFACE)
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT),
+                                     pygame.DOUBLEBUF | pygame.HWSURFACE)
     pygame.display.set_caption("复数函数可视化")
     return screen
 
+
 def load_fonts():
     """加载中文字体"""
     try:
-        chinese_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 24)
-        small_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 20)
-    except:
+        chinese_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 24)  # 使用黑体
+        small_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 20)  # 小号字体
+    except Exception:
         print("无法加载中文字体，将使用系统默认字体")
         chinese_font = pygame.font.SysFont(None, 24)
         small_font = pygame.font.SysFont(None, 20)
     return chinese_font, small_font
 
-# 初始化pygame
-pygame.init()
-
-# 加载支持中文的字体
-try:
-    chinese_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 24)  # 使用黑体
-    small_chinese_font = pygame.font.Font("C:\\Windows\\Fonts\\simhei.ttf", 20)  # 小号字体
-except:
-    print("无法加载中文字体，将使用系统默认字体")
-    chinese_font = pygame.font.SysFont(None, 24)
-    small_chinese_font = pygame.font.SysFont(None, 20)
-
-# 创建窗口
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.DOUBLEBUF | pygame.HWSURFACE)
-pygame.display.set_caption("复数函数可视化")
-
-# 坐标轴原点(窗口中心)
-origin_x = WINDOW_WIDTH // 2
-origin_y = WINDOW_HEIGHT // 2
-
-# 跟踪模式标志和轨迹点列表
-tracking_mode = False
-mouse_trail = []
-function_trail = []
-# 新增标志，表示是否需要开始新的轨迹
-new_trail_segment = True
-
-# 导数模式标志
-derivative_mode = False
-
-# 存储当前显示的圆环信息列表
-ring_info_list = []
-
-# 初始化鼠标位置变量
-mouse_x, mouse_y = origin_x, origin_y
-
-# 在全局变量定义处添加
-cached_rings_surface = None  # 用于缓存所有环的Pygame表面
-needs_redraw = False  # 标记是否需要重新绘制环缓存
-
-# 使用数值微分计算导数（向量化版本）
-def numerical_derivative(z):
-    """使用数值微分计算复数函数在点z处的导数
-    返回一个列表，包含不同方向上的导数值
-    """
-    # 生成所有角度
-    dz_angles = np.linspace(0, 2 * np.pi, NUM_SEGMENTS, endpoint=False)
-    
-    # 计算所有方向的dz（向量化）
-    dzs = EPSILON * (np.cos(dz_angles) + 1j * np.sin(dz_angles))
-    
-    # 计算所有方向的函数值差异（向量化）
-    dfs = complex_function(z + dzs) - complex_function(z)
-    dfs = dfs / EPSILON
-    # 返回(角度, 导数值)的元组列表
-    return dz_angles, dfs
-
-# 坐标转换函数
-def mouse2Z(mousex, mousey):
-    """屏幕坐标转复平面坐标"""
-    return complex((mousex - origin_x) / GRID_SIZE, 
-                  -(mousey - origin_y) / GRID_SIZE)
-
-def z2mouse(z):
-    """复平面坐标转屏幕坐标"""
-    return (int(z.real * GRID_SIZE) + origin_x, 
-            int(-z.imag * GRID_SIZE) + origin_y)
-
-# 绘制函数
-def draw_coordinate_system():
-    """绘制坐标系"""
-    # 绘制坐标轴
-    pygame.draw.line(screen, RED, (0, origin_y), (WINDOW_WIDTH, origin_y), 2)  # x轴
-    pygame.draw.line(screen, RED, (origin_x, 0), (origin_x, WINDOW_HEIGHT), 2)  # y轴
-    
-    # 绘制刻度
-    for x in range(0, WINDOW_WIDTH, GRID_SIZE):
-        pygame.draw.line(screen, WHITE, (x, origin_y-5), (x, origin_y+5), 1)
-        # 添加刻度值
-        if x != origin_x:  # 不在原点绘制0
-            value = (x - origin_x) / GRID_SIZE
-            text = small_chinese_font.render(f"{value:.1f}", True, WHITE)
-            screen.blit(text, (x - 10, origin_y + 10))
-    
-    for y in range(0, WINDOW_HEIGHT, GRID_SIZE):
-        pygame.draw.line(screen, WHITE, (origin_x-5, y), (origin_x+5, y), 1)
-        # 添加刻度值
-        if y != origin_y:  # 不在原点绘制0
-            value = -(y - origin_y) / GRID_SIZE
-            text = small_chinese_font.render(f"{value:.1f}", True, WHITE)
-            screen.blit(text, (origin_x + 10, y - 10))
-
-def draw_trails():
-    """绘制鼠标和函数轨迹"""
-    # 绘制鼠标轨迹（红色）
-    if len(mouse_trail) > 1:
-        # 分段绘制轨迹
-        segment = []
-        for point in mouse_trail:
-            if point is None:
-                # 遇到None时，绘制当前段并重新开始
-                if len(segment) > 1:
-                    pygame.draw.lines(screen, RED, False, segment, 2)
-                segment = []
-            else:
-                segment.append(point)
-        # 绘制最后一段
-        if len(segment) > 1:
-            pygame.draw.lines(screen, RED, False, segment, 2)
-    
-    # 绘制函数值轨迹（黄色）
-    if len(function_trail) > 1:
-        # 分段绘制轨迹
-        segment = []
-        for point in function_trail:
-            if point is None:
-                # 遇到None时，绘制当前段并重新开始
-                if len(segment) > 1:
-                    pygame.draw.lines(screen, YELLOW, False, segment, 2)
-                segment = []
-            else:
-                segment.append(point)
-        # 绘制最后一段
-        if len(segment) > 1:
-            pygame.draw.lines(screen, YELLOW, False, segment, 2)
-
-def update_function_point(mouse_pos):
-    """根据鼠标位置更新函数点"""
-    global mouse_trail, function_trail
-    
-    # 将鼠标位置转换为复平面坐标
-    z = mouse2Z(*mouse_pos)
-    
-    # 计算函数值
-    f_z = complex_function(z)
-    
-    # 将函数值转换回屏幕坐标
-    f_pos = z2mouse(f_z)
-    
-    # 添加到轨迹
-    mouse_trail.append(mouse_pos)
-    function_trail.append(f_pos)
-    
-    return f_pos
-
-# 显示当前坐标信息
-def show_coordinates(pos, z_value, show_derivative=False):
-    """显示当前坐标信息"""
-    text = chinese_font.render(f"位置: ({z_value.real:.2f}, {z_value.imag:.2f}i)", True, WHITE)
-    screen.blit(text, (10, 10))
-    
-    # 显示函数值
-    f_z = complex_function(z_value)
-    text = chinese_font.render(f"函数值: ({f_z.real:.2f}, {f_z.imag:.2f}i)", True, YELLOW)
-    screen.blit(text, (10, 40))
-
-# 创建数学公式渲染函数
-def render_math_formula(formula, size=16):
-    """使用matplotlib渲染数学公式"""
-    # 创建一个matplotlib图形
-    fig = Figure(figsize=(3, 1), dpi=150)
-    # 设置图形背景为黑色
-    fig.patch.set_facecolor('black')
-    ax = fig.add_subplot(111)
-    
-    # 设置坐标区域背景为黑色
-    ax.patch.set_facecolor('black')
-    ax.axis('off')
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    
-    # 渲染公式，使用白色文本
-    ax.text(1.1, 0.5, formula, fontsize=size, ha='right', va='center', color='white')
-    
-    # 将图形转换为pygame表面
-    canvas = FigureCanvasAgg(fig)
-    canvas.draw()
-    renderer = canvas.get_renderer()
-    # 使用buffer_rgba代替已弃用的tostring_rgb
-    raw_data = renderer.buffer_rgba()
-    # 将memoryview对象转换为bytes对象
-    raw_data = bytes(raw_data)
-    size = canvas.get_width_height()
-    
-    # 创建pygame表面，注意使用RGBA格式而不是RGB
-    surf = pygame.image.fromstring(raw_data, size, "RGBA")
-    return surf
-
-# 渲染数学公式
-formula_surface = render_math_formula(FUNC_STR)
-
-# 修改环绘制函数为接受上下文的形式
-def draw_dz_ring_on_context(ctx, x, y):
-    """
-    在给定的Cairo上下文中绘制dz环(输入环)
-    
-    参数:
-        ctx: Cairo绘图上下文
-        x, y: 环中心屏幕坐标
-    """
-    # 设置高质量抗锯齿
-    ctx.set_antialias(cairo.ANTIALIAS_BEST)
-    
-    # 增加采样点以获得更平滑的环
-    num_render_segments = NUM_SEGMENTS * OVERSAMPLE
-    
-    # 绘制平滑圆环
-    for i in range(num_render_segments):
-        # 计算当前段的角度和下一段角度
-        angle = 2 * np.pi * i / num_render_segments
-        next_angle = 2 * np.pi * (i + 1) / num_render_segments
-        
-        # 映射到原始段以获取颜色
-        orig_angle_idx = int((i * NUM_SEGMENTS) / num_render_segments)
-        color_val = orig_angle_idx / NUM_SEGMENTS
-        r, g, b, _ = viridis(color_val)
-        
-        # 创建路径
-        ctx.new_path()
-        
-        # 内环点
-        inner_radius = RING_RADIUS - RING_WIDTH/2
-        outer_radius = RING_RADIUS + RING_WIDTH/2
-        
-        # 绘制扇形路径
-        ctx.arc(x, y, inner_radius, angle, next_angle)
-        ctx.arc_negative(x, y, outer_radius, next_angle, angle)
-        ctx.close_path()
-        
-        # 设置颜色并填充
-        ctx.set_source_rgb(r, g, b)
-        ctx.fill_preserve()
-        
-        # 添加细微边缘以增强视觉效果
-        ctx.set_line_width(0.5)
-        ctx.set_source_rgba(r, g, b, 0.8)
-        ctx.stroke()
-
-def draw_df_ring_on_context(ctx, x, y, dz_angles, dfs):
+
+class ScreenDemo:
     """
-    在给定的Cairo上下文中绘制df环(输出环)
-    
+    交互式复数函数可视化：窗口、界面状态与主循环
+
     参数:
-        ctx: Cairo绘图上下文
-        x, y: 环中心屏幕坐标
-        dz_angles: 导数角度数组
-        dfs: 导数值数组
+        func: 编译后的复数函数（见 expression.py），默认为 engine.complex_function
+        profile_csv: 可选，逐帧写入各阶段耗时的CSV路径
+        idle: 是否按需渲染；为False时每秒固定重绘60帧
+        recorder: 可选的 recording.Recorder，录制轨迹采样、分段、圆环、按键和视图
+        replayer: 可选的 recording.Replayer，把录制的操作送回同一处理流程
     """
-    # 设置高质量抗锯齿
-    ctx.set_antialias(cairo.ANTIALIAS_BEST)
-    
-    # 计算每个角度对应的导数模值
-    df_abs_values = np.array([abs(df) for df in dfs])
-    
-    # 创建平滑插值版本的半径
-    smooth_angles = np.linspace(0, 2*np.pi, NUM_SEGMENTS*OVERSAMPLE, endpoint=False)
-    
-    # 扩展角度和模值数组以确保环形闭合
-    angles_ext = np.append(dz_angles, dz_angles[0] + 2*np.pi)
-    df_abs_ext = np.append(df_abs_values, df_abs_values[0])
-    
-    # 对每一段绘制扇形
-    for i in range(len(smooth_angles)):
-        idx = i
-        next_idx = (i + 1) % len(smooth_angles)
-        
-        # 计算当前角度和下一个角度
-        angle = smooth_angles[idx]
-        next_angle = smooth_angles[next_idx]
-        
-        # 使用插值计算当前角度和下一个角度的半径
-        # 找到最近的两个采样点
-        idx_orig = np.searchsorted(angles_ext, angle) - 1
-        idx_orig = max(0, min(idx_orig, len(angles_ext)-2))
-        next_idx_orig = np.searchsorted(angles_ext, next_angle) - 1
-        next_idx_orig = max(0, min(next_idx_orig, len(angles_ext)-2))
-        
-        # 线性插值计算半径
-        t1 = (angle - angles_ext[idx_orig]) / (angles_ext[idx_orig+1] - angles_ext[idx_orig])
-        radius = df_abs_ext[idx_orig] + t1 * (df_abs_ext[idx_orig+1] - df_abs_ext[idx_orig])
-        
-        t2 = (next_angle - angles_ext[next_idx_orig]) / (angles_ext[next_idx_orig+1] - angles_ext[next_idx_orig])
-        next_radius = df_abs_ext[next_idx_orig] + t2 * (df_abs_ext[next_idx_orig+1] - df_abs_ext[next_idx_orig])
-        
-        # 缩放半径
-        radius = RING_RADIUS * radius
-        next_radius = RING_RADIUS * next_radius
-        
-        # 确定颜色（与dz环保持一致的颜色映射）
-        orig_angle_idx = int((i * NUM_SEGMENTS) / (NUM_SEGMENTS * OVERSAMPLE))
-        color_val = (dz_angles[orig_angle_idx] % (2 * np.pi)) / (2 * np.pi)
-        r, g, b, _ = viridis(color_val)
-        
-        # 创建新路径
-        ctx.new_path()
-        
-        # 确定内外半径
-        inner_radius1 = max(0, radius - RING_WIDTH/2)
-        outer_radius1 = radius + RING_WIDTH/2
-        inner_radius2 = max(0, next_radius - RING_WIDTH/2)
-        outer_radius2 = next_radius + RING_WIDTH/2
-        
-        # 计算内外环上的点坐标
-        inner_x1 = x + inner_radius1 * np.cos(angle)
-        inner_y1 = y - inner_radius1 * np.sin(angle)
-        inner_x2 = x + inner_radius2 * np.cos(next_angle)
-        inner_y2 = y - inner_radius2 * np.sin(next_angle)
-        
-        outer_x1 = x + outer_radius1 * np.cos(angle)
-        outer_y1 = y - outer_radius1 * np.sin(angle)
-        outer_x2 = x + outer_radius2 * np.cos(next_angle)
-        outer_y2 = y - outer_radius2 * np.sin(next_angle)
-        
-        # 绘制扇形路径
-        ctx.move_to(inner_x1, inner_y1)
-        ctx.line_to(inner_x2, inner_y2)
-        ctx.line_to(outer_x2, outer_y2)
-        ctx.line_to(outer_x1, outer_y1)
-        ctx.close_path()
-        
-        # 设置颜色并填充
-        ctx.set_source_rgb(r, g, b)
-        ctx.fill_preserve()
-        
-        # 添加细微边缘以增强视觉效果
-        ctx.set_line_width(0.5)
-        ctx.set_source_rgba(r, g, b, 0.8)
-        ctx.stroke()
-
-# 主循环
-running = True
-clock = pygame.time.Clock()
-while running:
-    # 填充黑色背景
-    screen.fill(BLACK)
-    
-    # 绘制坐标系
-    draw_coordinate_system()
-    
-    # 显示函数公式 - 始终只显示原始函数公式
-    screen.blit(formula_surface, (WINDOW_WIDTH - formula_surface.get_width() - 20, 20))
-    
-    # 绘制导数模式下的彩色圆环
-    if derivative_mode:
-        # 显示鼠标
-        pygame.mouse.set_visible(True)
-        
-        # 获取鼠标位置
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        
-        # 在鼠标位置绘制红色圆点
-        pygame.draw.circle(screen, RED, (mouse_x, mouse_y), 5)
-        
-        # 显示当前坐标信息（包括导数）
-        show_coordinates((mouse_x, mouse_y), mouse2Z(mouse_x, mouse_y), True)
-        
-        # 检查是否需要重新绘制环缓存
-        if needs_redraw or cached_rings_surface is None:
-            # 创建新的透明Cairo表面
-            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WINDOW_WIDTH, WINDOW_HEIGHT)
-            ctx = cairo.Context(surface)
-            ctx.set_antialias(cairo.ANTIALIAS_BEST)
-            
-            # 先填充透明背景
-            ctx.set_source_rgba(0, 0, 0, 0)  # 完全透明
-            ctx.paint()
-            
-            # 如果有环需要绘制
-            if ring_info_list:
-                # 绘制所有环
-                for ring_info in ring_info_list:
-                    input_pos, output_pos, dz_angles, dfs = ring_info
-                    draw_dz_ring_on_context(ctx, *input_pos)
-                    draw_df_ring_on_context(ctx, *output_pos, dz_angles, dfs)
-            
-            # 转换为Pygame表面
-            surface.flush()
-            buf = surface.get_data()
-            arr = np.ndarray(shape=(WINDOW_HEIGHT, WINDOW_WIDTH, 4), 
-                           dtype=np.uint8, 
-                           buffer=buf)
-            arr = arr[:, :, [2, 1, 0, 3]]  # BGRA to RGBA
-            
-            cached_rings_surface = pygame.image.frombuffer(
-                arr.tobytes(), (WINDOW_WIDTH, WINDOW_HEIGHT), "RGBA"
-            )
-            needs_redraw = False
-        
-        # 绘制缓存表面
-        if cached_rings_surface is not None:
-            screen.blit(cached_rings_surface, (0, 0))
-    # 如果在跟踪模式下
-    elif tracking_mode:
-        # 隐藏鼠标
-        pygame.mouse.set_visible(False)
-        
-        # 处理键盘按键状态
-        keys = pygame.key.get_pressed()
-        
-        # 保存旧的鼠标位置，用于检测是否有移动
-        old_mouse_x, old_mouse_y = mouse_x, mouse_y
-        
-        # 根据按键更新鼠标位置
-        if keys[pygame.K_w]:  # 上
-            mouse_y -= MOVE_SPEED
-        if keys[pygame.K_s]:  # 下
-            mouse_y += MOVE_SPEED
-        if keys[pygame.K_a]:  # 左
-            mouse_x -= MOVE_SPEED
-        if keys[pygame.K_d]:  # 右
-            mouse_x += MOVE_SPEED
-            
-        # 确保鼠标位置不超出窗口范围
-        mouse_x = max(0, min(WINDOW_WIDTH, mouse_x))
-        mouse_y = max(0, min(WINDOW_HEIGHT, mouse_y))
-        
-        # 如果鼠标位置有变化，则更新轨迹
-        if old_mouse_x != mouse_x or old_mouse_y != mouse_y:
-            # 设置鼠标位置
-            pygame.mouse.set_pos(mouse_x, mouse_y)
-            
-            # 更新函数点
-            f_pos = update_function_point((mouse_x, mouse_y))
-            
-            # 在当前鼠标位置绘制红色圆点
-            pygame.draw.circle(screen, RED, (mouse_x, mouse_y), 5)
-            
-            # 在函数值位置绘制黄色圆点
-            pygame.draw.circle(screen, YELLOW, f_pos, 5)
-        
-        # 绘制轨迹
-        draw_trails()
-        
-        # 显示当前坐标信息
-        show_coordinates((mouse_x, mouse_y), mouse2Z(mouse_x, mouse_y))
-    else:
-        # 显示鼠标
-        pygame.mouse.set_visible(True)
-        
+
+    def __init__(self, func=None, profile_csv=None, idle=True, recorder=None, replayer=None):
+        self.func = func if func is not None else complex_function
+        self.idle = idle
+        self.recorder = recorder
+        self.replayer = replayer
+        # 回放结束后是否退出主循环（用于基准）
+        self.exit_after_replay = False
+        # 帧率上限，0 表示不限制（尽快回放时使用）
+        self.max_fps = 0 if replayer is not None and not replayer.realtime else 60
+        self.screen = init_pygame()
+        self.chinese_font, self.small_chinese_font = load_fonts()
+
+        # 视图：初始时坐标轴原点在窗口中心；滚轮缩放，中键拖动平移
+        self.viewport = Viewport(WINDOW_WIDTH, WINDOW_HEIGHT, GRID_SIZE)
+        self.view_key = self.viewport.key
+        self.panning = False
+        # 最近录制的视图，录制开始时先写入初始视图
+        self.recorded_view = None
+        self.record_view()
+
+        # 跟踪模式标志和轨迹点列表；轨迹保存复平面坐标z和函数值f(z)，绘制时再投影到屏幕
+        self.tracking_mode = False
+        self.mouse_trail = TrailStore(item_shape=(), dtype=complex)
+        self.function_trail = TrailStore(item_shape=(), dtype=complex)
+        # 原始采样先自适应细分、再抽稀后存入两条轨迹
+        self.trail_resampler = TrailResampler(self.mouse_trail, self.function_trail,
+                                              TRAIL_MAX_STEP, TRAIL_TOLERANCE)
+        # 新增标志，表示是否需要开始新的轨迹
+        self.new_trail_segment = True
+        # 本帧累积、尚未计算的鼠标移动采样，以及本帧要标出的最新鼠标/函数值位置
+        self.motion_samples = []
+        self.motion_dots = None
+        # 持久化的轨迹画布，每帧只绘制新增的点
+        self.trail_canvas = TrailCanvas((WINDOW_WIDTH, WINDOW_HEIGHT),
+                                        [(self.mouse_trail, RED), (self.function_trail, YELLOW)],
+                                        project=self.viewport.to_screen)
+
+        # 导数模式标志；环阵列模式下环图层被规则的环阵列铺满
+        self.derivative_mode = False
+        self.lattice_mode = False
+
+        # 导数环图层：持久保存所有圆环，新增/删除时只重绘受影响区域
+        # 重绘在后台线程中画到后缓冲区，主循环只贴已完成的前缓冲区；完成时投递事件唤醒主循环
+        self.ring_pool = RingRenderPool(RENDER_WORKERS)
+        self.ring_layer = BackgroundRingLayer(WINDOW_WIDTH, WINDOW_HEIGHT,
+                                              RING_RADIUS, RING_WIDTH, NUM_SEGMENTS, OVERSAMPLE,
+                                              pool=self.ring_pool,
+                                              on_ready=lambda: pygame.event.post(pygame.event.Event(RINGS_READY)))
+        # 环编号 -> 环心z和函数值f(z)，视图变化时据此重新投影；右键选中的环编号
+        self.ring_points = {}
+        self.selected_ring = None
+
+        # 初始化鼠标位置变量
+        self.mouse_x, self.mouse_y = self.viewport.origin_x, self.viewport.origin_y
+
+        # 渲染数学公式；背景图层只在网格大小、原点或窗口尺寸变化时重建
+        self.formula_surface = render_math_formula(self.func.latex)
+        self.background_layer = StaticLayer(self.build_background)
+
+        # 变形网格叠加层：L键切换直角网格、K键切换极坐标网格，画在背景图层中，视图变化时重建
+        self.warped_grid = WarpedGrid(GRID_LINE_SPACING, GRID_SAMPLE_STEP, GRID_RAYS)
+        self.show_grid = False
+        self.show_polar_grid = False
+
+        # 域着色模式标志和分块细化的域着色图层
+        self.domain_mode = False
+        self.domain_layer = DomainColoringLayer((WINDOW_WIDTH, WINDOW_HEIGHT), self.func)
+
+        # 逐阶段帧耗时统计，F3键显示叠加层；可选逐帧写入CSV
+        self.profiler = FrameProfiler(FRAME_STAGES, csv_path=profile_csv, idle_stages=("wait", "tick"))
+        self.profiler_hud = ProfilerHUD(self.profiler, self.small_chinese_font)
+        self.show_profiler = False
+
+        # 按需渲染：场景快照（不含鼠标圆点和坐标信息），只有鼠标移动时据此恢复脏矩形
+        self.scene_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert() if idle else None
+        self.overlay_rects = None
+
+        self.running = True
+        self.clock = pygame.time.Clock()
+
+    # ---------- 坐标转换 ----------
+    def mouse2Z(self, mousex, mousey):
+        """屏幕坐标转复平面坐标"""
+        return self.viewport.point_to_complex(mousex, mousey)
+
+    def z2mouse(self, z):
+        """复平面坐标转屏幕坐标"""
+        return self.viewport.point_to_screen(z)
+
+    # ---------- 绘制函数 ----------
+    def draw_coordinate_system(self, surface):
+        """绘制坐标系，刻度间隔随缩放自动选取"""
+        width, height = surface.get_size()
+        viewport = self.viewport
+        origin_x, origin_y = viewport.origin_x, viewport.origin_y
+
+        # 绘制坐标轴
+        pygame.draw.line(surface, RED, (0, origin_y), (width, origin_y), 2)  # x轴
+        pygame.draw.line(surface, RED, (origin_x, 0), (origin_x, height), 2)  # y轴
+
+        # 刻度取 1、2、5 乘以10的幂，小数位数随间隔增加
+        step = viewport.tick_step()
+        decimals = max(1, -math.floor(math.log10(step)))
+        x_min, x_max, y_min, y_max = viewport.visible_range()
+
+        # 绘制刻度
+        for k in range(math.ceil(x_min / step), math.floor(x_max / step) + 1):
+            x = round(origin_x + k * step * viewport.scale)
+            pygame.draw.line(surface, WHITE, (x, origin_y-5), (x, origin_y+5), 1)
+            # 添加刻度值
+            if k != 0:  # 不在原点绘制0
+                text = self.small_chinese_font.render(f"{k * step:.{decimals}f}", True, WHITE)
+                surface.blit(text, (x - 10, origin_y + 10))
+
+        for k in range(math.ceil(y_min / step), math.floor(y_max / step) + 1):
+            y = round(origin_y - k * step * viewport.scale)
+            pygame.draw.line(surface, WHITE, (origin_x-5, y), (origin_x+5, y), 1)
+            # 添加刻度值
+            if k != 0:  # 不在原点绘制0
+                text = self.small_chinese_font.render(f"{k * step:.{decimals}f}", True, WHITE)
+                surface.blit(text, (origin_x + 10, y - 10))
+
+    def background_key(self):
+        """背景图层的键值：视图和变形网格的显示状态"""
+        return (self.viewport.key, self.show_grid, self.show_polar_grid)
+
+    def build_background(self, surface):
+        """绘制静态背景：黑色底色、坐标系和函数公式"""
+        surface.fill(BLACK)
+        self.draw_coordinate_system(surface)
+        if self.show_grid or self.show_polar_grid:
+            self.warped_grid.draw(surface, self.func, self.viewport, GRID_COLORS,
+                                  self.show_grid, self.show_polar_grid)
+        # 显示函数公式 - 始终只显示原始函数公式
+        surface.blit(self.formula_surface,
+                     (surface.get_width() - self.formula_surface.get_width() - 20, 20))
+
+    def draw_trails(self):
+        """绘制鼠标轨迹（红色）和函数值轨迹（黄色），只增量绘制新增的点"""
+        self.trail_canvas.update(self.viewport.key)
+        self.trail_canvas.blit(self.screen)
+
+    def clear_trails(self):
+        """清除所有轨迹"""
+        self.mouse_trail.clear()
+        self.function_trail.clear()
+        self.trail_resampler.reset()
+
+    def break_trails(self):
+        """结束当前轨迹段，之后的点属于新的一段"""
+        self.mouse_trail.break_segment()
+        self.function_trail.break_segment()
+        self.trail_resampler.reset()
+        if self.recorder is not None:
+            self.recorder.break_segment()
+
+    def toggle_ring_lattice(self):
+        """切换环阵列模式：一次批量计算覆盖整个视口的环阵列并加入环图层"""
+        self.lattice_mode = not self.lattice_mode
+        self.clear_rings()
+        if not self.lattice_mode:
+            return
+        if not self.derivative_mode:
+            self.derivative_mode = True
+            self.tracking_mode = False
+            self.clear_trails()
+        viewport = self.viewport
+        positions = ring_lattice(WINDOW_WIDTH, WINDOW_HEIGHT, viewport.origin_x, viewport.origin_y)
+        self.add_rings(viewport.to_complex(positions), LATTICE_SEGMENTS)
+
+    # ---------- 导数环 ----------
+    def project_rings(self, zs, fs, derivatives):
+        """
+        把环心z、函数值f(z)一次向量化投影到屏幕，组装为 ring_info 列表
+
+        参数:
+            derivatives: 每个环的 (dz_angles, dfs)，各环的分段数可以不同
+        """
+        inputs = self.viewport.to_screen(zs).tolist()
+        outputs = self.viewport.to_screen(fs).tolist()
+        return [(tuple(p), tuple(q), dz_angles, ring_dfs)
+                for p, q, (dz_angles, ring_dfs) in zip(inputs, outputs, derivatives)]
+
+    def add_rings(self, zs, num_segments=NUM_SEGMENTS):
+        """在复平面点zs处批量添加导数环（单个环只重绘自身包围盒）"""
+        zs = np.asarray(zs, dtype=complex).reshape(-1)
+        if not zs.size:
+            return
+        fs, dz_angles, dfs = ring_values(zs, self.func, self.viewport.scale, num_segments)
+        rings = self.project_rings(zs, fs, [(dz_angles, ring_dfs) for ring_dfs in dfs])
+        if len(rings) == 1:
+            ids = [self.ring_layer.add(rings[0])]
+        else:
+            ids = self.ring_layer.extend(rings)
+        self.ring_points.update(zip(ids, zip(zs.tolist(), fs.tolist())))
+
+    def remove_ring(self, ring_id):
+        """删除一个环，只重绘与它相交的环"""
+        self.ring_layer.remove(ring_id)
+        del self.ring_points[ring_id]
+        if self.selected_ring == ring_id:
+            self.selected_ring = None
+
+    def delete_ring(self, ring_id):
+        """交互删除：按环心z录制（编号不跨会话保持），再删除"""
+        if self.recorder is not None:
+            self.recorder.remove_ring(self.ring_points[ring_id][0])
+        self.remove_ring(ring_id)
+
+    def remove_ring_at(self, z):
+        """删除环心为z的环（回放删除记录时使用）"""
+        for ring_id, (ring_z, _) in self.ring_points.items():
+            if ring_z == z:
+                self.remove_ring(ring_id)
+                return
+
+    def clear_rings(self):
+        self.ring_layer.clear()
+        self.ring_points = {}
+        self.selected_ring = None
+
+    def reproject_rings(self):
+        """视图变化后按保存的z和f(z)重新投影全部环，不重新计算函数值和导数"""
+        rings = self.ring_layer.rings
+        if not rings:
+            return
+        zs, fs = zip(*(self.ring_points[ring_id] for ring_id in self.ring_layer.ids))
+        # 只更新位置和空间索引，整层重绘时跳过视图外的环
+        self.ring_layer.reposition(self.project_rings(zs, fs, [ring_info[2:] for ring_info in rings]))
+        self.ring_layer.rebuild()
+
+    def pick_ring(self, pos):
+        """
+        返回:
+            屏幕位置pos处最上层环的编号（点中输入环或输出环均可），没有时返回None
+        """
+        return self.ring_layer.hit_test(*pos)
+
+    def draw_selected_ring(self):
+        """为选中的环描出输入环和输出环的轮廓，并在左下角显示它的数值"""
+        if self.selected_ring is None:
+            return
+        ring_info = self.ring_layer.get(self.selected_ring)
+        input_pos, output_pos = ring_info[:2]
+        dz_extent, df_extent = self.ring_layer.ring_extents(ring_info)
+        pygame.draw.circle(self.screen, WHITE, input_pos, dz_extent + 3, 2)
+        pygame.draw.circle(self.screen, WHITE, output_pos, df_extent + 3, 2)
+
+        z, f_z = self.ring_points[self.selected_ring]
+        df_dz, residual, relative = derivative_summary(z, self.func, self.viewport.scale)
+        lines = [f"选中环心: ({z.real:.3f}, {z.imag:.3f}i)",
+                 f"函数值: ({f_z.real:.3f}, {f_z.imag:.3f}i)",
+                 f"导数: ({df_dz.real:.3f}, {df_dz.imag:.3f}i)  |f'| = {abs(df_dz):.3f}",
+                 f"C-R残差: {residual:.2e} ({relative:.0%})"]
+        for i, line in enumerate(lines):
+            text = self.small_chinese_font.render(line, True, WHITE)
+            self.screen.blit(text, (10, WINDOW_HEIGHT - 24 * (len(lines) - i) - 10))
+
+    def record_view(self):
+        """视图与上次录制的不同时录制当前视图，保证之后的按键和圆环按正确的视图回放"""
+        if self.recorder is not None and self.viewport.key != self.recorded_view:
+            self.recorded_view = self.viewport.key
+            self.recorder.view(*self.recorded_view)
+
+    def on_view_changed(self):
+        """平移或缩放后重新投影已有内容；背景、域着色和轨迹画布按视图键自行重建"""
+        self.view_key = self.viewport.key
+        self.reproject_rings()
+
+    # ---------- 轨迹 ----------
+    def add_trail_points(self, zs, fs=None):
+        """
+        把复平面点zs及其函数值追加到轨迹
+
+        从上一个采样起自适应细分，使函数值轨迹每步不超过 TRAIL_MAX_STEP 像素，
+        再把两条轨迹各自按 TRAIL_TOLERANCE 像素抽稀后存储。录制的仍是原始采样。
+
+        参数:
+            fs: 已算好的函数值，为None时一次向量化计算
+        返回:
+            原始采样的函数值数组
+        """
+        zs = np.asarray(zs, dtype=complex).reshape(-1)
+        if fs is None:
+            fs = self.func(zs)
+        fs = np.asarray(fs, dtype=complex).reshape(-1)
+        if self.recorder is not None:
+            self.recorder.points(zs)
+        self.trail_resampler.extend(zs, fs, self.func, self.viewport.scale)
+        return fs
+
+    def update_function_point(self, mouse_pos):
+        """根据鼠标位置更新函数点"""
+        # 将鼠标位置转换为复平面坐标
+        z = self.mouse2Z(*mouse_pos)
+
+        # 计算函数值（经缓存）并添加到轨迹
+        f_z = function_value(z, self.func, self.viewport.scale)
+        self.add_trail_points([z], [f_z])
+
+        # 转换回屏幕坐标
+        return self.z2mouse(f_z)
+
+    def update_function_points(self, mouse_positions):
+        """批量更新函数点：一帧内的所有鼠标采样只做一次向量化计算"""
+        zs = self.viewport.to_complex(mouse_positions)
+        return self.viewport.to_screen(self.add_trail_points(zs))
+
+    def flush_motion_samples(self):
+        """处理本帧累积的鼠标移动采样"""
+        if not self.motion_samples:
+            return
+        f_positions = self.update_function_points(self.motion_samples)
+
+        # 记录最后的鼠标位置和函数值位置，绘制完本帧后标出圆点
+        self.motion_dots = (self.motion_samples[-1], f_positions[-1].tolist())
+        self.motion_samples.clear()
+
+    def show_coordinates(self, pos, z_value, show_derivative=False):
+        """
+        显示当前坐标信息
+
+        返回:
+            各行文字覆盖的矩形列表
+        """
+        with self.profiler.stage("readout"):
+            rects = []
+            text = self.chinese_font.render(f"位置: ({z_value.real:.2f}, {z_value.imag:.2f}i)", True, WHITE)
+            rects.append(self.screen.blit(text, (10, 10)))
+
+            # 显示函数值（鼠标静止时直接命中缓存）
+            f_z = function_value(z_value, self.func, self.viewport.scale)
+            text = self.chinese_font.render(f"函数值: ({f_z.real:.2f}, {f_z.imag:.2f}i)", True, YELLOW)
+            rects.append(self.screen.blit(text, (10, 40)))
+
+            if show_derivative:
+                # 显示复导数 ∂f/∂z 和柯西-黎曼残差 |∂f/∂z̄|，残差为0表示函数在该点全纯
+                df_dz, residual, relative = derivative_summary(z_value, self.func, self.viewport.scale)
+                text = self.chinese_font.render(f"导数: ({df_dz.real:.2f}, {df_dz.imag:.2f}i)", True, WHITE)
+                rects.append(self.screen.blit(text, (10, 70)))
+                text = self.chinese_font.render(f"C-R残差: {residual:.2e} ({relative:.0%})", True, WHITE)
+                rects.append(self.screen.blit(text, (10, 100)))
+            return rects
+
+    # ---------- 每帧绘制 ----------
+    def draw_frame(self):
+        screen = self.screen
+        view_key = self.viewport.key
+        stage = self.profiler.stage
+        if self.domain_mode:
+            # 域着色模式：逐步细化全平面着色，再以加法混合叠加坐标系
+            with stage("domain"):
+                self.domain_layer.update(*view_key)
+                self.domain_layer.blit(screen)
+            with stage("background"):
+                self.background_layer.blit(screen, self.background_key(), special_flags=pygame.BLEND_RGB_ADD)
+        else:
+            # 绘制缓存的背景（底色、坐标系和公式），一次贴图
+            with stage("background"):
+                self.background_layer.blit(screen, self.background_key())
+
+        # 绘制导数模式下的彩色圆环
+        if self.derivative_mode:
+            # 显示鼠标
+            pygame.mouse.set_visible(True)
+
+            with stage("rings"):
+                # 按预乘alpha绘制环图层；后台重绘完成时先交换前后缓冲区
+                self.ring_layer.blit(screen)
+                self.draw_selected_ring()
+
+            # 在鼠标位置绘制红色圆点，显示当前坐标信息（包括导数）
+            self.snapshot_scene()
+            self.draw_cursor_overlay(True)
+        # 如果在跟踪模式下
+        elif self.tracking_mode:
+            # 隐藏鼠标；轨迹每帧都在变化，不使用局部更新
+            pygame.mouse.set_visible(False)
+            self.overlay_rects = None
+
+            # 处理键盘按键状态
+            keys = pygame.key.get_pressed()
+
+            # 保存旧的鼠标位置，用于检测是否有移动
+            old_mouse_x, old_mouse_y = self.mouse_x, self.mouse_y
+
+            # 根据按键更新鼠标位置
+            if keys[pygame.K_w]:  # 上
+                self.mouse_y -= MOVE_SPEED
+            if keys[pygame.K_s]:  # 下
+                self.mouse_y += MOVE_SPEED
+            if keys[pygame.K_a]:  # 左
+                self.mouse_x -= MOVE_SPEED
+            if keys[pygame.K_d]:  # 右
+                self.mouse_x += MOVE_SPEED
+
+            # 确保鼠标位置不超出窗口范围
+            self.mouse_x = max(0, min(WINDOW_WIDTH, self.mouse_x))
+            self.mouse_y = max(0, min(WINDOW_HEIGHT, self.mouse_y))
+
+            # 如果鼠标位置有变化，则更新轨迹
+            if old_mouse_x != self.mouse_x or old_mouse_y != self.mouse_y:
+                # 设置鼠标位置
+                pygame.mouse.set_pos(self.mouse_x, self.mouse_y)
+
+                # 更新函数点
+                f_pos = self.update_function_point((self.mouse_x, self.mouse_y))
+
+                # 在当前鼠标位置绘制红色圆点
+                pygame.draw.circle(screen, RED, (self.mouse_x, self.mouse_y), 5)
+
+                # 在函数值位置绘制黄色圆点
+                pygame.draw.circle(screen, YELLOW, f_pos, 5)
+
+            # 绘制轨迹
+            with stage("trails"):
+                self.draw_trails()
+
+            # 显示当前坐标信息
+            self.show_coordinates((self.mouse_x, self.mouse_y),
+                                  self.mouse2Z(self.mouse_x, self.mouse_y))
+        else:
+            # 显示鼠标
+            pygame.mouse.set_visible(True)
+
+            # 在鼠标位置绘制红色圆点，显示当前坐标信息
+            self.snapshot_scene()
+            self.draw_cursor_overlay()
+
+    def snapshot_scene(self):
+        """按需渲染时保存不含鼠标圆点和坐标信息的画面，供局部更新恢复"""
+        if self.scene_surface is not None:
+            self.scene_surface.blit(self.screen, (0, 0))
+
+    def draw_cursor_overlay(self, show_derivative=False):
+        """
+        在当前鼠标位置绘制红色圆点和坐标信息
+
+        返回:
+            被绘制覆盖的矩形列表
+        """
         # 获取鼠标位置
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        
-        # 在鼠标位置绘制红色圆点
-        pygame.draw.circle(screen, RED, (mouse_x, mouse_y), 5)
-        
-        # 显示当前坐标信息
-        show_coordinates((mouse_x, mouse_y), mouse2Z(mouse_x, mouse_y))
-    
-    # 事件处理
-    for event in pygame.event.get():
+        self.mouse_x, self.mouse_y = pygame.mouse.get_pos()
+        rects = [pygame.draw.circle(self.screen, RED, (self.mouse_x, self.mouse_y), 5)]
+        rects += self.show_coordinates((self.mouse_x, self.mouse_y),
+                                       self.mouse2Z(self.mouse_x, self.mouse_y), show_derivative)
+        self.overlay_rects = rects
+        return rects
+
+    def update_cursor_overlay(self):
+        """
+        只重绘鼠标圆点和坐标信息：从场景快照恢复上次覆盖的区域，再在新位置绘制
+
+        返回:
+            需要更新到屏幕的脏矩形列表
+        """
+        dirty = self.overlay_rects
+        for rect in dirty:
+            self.screen.blit(self.scene_surface, rect, rect)
+        return dirty + self.draw_cursor_overlay(self.derivative_mode)
+
+    def draw_motion_dots(self):
+        """在最新的鼠标位置和函数值位置绘制圆点"""
+        if self.motion_dots is None:
+            return
+        mouse_pos, f_pos = self.motion_dots
+        pygame.draw.circle(self.screen, RED, mouse_pos, 5)
+        pygame.draw.circle(self.screen, YELLOW, f_pos, 5)
+        self.motion_dots = None
+
+    # ---------- 事件处理 ----------
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
+            # 其他事件可能改变轨迹，先处理之前累积的移动采样以保持顺序
+            if event.type != pygame.MOUSEMOTION:
+                self.flush_motion_samples()
+            self.handle_event(event)
+            self.record_view()
+
+        # 一次向量化计算本帧的全部移动采样
+        self.flush_motion_samples()
+        if self.recorder is not None:
+            self.recorder.flush()
+        if self.viewport.key != self.view_key:
+            self.on_view_changed()
+
+    def advance_replay(self):
+        """
+        把回放中本帧到期的记录送入与交互操作相同的处理流程
+
+        返回:
+            本帧是否有记录被处理
+        """
+        if self.replayer is None or self.replayer.finished:
+            return False
+        batch = self.replayer.next_batch()
+        # 按类型切成连续的段，连续的采样点和圆环各自批量计算
+        for run in np.split(batch, np.flatnonzero(np.diff(batch["kind"])) + 1):
+            if not len(run):
+                continue
+            kind = run["kind"][0]
+            if kind == POINT:
+                self.tracking_mode = True
+                fs = self.add_trail_points(run["z"])
+                self.mouse_x, self.mouse_y = self.z2mouse(complex(run["z"][-1]))
+                self.motion_dots = ((self.mouse_x, self.mouse_y), self.viewport.to_screen(fs[-1])[0].tolist())
+            elif kind == BREAK:
+                self.break_trails()
+            elif kind == RING:
+                self.add_rings(run["z"])
+            elif kind == REMOVE:
+                for z in run["z"].tolist():
+                    self.remove_ring_at(z)
+            elif kind == KEY:
+                for key in run["arg"].tolist():
+                    self.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0))
+            elif kind == VIEW:
+                origin_x, origin_y, scale = self.viewport.key
+                for z, arg in zip(run["z"].tolist(), run["arg"].tolist()):
+                    if arg == 0:
+                        origin_x, origin_y = int(z.real), int(z.imag)
+                    else:
+                        scale = z.real
+                self.viewport.restore(origin_x, origin_y, scale)
+
+        if self.viewport.key != self.view_key:
+            self.on_view_changed()
+
+        if self.replayer.finished:
+            print(f"回放结束: {len(self.replayer.recording)} 条记录")
+            if self.exit_after_replay:
+                self.running = False
+        return len(batch) > 0
+
+    def handle_event(self, event):
         if event.type == pygame.QUIT:
-            running = False
+            self.running = False
         elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:  # ESC键清除轨迹
-                mouse_trail = []
-                function_trail = []
-                ring_info_list = []  # 清除所有圆环信息
-                cached_rings_surface = None  # 清除缓存表面
-                needs_redraw = True  # 标记需要重新绘制
-            elif event.key == pygame.K_c:  # C键清除轨迹
-                mouse_trail = []
-                function_trail = []
-                ring_info_list = []  # 清除所有圆环信息
-                cached_rings_surface = None  # 清除缓存表面
-                needs_redraw = True
+            if self.recorder is not None and event.key in RECORDED_KEYS:
+                self.recorder.key(event.key)
+            if event.key in (pygame.K_ESCAPE, pygame.K_c):  # ESC键或C键清除轨迹和圆环
+                self.clear_trails()
+                self.clear_rings()
+                self.lattice_mode = False
+            elif event.key == pygame.K_BACKSPACE:  # 退格键删除最近添加的圆环
+                if len(self.ring_layer):
+                    self.remove_ring(self.ring_layer.ids[-1])
+            elif event.key == pygame.K_DELETE:  # Delete键删除右键选中的圆环
+                if self.selected_ring is not None:
+                    self.delete_ring(self.selected_ring)
+            elif event.key == pygame.K_f:  # F键切换全平面域着色
+                self.domain_mode = not self.domain_mode
+            elif event.key == pygame.K_F3:  # F3键切换帧耗时统计叠加层
+                self.show_profiler = not self.show_profiler
+            elif event.key == pygame.K_g:  # G键切换覆盖视口的环阵列
+                self.toggle_ring_lattice()
+            elif event.key == pygame.K_l:  # L键切换变形的直角网格
+                self.show_grid = not self.show_grid
+            elif event.key == pygame.K_k:  # K键切换变形的极坐标网格（同心圆和射线）
+                self.show_polar_grid = not self.show_polar_grid
+            elif event.key == pygame.K_0:  # 0键回到初始视图
+                self.viewport.reset()
             elif event.key == pygame.K_p:  # P键切换导数模式
-                derivative_mode = not derivative_mode
+                self.derivative_mode = not self.derivative_mode
                 # 清除轨迹和环
-                mouse_trail = []
-                function_trail = []
-                ring_info_list = []  # 清除所有圆环信息
-                cached_rings_surface = None  # 清除缓存表面
-                needs_redraw = True  # 标记需要重新绘制
-                
+                self.clear_trails()
+                self.clear_rings()
+                self.lattice_mode = False
+
                 # 如果进入导数模式，退出跟踪模式
-                if derivative_mode:
-                    tracking_mode = False
+                if self.derivative_mode:
+                    self.tracking_mode = False
+        elif event.type == pygame.MOUSEWHEEL:  # 滚轮以鼠标位置为中心缩放
+            self.viewport.zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1 and derivative_mode:  # 导数模式下左键点击
-                # 在导数模式下，绘制彩色圆环
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                z = mouse2Z(mouse_x, mouse_y)
-                
-                # 计算导数 - 使用数值微分，获取多个方向的导数值
-                dz_angles, dfs = numerical_derivative(z)
-                
-                # 计算函数值位置
-                f_z = complex_function(z)
-                f_pos_x, f_pos_y = z2mouse(f_z)
-                
-                # 保存圆环信息到列表中，不再覆盖之前的圆环
-                ring_info_list.append(((mouse_x, mouse_y), (f_pos_x, f_pos_y), dz_angles, dfs))
-                needs_redraw = True  # 标记需要重新绘制
+            if event.button == 2:  # 中键按下开始拖动平移
+                self.panning = True
+            elif event.button == 3 and self.derivative_mode:  # 导数模式下右键选中圆环，Shift+右键删除
+                ring_id = self.pick_ring(event.pos)
+                if ring_id is not None and pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                    self.delete_ring(ring_id)
+                else:
+                    self.selected_ring = ring_id
+            elif event.button == 1 and self.derivative_mode:  # 导数模式下左键点击
+                # 计算导数环并叠加到环图层，只重绘新环的包围盒
+                self.mouse_x, self.mouse_y = event.pos
+                z = self.mouse2Z(self.mouse_x, self.mouse_y)
+                if self.recorder is not None:
+                    self.recorder.ring(z)
+                self.add_rings([z])
             elif event.button == 1:  # 鼠标左键
                 # 进入跟踪模式
-                tracking_mode = True
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                
+                self.tracking_mode = True
+                self.mouse_x, self.mouse_y = event.pos
+
                 # 如果需要开始新的轨迹段
-                if new_trail_segment:
-                    # 不清除现有轨迹，而是添加None作为分隔符
-                    # 确保在添加新点之前添加分隔符，防止连接到上一段轨迹
-                    if mouse_trail and function_trail:
-                        mouse_trail.append(None)
-                        function_trail.append(None)
-                    
-                    # 添加新的起始点
-                    mouse_trail.append((mouse_x, mouse_y))
-                    
-                    # 计算初始函数值
-                    z = mouse2Z(mouse_x, mouse_y)
-                    f_z = complex_function(z)
-                    f_pos = z2mouse(f_z)
-                    function_trail.append(f_pos)
-                    
-                    # 重置标志
-                    new_trail_segment = False
-                else:
-                    # 继续现有轨迹
-                    f_pos = update_function_point((mouse_x, mouse_y))
+                if self.new_trail_segment:
+                    # 不清除现有轨迹，而是开始新的一段
+                    # 确保在添加新点之前分段，防止连接到上一段轨迹
+                    self.break_trails()
+                    self.new_trail_segment = False
+
+                # 添加当前点及其函数值
+                self.update_function_point((self.mouse_x, self.mouse_y))
         elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 1:  # 鼠标左键释放
+            if event.button == 2:
+                self.panning = False
+            elif event.button == 1:  # 鼠标左键释放
                 # 继续保持跟踪模式，不清除轨迹
                 # 设置标志，下次点击时开始新的轨迹段
-                new_trail_segment = True
-        elif event.type == pygame.MOUSEMOTION and tracking_mode:
-            # 在跟踪模式下，鼠标移动时更新轨迹
-            # 在跟踪模式下，鼠标移动时更新轨迹
-            mouse_x, mouse_y = event.pos
-            
-            # 如果需要开始新的轨迹段，先添加分隔符
-            if new_trail_segment and mouse_trail and function_trail:
-                mouse_trail.append(None)
-                function_trail.append(None)
-                new_trail_segment = False
-                
-            f_pos = update_function_point((mouse_x, mouse_y))
-            
-            # 在当前鼠标位置绘制红色圆点
-            pygame.draw.circle(screen, RED, (mouse_x, mouse_y), 5)
-            
-            # 在函数值位置绘制黄色圆点
-            pygame.draw.circle(screen, YELLOW, f_pos, 5)
-    
-    # 更新显示
+                self.new_trail_segment = True
+        elif event.type == pygame.MOUSEMOTION and self.panning:
+            self.viewport.pan(*event.rel)
+        elif event.type == pygame.MOUSEMOTION and self.tracking_mode:
+            # 在跟踪模式下，鼠标移动时只记录采样，帧末统一计算
+            self.mouse_x, self.mouse_y = event.pos
+
+            # 如果需要开始新的轨迹段，先分段
+            if self.new_trail_segment and len(self.mouse_trail) and len(self.function_trail):
+                self.flush_motion_samples()
+                self.break_trails()
+                self.new_trail_segment = False
+
+            self.motion_samples.append(event.pos)
+
+    # ---------- 主循环 ----------
+    def run(self):
+        if self.idle:
+            self.run_idle()
+        else:
+            self.run_continuous()
+        self.close()
+
+    def run_continuous(self):
+        """每秒固定重绘60帧"""
+        profiler = self.profiler
+        while self.running:
+            profiler.begin_frame()
+            self.draw_frame()
+            with profiler.stage("events"):
+                self.handle_events()
+                self.advance_replay()
+            self.draw_motion_dots()
+
+            # 性能叠加层
+            if self.show_profiler:
+                with profiler.stage("hud"):
+                    self.profiler_hud.blit(self.screen)
+
+            # 更新显示
+            with profiler.stage("flip"):
+                pygame.display.flip()
+
+            # 控制帧率
+            with profiler.stage("tick"):
+                self.clock.tick(self.max_fps)
+            profiler.end_frame()
+
+    def wait_timeout(self):
+        """
+        按需渲染时等待事件的超时
+
+        返回:
+            0 表示有进行中的动画（按住WASD移动、域着色细化未完成）需要逐帧绘制；
+            正数为毫秒超时（叠加层定时刷新）；None 表示可以一直阻塞到下一个事件
+        """
+        if self.tracking_mode:
+            keys = pygame.key.get_pressed()
+            if any(keys[key] for key in MOVE_KEYS):
+                return 0
+        if self.replayer is not None and not self.replayer.finished:
+            # 回放中：到下一条记录的时间时醒来
+            return int(np.ceil(self.replayer.time_to_next() * 1000))
+        if self.domain_mode and not self.domain_layer.complete:
+            return 0
+        if self.show_profiler:
+            return int(self.profiler_hud.refresh * 1000)
+        return None
+
+    def classify_events(self, events):
+        """
+        判断这批事件需要的重绘
+
+        返回:
+            "full" 整帧重绘；"cursor" 只需更新鼠标圆点和坐标信息；None 无需重绘
+        """
+        redraw = None
+        for event in events:
+            if event.type == pygame.MOUSEMOTION and not self.tracking_mode and not self.panning:
+                redraw = "cursor"
+            else:
+                return "full"
+        return redraw
+
+    def run_idle(self):
+        """
+        按需渲染：阻塞等待事件，只在状态或鼠标变化时重绘
+
+        只有鼠标移动时从场景快照恢复旧圆点和坐标信息所在区域，
+        绘制新的之后用 display.update(rects) 只提交这些脏矩形。
+        """
+        profiler = self.profiler
+        redraw = "full"  # 第一帧
+        while self.running:
+            profiler.begin_frame()
+            with profiler.stage("wait"):
+                timeout = self.wait_timeout()
+                if timeout == 0:
+                    events = pygame.event.get()
+                    redraw = "full"
+                else:
+                    event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+                    events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+                    if timeout is not None and not events:
+                        redraw = "full"  # 超时刷新叠加层
+
+            kind = self.classify_events(events)
+            if kind == "full" or self.show_profiler and kind is not None:
+                redraw = "full"
+            elif kind == "cursor" and redraw is None:
+                redraw = "cursor" if self.overlay_rects is not None else "full"
+
+            with profiler.stage("events"):
+                self.handle_events(events)
+                if self.advance_replay():
+                    redraw = "full"
+            if not self.running:
+                break
+
+            if redraw == "full":
+                self.draw_frame()
+                self.draw_motion_dots()
+                if self.show_profiler:
+                    with profiler.stage("hud"):
+                        self.profiler_hud.blit(self.screen)
+                with profiler.stage("flip"):
+                    pygame.display.flip()
+            elif redraw == "cursor":
+                dirty = self.update_cursor_overlay()
+                with profiler.stage("flip"):
+                    pygame.display.update(dirty)
+            else:
+                # 没有绘制的空转不计入帧统计
+                continue
+            redraw = None
+
+            # 限制最高帧率
+            with profiler.stage("tick"):
+                self.clock.tick(self.max_fps)
+            profiler.end_frame()
+
+    def close(self):
+        stats = point_cache.stats()
+        print(f"单点计算缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+              f"命中率 {stats['hit_rate']:.1%}，当前 {stats['size']}/{stats['maxsize']} 项")
+        # 退出pygame
+        self.profiler.close()
+        self.ring_layer.close()
+        self.ring_pool.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"已录制 {self.recorder.count} 条记录到 {self.recorder.path}")
+        pygame.quit()
+
+
+def report_startup_timing(app, t_imported, t_initialized):
+    """绘制第一帧并报告各启动阶段的耗时"""
+    app.draw_frame()
     pygame.display.flip()
-    
-    # 控制帧率
-    clock.tick(60)
+    t_first_frame = time.perf_counter()
+
+    kind = "热启动" if cache_stats["hits"] and not cache_stats["misses"] else "冷启动"
+    print(f"启动计时（{kind}，公式缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次）")
+    print(f"  导入模块:   {(t_imported - _START_TIME) * 1e3:8.1f} ms")
+    print(f"  初始化:     {(t_initialized - t_imported) * 1e3:8.1f} ms")
+    print(f"  第一帧:     {(t_first_frame - t_initialized) * 1e3:8.1f} ms")
+    print(f"  到首帧合计: {(t_first_frame - _START_TIME) * 1e3:8.1f} ms")
+    print(f"  已加载matplotlib: {'是' if 'matplotlib' in sys.modules else '否'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="复数函数可视化")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="报告冷/热启动到第一帧的耗时后退出")
+    parser.add_argument("--clear-formula-cache", action="store_true",
+                        help="启动前清空磁盘上的公式缓存（用于测量冷启动）")
+    parser.add_argument("--profile-csv", metavar="PATH",
+                        help="把每帧各阶段的耗时(毫秒)写入CSV文件")
+    parser.add_argument("--continuous", action="store_true",
+                        help="每秒固定重绘60帧，不使用按需渲染")
+    parser.add_argument("--record", metavar="PATH",
+                        help="把轨迹采样、分段、圆环和按键追加录制到二进制文件")
+    parser.add_argument("--replay", metavar="PATH", help="回放录制文件，可配合 --expr 用其他函数重新计算")
+    parser.add_argument("--replay-fast", action="store_true", help="尽快回放，不按录制时的时间间隔")
+    parser.add_argument("--expr", help="要可视化的函数表达式，如 \"exp(z)*sin(x) + y**2*1j\"")
+    args = parser.parse_args(argv)
+
+    func = None
+    if args.expr:
+        try:
+            func = compile_expression(args.expr)
+        except ExpressionError as e:
+            parser.error(f"无法解析表达式: {e}")
+
+    if args.clear_formula_cache:
+        clear_formula_cache()
+
+    t_imported = time.perf_counter()
+    replayer = None
+    if args.replay:
+        try:
+            recording = Recording(args.replay)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法读取录制文件: {e}")
+        print(f"回放 {args.replay}: {len(recording)} 条记录，时长 {recording.duration:.1f} 秒，"
+              f"录制时的函数为 {recording.source or '未知'}")
+        replayer = Replayer(recording, realtime=not args.replay_fast)
+    recorder = None
+    if args.record:
+        try:
+            recorder = Recorder(args.record, (func or complex_function).source)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法打开录制文件: {e}")
+
+    app = ScreenDemo(func, profile_csv=args.profile_csv, idle=not args.continuous,
+                     recorder=recorder, replayer=replayer)
+    t_initialized = time.perf_counter()
+
+    if args.startup_timing:
+        report_startup_timing(app, t_imported, t_initialized)
+        app.close()
+    else:
+        app.run()
+    sys.exit()
 
-# 退出pygame
-pygame.quit()
-sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,86 @@
+"""均匀网格空间索引：按包围盒登记对象，支持矩形范围查询和点查询"""
+from collections import defaultdict
+
+
+def rects_intersect(a, b):
+    """判断两个 (x, y, w, h) 矩形是否相交"""
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+class SpatialGrid:
+    """
+    均匀网格空间索引
+
+    每个对象以若干 (x, y, w, h) 矩形登记到它们覆盖的所有格子；查询时只检查相关格子中的对象，
+    代价与对象总数无关。对象用可哈希的键（如整数编号）表示。
+
+    参数:
+        cell_size: 格子边长(像素)
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = defaultdict(set)
+        self._rects = {}
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def _cells_of(self, rect):
+        x, y, w, h = rect
+        size = self.cell_size
+        for cx in range(int(x // size), int((x + w - 1) // size) + 1):
+            for cy in range(int(y // size), int((y + h - 1) // size) + 1):
+                yield cx, cy
+
+    def insert(self, key, rects):
+        """登记对象的包围盒列表（空列表也会登记，只是不会被查询到）"""
+        if key in self._rects:
+            self.remove(key)
+        self._rects[key] = rects
+        for rect in rects:
+            for cell in self._cells_of(rect):
+                self._cells[cell].add(key)
+
+    def remove(self, key):
+        for rect in self._rects.pop(key, ()):
+            for cell in self._cells_of(rect):
+                bucket = self._cells.get(cell)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._rects.clear()
+
+    def rects(self, key):
+        return self._rects[key]
+
+    def query(self, rect):
+        """
+        返回:
+            包围盒与 rect 相交的对象键集合
+        """
+        candidates = set()
+        for cell in self._cells_of(rect):
+            bucket = self._cells.get(cell)
+            if bucket:
+                candidates |= bucket
+        return {key for key in candidates
+                if any(rects_intersect(rect, r) for r in self._rects[key])}
+
+    def query_point(self, x, y):
+        """
+        返回:
+            包围盒包含点 (x, y) 的对象键集合
+        """
+        bucket = self._cells.get((int(x // self.cell_size), int(y // self.cell_size)), ())
+        return {key for key in bucket
+                if any(r[0] <= x < r[0] + r[2] and r[1] <= y < r[1] + r[3]
+                       for r in self._rects[key])}
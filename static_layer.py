@@ -0,0 +1,34 @@
+"""按键值缓存的静态图层"""
+import pygame
+
+
+class StaticLayer:
+    """
+    只在键值变化时重新构建的整屏静态图层
+
+    参数:
+        build: build(surface) 在给定表面上绘制图层内容
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.surface = None
+        self._key = None
+
+    def invalidate(self):
+        """强制下次使用时重新构建"""
+        self._key = None
+
+    def get(self, key, size):
+        """返回与键值对应的图层表面，键值或尺寸变化时重新构建"""
+        key = (key, tuple(size))
+        if key != self._key:
+            if self.surface is None or self.surface.get_size() != tuple(size):
+                self.surface = pygame.Surface(size).convert()
+            self.build(self.surface)
+            self._key = key
+        return self.surface
+
+    def blit(self, target, key, special_flags=0):
+        """将图层一次性贴到目标表面左上角"""
+        target.blit(self.get(key, target.get_size()), (0, 0), special_flags=special_flags)
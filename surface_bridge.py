@@ -0,0 +1,40 @@
+"""Cairo与Pygame共享像素缓冲区的零拷贝桥接"""
+import sys
+
+import cairo
+import pygame
+
+# Cairo的ARGB32按本机字节序存储32位整数，在小端机器上内存中的字节顺序为BGRA
+PYGAME_FORMAT = "BGRA" if sys.byteorder == "little" else "ARGB"
+
+
+class CairoPygameBridge:
+    """
+    一块预先分配的像素缓冲区，同时被Cairo表面和Pygame表面引用
+
+    Cairo绘制完成并flush后，Pygame表面立即可见新内容，无需任何拷贝或通道重排。
+    缓冲区内容为预乘alpha，贴图时需使用 blit() 以预乘方式混合。
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # ARGB32每像素4字节，Cairo的行宽恰为 width*4，与Pygame的紧密排列一致
+        self.stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, width)
+        assert self.stride == width * 4
+        self.buffer = bytearray(self.stride * height)
+        self.cairo_surface = cairo.ImageSurface.create_for_data(
+            self.buffer, cairo.FORMAT_ARGB32, width, height, self.stride
+        )
+        self.pygame_surface = pygame.image.frombuffer(
+            self.buffer, (width, height), PYGAME_FORMAT
+        )
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def blit(self, target, pos=(0, 0), area=None):
+        """将共享表面按预乘alpha混合到目标表面"""
+        return target.blit(self.pygame_surface, pos, area,
+                           special_flags=pygame.BLEND_PREMULTIPLIED)
@@ -0,0 +1,144 @@
+"""分段轨迹存储与持久化轨迹画布"""
+import numpy as np
+import pygame
+
+
+class TrailStore:
+    """
+    基于可增长NumPy数组的分段轨迹
+
+    points 默认为 (N, 2) 的浮点屏幕坐标；item_shape=()、dtype=complex 时为 (N,) 复平面坐标。
+    segment_starts 记录每段第一个点的下标。
+    clear() 会递增 generation，供画布判断是否需要整体重绘。
+    """
+
+    def __init__(self, capacity=1024, item_shape=(2,), dtype=float):
+        self.item_shape = tuple(item_shape)
+        self._points = np.empty((capacity,) + self.item_shape, dtype=dtype)
+        self._starts = np.zeros(64, dtype=np.intp)
+        self.size = 0
+        self.num_segments = 0
+        self.generation = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def points(self):
+        return self._points[:self.size]
+
+    @property
+    def segment_starts(self):
+        return self._starts[:self.num_segments]
+
+    def _reserve(self, count):
+        """按倍增策略保证还能容纳 count 个点"""
+        needed = self.size + count
+        if needed > len(self._points):
+            capacity = max(needed, 2 * len(self._points))
+            grown = np.empty((capacity,) + self.item_shape, dtype=self._points.dtype)
+            grown[:self.size] = self._points[:self.size]
+            self._points = grown
+
+    def append(self, point):
+        """在当前段末尾追加一个点"""
+        self.extend(np.asarray(point, dtype=self._points.dtype).reshape((1,) + self.item_shape))
+
+    def extend(self, points):
+        """在当前段末尾追加 K 个点"""
+        points = np.asarray(points, dtype=self._points.dtype).reshape((-1,) + self.item_shape)
+        if not len(points):
+            return
+        if self.num_segments == 0:
+            self._start_segment()
+        self._reserve(len(points))
+        self._points[self.size:self.size + len(points)] = points
+        self.size += len(points)
+
+    def _start_segment(self):
+        if self.num_segments == len(self._starts):
+            self._starts = np.concatenate((self._starts, np.zeros_like(self._starts)))
+        self._starts[self.num_segments] = self.size
+        self.num_segments += 1
+
+    def last_point(self):
+        """当前段的最后一个点，当前段为空时返回None"""
+        if self.num_segments and self._starts[self.num_segments - 1] < self.size:
+            return self._points[self.size - 1].copy()
+        return None
+
+    def break_segment(self):
+        """结束当前段，之后追加的点属于新的一段（空段不会重复创建）"""
+        if self.num_segments and self._starts[self.num_segments - 1] < self.size:
+            self._start_segment()
+
+    def clear(self):
+        self.size = 0
+        self.num_segments = 0
+        self.generation += 1
+
+    def segment_ranges(self, start=0):
+        """返回与 [start, size) 相交的各段 (起点, 终点) 下标"""
+        starts = self.segment_starts
+        ends = np.append(starts[1:], self.size)
+        keep = ends > start
+        return list(zip(np.maximum(starts[keep], start).tolist(), ends[keep].tolist()))
+
+
+class TrailCanvas:
+    """
+    持久化的透明轨迹画布
+
+    每帧只把各轨迹自上次绘制以来新增的点画到画布上，再整体贴图一次，
+    因而每帧开销与轨迹总长度无关。
+
+    参数:
+        size: 画布尺寸
+        trails: [(TrailStore, color), ...]，按顺序绘制
+        width: 线宽
+        project: 可选，把存储的点批量转换为 (N, 2) 屏幕坐标的函数（如 Viewport.to_screen）
+    """
+
+    def __init__(self, size, trails, width=2, project=None):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.trails = trails
+        self.width = width
+        self.project = project
+        self._drawn = [0] * len(trails)
+        self._generations = [store.generation for store, _ in trails]
+        self._view_key = None
+
+    def reset(self):
+        """清空画布，下次 update 时重新绘制全部点"""
+        self.surface.fill((0, 0, 0, 0))
+        self._drawn = [0] * len(self.trails)
+
+    def update(self, view_key=None):
+        """
+        绘制新增的点；任一轨迹被清空过或 view_key 变化（视图平移缩放）则整体重绘
+
+        整体重绘时每条轨迹只做一次向量化的坐标变换。
+        """
+        generations = [store.generation for store, _ in self.trails]
+        if generations != self._generations or view_key != self._view_key:
+            self._generations = generations
+            self._view_key = view_key
+            self.reset()
+
+        for i, (store, color) in enumerate(self.trails):
+            drawn = self._drawn[i]
+            if store.size == drawn:
+                continue
+            # 从上次最后一个点开始画，使新旧线段首尾相连
+            first = max(drawn - 1, 0)
+            points = store.points[first:]
+            if self.project is not None:
+                points = self.project(points)
+            for start, end in store.segment_ranges(first):
+                if end - start > 1:
+                    pygame.draw.lines(self.surface, color, False,
+                                      points[start - first:end - first].tolist(), self.width)
+            self._drawn[i] = store.size
+
+    def blit(self, target):
+        target.blit(self.surface, (0, 0))
@@ -0,0 +1,111 @@
+"""可平移缩放的视图：屏幕坐标与复平面坐标之间的仿射变换"""
+import math
+
+import numpy as np
+
+from coords import screen_to_complex
+
+
+class Viewport:
+    """
+    屏幕与复平面之间的视图
+
+    origin_x/origin_y 为复平面原点的屏幕坐标，scale 为每单位长度的像素数。
+    key 在视图变化时改变，供各缓存判断是否需要重绘。
+
+    参数:
+        width, height: 窗口尺寸
+        scale: 初始缩放（每单位像素数）
+        min_scale, max_scale: 缩放范围
+    """
+
+    def __init__(self, width, height, scale, min_scale=5.0, max_scale=1e6):
+        self.width = width
+        self.height = height
+        self.default_scale = scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.reset()
+
+    def reset(self):
+        """回到原点居中、默认缩放的初始视图"""
+        self.origin_x = self.width // 2
+        self.origin_y = self.height // 2
+        self.scale = self.default_scale
+
+    @property
+    def key(self):
+        return (self.origin_x, self.origin_y, self.scale)
+
+    def restore(self, origin_x, origin_y, scale):
+        """恢复到 key 给出的视图（回放录制的视图时使用）"""
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.scale = scale
+
+    # ---------- 坐标转换 ----------
+    def to_complex(self, points):
+        """(N, 2) 屏幕坐标转 (N,) 复数"""
+        return screen_to_complex(points, self.origin_x, self.origin_y, self.scale)
+
+    def to_screen(self, zs):
+        """(N,) 复数转 (N, 2) 浮点屏幕坐标，一次向量化变换"""
+        zs = np.asarray(zs).reshape(-1)
+        points = np.empty((zs.size, 2), dtype=float)
+        np.multiply(zs.real, self.scale, out=points[:, 0])
+        points[:, 0] += self.origin_x
+        np.multiply(zs.imag, -self.scale, out=points[:, 1])
+        points[:, 1] += self.origin_y
+        return points
+
+    def point_to_complex(self, x, y):
+        """单个屏幕坐标转复数"""
+        return complex((x - self.origin_x) / self.scale, -(y - self.origin_y) / self.scale)
+
+    def point_to_screen(self, z):
+        """单个复数转整数屏幕坐标（向零取整）"""
+        return (int(z.real * self.scale) + self.origin_x,
+                int(-z.imag * self.scale) + self.origin_y)
+
+    # ---------- 视图操作 ----------
+    def pan(self, dx, dy):
+        """按屏幕像素平移"""
+        self.origin_x += dx
+        self.origin_y += dy
+
+    def zoom_at(self, pos, factor):
+        """以屏幕位置pos为中心缩放，pos下的复平面点保持不动"""
+        scale = min(self.max_scale, max(self.min_scale, self.scale * factor))
+        if scale == self.scale:
+            return
+        x, y = pos
+        z = self.point_to_complex(x, y)
+        self.scale = scale
+        # 原点取整，使坐标轴和刻度落在整像素上
+        self.origin_x = round(x - z.real * scale)
+        self.origin_y = round(y + z.imag * scale)
+
+    def tick_step(self, min_pixels=150):
+        """
+        刻度间隔（复平面单位）
+
+        返回:
+            1、2、5乘以10的整数次幂中，屏幕间距不小于 min_pixels 的最小值
+        """
+        exponent = math.floor(math.log10(min_pixels / self.scale))
+        for base in (1, 2, 5, 10):
+            step = base * 10.0 ** exponent
+            if step * self.scale >= min_pixels:
+                return step
+        return 10.0 ** (exponent + 1)
+
+    def visible_range(self):
+        """
+        返回:
+            (x_min, x_max, y_min, y_max) 窗口覆盖的复平面范围
+        """
+        x_min = -self.origin_x / self.scale
+        x_max = (self.width - self.origin_x) / self.scale
+        y_min = -(self.height - self.origin_y) / self.scale
+        y_max = self.origin_y / self.scale
+        return x_min, x_max, y_min, y_max
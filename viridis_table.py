@@ -0,0 +1,279 @@
+"""预先计算的viridis颜色表，避免为查色启动matplotlib
+
+数据与 matplotlib 的 viridis（256级）一致。
+"""
+import numpy as np
+
+VIRIDIS_DATA = np.array([
+    [0.26700400, 0.00487400, 0.32941500],
+    [0.26851000, 0.00960500, 0.33542700],
+    [0.26994400, 0.01462500, 0.34137900],
+    [0.27130500, 0.01994200, 0.34726900],
+    [0.27259400, 0.02556300, 0.35309300],
+    [0.27380900, 0.03149700, 0.35885300],
+    [0.27495200, 0.03775200, 0.36454300],
+    [0.27602200, 0.04416700, 0.37016400],
+    [0.27701800, 0.05034400, 0.37571500],
+    [0.27794100, 0.05632400, 0.38119100],
+    [0.27879100, 0.06214500, 0.38659200],
+    [0.27956600, 0.06783600, 0.39191700],
+    [0.28026700, 0.07341700, 0.39716300],
+    [0.28089400, 0.07890700, 0.40232900],
+    [0.28144600, 0.08432000, 0.40741400],
+    [0.28192400, 0.08966600, 0.41241500],
+    [0.28232700, 0.09495500, 0.41733100],
+    [0.28265600, 0.10019600, 0.42216000],
+    [0.28291000, 0.10539300, 0.42690200],
+    [0.28309100, 0.11055300, 0.43155400],
+    [0.28319700, 0.11568000, 0.43611500],
+    [0.28322900, 0.12077700, 0.44058400],
+    [0.28318700, 0.12584800, 0.44496000],
+    [0.28307200, 0.13089500, 0.44924100],
+    [0.28288400, 0.13592000, 0.45342700],
+    [0.28262300, 0.14092600, 0.45751700],
+    [0.28229000, 0.14591200, 0.46151000],
+    [0.28188700, 0.15088100, 0.46540500],
+    [0.28141200, 0.15583400, 0.46920100],
+    [0.28086800, 0.16077100, 0.47289900],
+    [0.28025500, 0.16569300, 0.47649800],
+    [0.27957400, 0.17059900, 0.47999700],
+    [0.27882600, 0.17549000, 0.48339700],
+    [0.27801200, 0.18036700, 0.48669700],
+    [0.27713400, 0.18522800, 0.48989800],
+    [0.27619400, 0.19007400, 0.49300100],
+    [0.27519100, 0.19490500, 0.49600500],
+    [0.27412800, 0.19972100, 0.49891100],
+    [0.27300600, 0.20452000, 0.50172100],
+    [0.27182800, 0.20930300, 0.50443400],
+    [0.27059500, 0.21406900, 0.50705200],
+    [0.26930800, 0.21881800, 0.50957700],
+    [0.26796800, 0.22354900, 0.51200800],
+    [0.26658000, 0.22826200, 0.51434900],
+    [0.26514500, 0.23295600, 0.51659900],
+    [0.26366300, 0.23763100, 0.51876200],
+    [0.26213800, 0.24228600, 0.52083700],
+    [0.26057100, 0.24692200, 0.52282800],
+    [0.25896500, 0.25153700, 0.52473600],
+    [0.25732200, 0.25613000, 0.52656300],
+    [0.25564500, 0.26070300, 0.52831200],
+    [0.25393500, 0.26525400, 0.52998300],
+    [0.25219400, 0.26978300, 0.53157900],
+    [0.25042500, 0.27429000, 0.53310300],
+    [0.24862900, 0.27877500, 0.53455600],
+    [0.24681100, 0.28323700, 0.53594100],
+    [0.24497200, 0.28767500, 0.53726000],
+    [0.24311300, 0.29209200, 0.53851600],
+    [0.24123700, 0.29648500, 0.53970900],
+    [0.23934600, 0.30085500, 0.54084400],
+    [0.23744100, 0.30520200, 0.54192100],
+    [0.23552600, 0.30952700, 0.54294400],
+    [0.23360300, 0.31382800, 0.54391400],
+    [0.23167400, 0.31810600, 0.54483400],
+    [0.22973900, 0.32236100, 0.54570600],
+    [0.22780200, 0.32659400, 0.54653200],
+    [0.22586300, 0.33080500, 0.54731400],
+    [0.22392500, 0.33499400, 0.54805300],
+    [0.22198900, 0.33916100, 0.54875200],
+    [0.22005700, 0.34330700, 0.54941300],
+    [0.21813000, 0.34743200, 0.55003800],
+    [0.21621000, 0.35153500, 0.55062700],
+    [0.21429800, 0.35561900, 0.55118400],
+    [0.21239500, 0.35968300, 0.55171000],
+    [0.21050300, 0.36372700, 0.55220600],
+    [0.20862300, 0.36775200, 0.55267500],
+    [0.20675600, 0.37175800, 0.55311700],
+    [0.20490300, 0.37574600, 0.55353300],
+    [0.20306300, 0.37971600, 0.55392500],
+    [0.20123900, 0.38367000, 0.55429400],
+    [0.19943000, 0.38760700, 0.55464200],
+    [0.19763600, 0.39152800, 0.55496900],
+    [0.19586000, 0.39543300, 0.55527600],
+    [0.19410000, 0.39932300, 0.55556500],
+    [0.19235700, 0.40319900, 0.55583600],
+    [0.19063100, 0.40706100, 0.55608900],
+    [0.18892300, 0.41091000, 0.55632600],
+    [0.18723100, 0.41474600, 0.55654700],
+    [0.18555600, 0.41857000, 0.55675300],
+    [0.18389800, 0.42238300, 0.55694400],
+    [0.18225600, 0.42618400, 0.55712000],
+    [0.18062900, 0.42997500, 0.55728200],
+    [0.17901900, 0.43375600, 0.55743000],
+    [0.17742300, 0.43752700, 0.55756500],
+    [0.17584100, 0.44129000, 0.55768500],
+    [0.17427400, 0.44504400, 0.55779200],
+    [0.17271900, 0.44879100, 0.55788500],
+    [0.17117600, 0.45253000, 0.55796500],
+    [0.16964600, 0.45626200, 0.55803000],
+    [0.16812600, 0.45998800, 0.55808200],
+    [0.16661700, 0.46370800, 0.55811900],
+    [0.16511700, 0.46742300, 0.55814100],
+    [0.16362500, 0.47113300, 0.55814800],
+    [0.16214200, 0.47483800, 0.55814000],
+    [0.16066500, 0.47854000, 0.55811500],
+    [0.15919400, 0.48223700, 0.55807300],
+    [0.15772900, 0.48593200, 0.55801300],
+    [0.15627000, 0.48962400, 0.55793600],
+    [0.15481500, 0.49331300, 0.55784000],
+    [0.15336400, 0.49700000, 0.55772400],
+    [0.15191800, 0.50068500, 0.55758700],
+    [0.15047600, 0.50436900, 0.55743000],
+    [0.14903900, 0.50805100, 0.55725000],
+    [0.14760700, 0.51173300, 0.55704900],
+    [0.14618000, 0.51541300, 0.55682300],
+    [0.14475900, 0.51909300, 0.55657200],
+    [0.14334300, 0.52277300, 0.55629500],
+    [0.14193500, 0.52645300, 0.55599100],
+    [0.14053600, 0.53013200, 0.55565900],
+    [0.13914700, 0.53381200, 0.55529800],
+    [0.13777000, 0.53749200, 0.55490600],
+    [0.13640800, 0.54117300, 0.55448300],
+    [0.13506600, 0.54485300, 0.55402900],
+    [0.13374300, 0.54853500, 0.55354100],
+    [0.13244400, 0.55221600, 0.55301800],
+    [0.13117200, 0.55589900, 0.55245900],
+    [0.12993300, 0.55958200, 0.55186400],
+    [0.12872900, 0.56326500, 0.55122900],
+    [0.12756800, 0.56694900, 0.55055600],
+    [0.12645300, 0.57063300, 0.54984100],
+    [0.12539400, 0.57431800, 0.54908600],
+    [0.12439500, 0.57800200, 0.54828700],
+    [0.12346300, 0.58168700, 0.54744500],
+    [0.12260600, 0.58537100, 0.54655700],
+    [0.12183100, 0.58905500, 0.54562300],
+    [0.12114800, 0.59273900, 0.54464100],
+    [0.12056500, 0.59642200, 0.54361100],
+    [0.12009200, 0.60010400, 0.54253000],
+    [0.11973800, 0.60378500, 0.54140000],
+    [0.11951200, 0.60746400, 0.54021800],
+    [0.11942300, 0.61114100, 0.53898200],
+    [0.11948300, 0.61481700, 0.53769200],
+    [0.11969900, 0.61849000, 0.53634700],
+    [0.12008100, 0.62216100, 0.53494600],
+    [0.12063800, 0.62582800, 0.53348800],
+    [0.12138000, 0.62949200, 0.53197300],
+    [0.12231200, 0.63315300, 0.53039800],
+    [0.12344400, 0.63680900, 0.52876300],
+    [0.12478000, 0.64046100, 0.52706800],
+    [0.12632600, 0.64410700, 0.52531100],
+    [0.12808700, 0.64774900, 0.52349100],
+    [0.13006700, 0.65138400, 0.52160800],
+    [0.13226800, 0.65501400, 0.51966100],
+    [0.13469200, 0.65863600, 0.51764900],
+    [0.13733900, 0.66225200, 0.51557100],
+    [0.14021000, 0.66585900, 0.51342700],
+    [0.14330300, 0.66945900, 0.51121500],
+    [0.14661600, 0.67305000, 0.50893600],
+    [0.15014800, 0.67663100, 0.50658900],
+    [0.15389400, 0.68020300, 0.50417200],
+    [0.15785100, 0.68376500, 0.50168600],
+    [0.16201600, 0.68731600, 0.49912900],
+    [0.16638300, 0.69085600, 0.49650200],
+    [0.17094800, 0.69438400, 0.49380300],
+    [0.17570700, 0.69790000, 0.49103300],
+    [0.18065300, 0.70140200, 0.48818900],
+    [0.18578300, 0.70489100, 0.48527300],
+    [0.19109000, 0.70836600, 0.48228400],
+    [0.19657100, 0.71182700, 0.47922100],
+    [0.20221900, 0.71527200, 0.47608400],
+    [0.20803000, 0.71870100, 0.47287300],
+    [0.21400000, 0.72211400, 0.46958800],
+    [0.22012400, 0.72550900, 0.46622600],
+    [0.22639700, 0.72888800, 0.46278900],
+    [0.23281500, 0.73224700, 0.45927700],
+    [0.23937400, 0.73558800, 0.45568800],
+    [0.24607000, 0.73891000, 0.45202400],
+    [0.25289900, 0.74221100, 0.44828400],
+    [0.25985700, 0.74549200, 0.44446700],
+    [0.26694100, 0.74875100, 0.44057300],
+    [0.27414900, 0.75198800, 0.43660100],
+    [0.28147700, 0.75520300, 0.43255200],
+    [0.28892100, 0.75839400, 0.42842600],
+    [0.29647900, 0.76156100, 0.42422300],
+    [0.30414800, 0.76470400, 0.41994300],
+    [0.31192500, 0.76782200, 0.41558600],
+    [0.31980900, 0.77091400, 0.41115200],
+    [0.32779600, 0.77398000, 0.40664000],
+    [0.33588500, 0.77701800, 0.40204900],
+    [0.34407400, 0.78002900, 0.39738100],
+    [0.35236000, 0.78301100, 0.39263600],
+    [0.36074100, 0.78596400, 0.38781400],
+    [0.36921400, 0.78888800, 0.38291400],
+    [0.37777900, 0.79178100, 0.37793900],
+    [0.38643300, 0.79464400, 0.37288600],
+    [0.39517400, 0.79747500, 0.36775700],
+    [0.40400100, 0.80027500, 0.36255200],
+    [0.41291300, 0.80304100, 0.35726900],
+    [0.42190800, 0.80577400, 0.35191000],
+    [0.43098300, 0.80847300, 0.34647600],
+    [0.44013700, 0.81113800, 0.34096700],
+    [0.44936800, 0.81376800, 0.33538400],
+    [0.45867400, 0.81636300, 0.32972700],
+    [0.46805300, 0.81892100, 0.32399800],
+    [0.47750400, 0.82144400, 0.31819500],
+    [0.48702600, 0.82392900, 0.31232100],
+    [0.49661500, 0.82637600, 0.30637700],
+    [0.50627100, 0.82878600, 0.30036200],
+    [0.51599200, 0.83115800, 0.29427900],
+    [0.52577600, 0.83349100, 0.28812700],
+    [0.53562100, 0.83578500, 0.28190800],
+    [0.54552400, 0.83803900, 0.27562600],
+    [0.55548400, 0.84025400, 0.26928100],
+    [0.56549800, 0.84243000, 0.26287700],
+    [0.57556300, 0.84456600, 0.25641500],
+    [0.58567800, 0.84666100, 0.24989700],
+    [0.59583900, 0.84871700, 0.24332900],
+    [0.60604500, 0.85073300, 0.23671200],
+    [0.61629300, 0.85270900, 0.23005200],
+    [0.62657900, 0.85464500, 0.22335300],
+    [0.63690200, 0.85654200, 0.21662000],
+    [0.64725700, 0.85840000, 0.20986100],
+    [0.65764200, 0.86021900, 0.20308200],
+    [0.66805400, 0.86199900, 0.19629300],
+    [0.67848900, 0.86374200, 0.18950300],
+    [0.68894400, 0.86544800, 0.18272500],
+    [0.69941500, 0.86711700, 0.17597100],
+    [0.70989800, 0.86875100, 0.16925700],
+    [0.72039100, 0.87035000, 0.16260300],
+    [0.73088900, 0.87191600, 0.15602900],
+    [0.74138800, 0.87344900, 0.14956100],
+    [0.75188400, 0.87495100, 0.14322800],
+    [0.76237300, 0.87642400, 0.13706400],
+    [0.77285200, 0.87786800, 0.13110900],
+    [0.78331500, 0.87928500, 0.12540500],
+    [0.79376000, 0.88067800, 0.12000500],
+    [0.80418200, 0.88204600, 0.11496500],
+    [0.81457600, 0.88339300, 0.11034700],
+    [0.82494000, 0.88472000, 0.10621700],
+    [0.83527000, 0.88602900, 0.10264600],
+    [0.84556100, 0.88732200, 0.09970200],
+    [0.85581000, 0.88860100, 0.09745200],
+    [0.86601300, 0.88986800, 0.09595300],
+    [0.87616800, 0.89112500, 0.09525000],
+    [0.88627100, 0.89237400, 0.09537400],
+    [0.89632000, 0.89361600, 0.09633500],
+    [0.90631100, 0.89485500, 0.09812500],
+    [0.91624200, 0.89609100, 0.10071700],
+    [0.92610600, 0.89733000, 0.10407100],
+    [0.93590400, 0.89857000, 0.10813100],
+    [0.94563600, 0.89981500, 0.11283800],
+    [0.95530000, 0.90106500, 0.11812800],
+    [0.96489400, 0.90232300, 0.12394100],
+    [0.97441700, 0.90359000, 0.13021500],
+    [0.98386800, 0.90486700, 0.13689700],
+    [0.99324800, 0.90615700, 0.14393600],
+])
+VIRIDIS_DATA.flags.writeable = False
+
+
+def viridis(x):
+    """
+    与 matplotlib.cm.viridis 相同的查色方式（不含alpha）
+
+    参数:
+        x: [0, 1] 内的标量或数组
+    返回:
+        (..., 3) RGB数组
+    """
+    n = len(VIRIDIS_DATA)
+    idx = np.clip((np.asarray(x, dtype=float) * n).astype(int), 0, n - 1)
+    return VIRIDIS_DATA[idx]
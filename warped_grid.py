@@ -0,0 +1,151 @@
+"""变形网格叠加层：把整张网格线阵列一次向量化映射到函数值平面"""
+import math
+
+import numpy as np
+import pygame
+
+# 网格线的种类，依次为 水平线(Im z 为常数)、竖直线(Re z 为常数)、同心圆、射线
+HORIZONTAL, VERTICAL, CIRCLE, RAY = range(4)
+
+
+class WarpedGrid:
+    """
+    输入平面上网格线经 f 映射后的折线
+
+    可见范围内的水平线、竖直线（以及可选的以原点为中心的同心圆和射线）的全部采样点拼成一个数组，
+    只调用一次 func 求值、一次投影到屏幕，再在非有限值和远离窗口的点处断开成折线。
+    网格间距按缩放取1、2、5乘以10的幂，屏幕上的间距与采样密度不随缩放变化。
+    折线按 (函数, 视图, 网格种类) 缓存，三者都不变时直接重用。
+
+    参数:
+        spacing: 网格线的最小屏幕间距(像素)
+        sample_step: 沿网格线的采样间距(像素)
+        rays: 极坐标网格的射线条数
+        max_points: 一次映射的采样点数上限，超过时加大采样间距
+    """
+
+    def __init__(self, spacing=60, sample_step=4, rays=24, max_points=200000):
+        self.spacing = spacing
+        self.sample_step = sample_step
+        self.rays = rays
+        self.max_points = max_points
+        self.point_count = 0
+        self._key = None
+        self._polylines = None
+
+    def invalidate(self):
+        self._key = None
+
+    # ---------- 输入网格 ----------
+    def lattice(self, viewport, cartesian=True, polar=False):
+        """
+        生成可见范围内网格线的采样点
+
+        返回:
+            (zs, starts, families): 全部采样点 (N,)、每条线第一个点的下标、每条线的种类
+        """
+        step = viewport.tick_step(self.spacing)
+        x_min, x_max, y_min, y_max = viewport.visible_range()
+        # 采样间距（复平面单位），点数超过上限时按比例放大
+        ds = self.sample_step / viewport.scale
+        lines = []
+        if cartesian:
+            xs = np.arange(math.ceil(x_min / step), math.floor(x_max / step) + 1) * step
+            ys = np.arange(math.ceil(y_min / step), math.floor(y_max / step) + 1) * step
+            lines.append((HORIZONTAL, ys, x_max - x_min))
+            lines.append((VERTICAL, xs, y_max - y_min))
+        if polar:
+            # 与窗口相交的同心圆半径范围，以及覆盖窗口的射线长度
+            near_x = min(max(0.0, x_min), x_max)
+            near_y = min(max(0.0, y_min), y_max)
+            r_min = math.hypot(near_x, near_y)
+            r_max = max(math.hypot(x, y) for x in (x_min, x_max) for y in (y_min, y_max))
+            radii = np.arange(max(1, math.ceil(r_min / step)), math.floor(r_max / step) + 1) * step
+            lines.append((CIRCLE, radii, None))
+            lines.append((RAY, np.arange(self.rays) * (2 * np.pi / self.rays), r_max))
+
+        total = sum(len(values) * self._samples(family, values, length, ds)
+                    for family, values, length in lines if len(values))
+        if total > self.max_points:
+            ds *= total / self.max_points
+
+        zs, starts, families = [], [], []
+        offset = 0
+        for family, values, length in lines:
+            if not len(values):
+                continue
+            if family == CIRCLE:
+                # 每个圆按周长单独取采样数
+                for r in values:
+                    theta = np.linspace(0, 2 * np.pi, max(16, int(2 * np.pi * r / ds)) + 1)
+                    zs.append(r * np.exp(1j * theta))
+                    starts.append(offset)
+                    families.append(CIRCLE)
+                    offset += len(theta)
+                continue
+            t = np.linspace(0, 1, self._samples(family, values, length, ds))
+            if family == HORIZONTAL:
+                block = (x_min + t * (x_max - x_min))[None, :] + 1j * values[:, None]
+            elif family == VERTICAL:
+                block = values[:, None] + 1j * (y_min + t * (y_max - y_min))[None, :]
+            else:
+                block = (t * length)[None, :] * np.exp(1j * values)[:, None]
+            zs.append(block.ravel())
+            starts.extend(offset + np.arange(len(values)) * len(t))
+            families.extend([family] * len(values))
+            offset += block.size
+        if not zs:
+            return np.empty(0, dtype=complex), np.empty(0, dtype=int), np.empty(0, dtype=int)
+        return np.concatenate(zs), np.asarray(starts), np.asarray(families)
+
+    @staticmethod
+    def _samples(family, values, length, ds):
+        if family == CIRCLE:
+            return max(16, int(2 * np.pi * float(np.mean(values)) / ds)) + 1
+        return max(2, int(length / ds)) + 1
+
+    # ---------- 映射 ----------
+    def polylines(self, func, viewport, cartesian=True, polar=False):
+        """
+        返回:
+            按种类分组的折线 {种类: [(n, 2) 屏幕坐标数组, ...]}，视图、函数和网格种类不变时返回缓存
+        """
+        key = (func, viewport.key, cartesian, polar)
+        if key == self._key:
+            return self._polylines
+        zs, starts, families = self.lattice(viewport, cartesian, polar)
+        self.point_count = len(zs)
+        with np.errstate(all="ignore"):
+            points = viewport.to_screen(np.asarray(func(zs), dtype=complex))
+
+        # 非有限值和远离窗口的点处断开（过大的坐标也超出绘图函数的整数范围）
+        limit = 4 * max(viewport.width, viewport.height)
+        with np.errstate(invalid="ignore"):
+            valid = np.isfinite(points).all(axis=1) & (np.abs(points) < limit).all(axis=1)
+        line_start = np.zeros(len(zs), dtype=bool)
+        line_start[starts] = True
+        family_of = np.repeat(families, np.diff(np.append(starts, len(zs))))
+        previous = np.concatenate(([False], valid[:-1]))
+        run_start = valid & (line_start | ~previous)
+
+        kept = np.flatnonzero(valid)
+        breaks = np.flatnonzero(run_start[kept])
+        polylines = {family: [] for family in (HORIZONTAL, VERTICAL, CIRCLE, RAY)}
+        for run, first in zip(np.split(points[kept], breaks[1:]), kept[breaks]):
+            if len(run) >= 2:
+                polylines[family_of[first]].append(run)
+
+        self._key = key
+        self._polylines = polylines
+        return polylines
+
+    def draw(self, surface, func, viewport, colors, cartesian=True, polar=False):
+        """
+        在surface上绘制变形网格
+
+        参数:
+            colors: {种类: 颜色}
+        """
+        for family, lines in self.polylines(func, viewport, cartesian, polar).items():
+            for line in lines:
+                pygame.draw.lines(surface, colors[family], False, line)